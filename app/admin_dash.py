@@ -1,42 +1,54 @@
 # app/admin_dash.py
 import streamlit as st
 import pandas as pd
-from pathlib import Path
-from app.db_utils import get_connection, log_action, init_db
-
-# --- Paths ---
-MODELS_DIR = Path("models")
-
-# --- Page config for wide layout ---
-st.set_page_config(
-    page_title="Admin Dashboard",
-    layout="wide",
-    initial_sidebar_state="auto"
+from app.db_utils import (
+    get_connection, log_action, init_db,
+    USER_COLUMNS, count_users, fetch_users_page, username_exists, add_user, remove_user,
 )
+from app.auth import invalidate_user, user_cache_stats
+from app.model_monitor import load_latest_metrics, PSI_ALERT
+from app import instrumentation
+from app.batching import batcher_stats
+from app import model_registry
 
-# --- Reduce side padding & adjust title ---
-st.markdown(
-    """
-    <style>
-    .block-container {
-        padding: 1rem 1rem;   /* top-bottom, left-right */
-        max-width: 100%;
-    }
-    /* Reduce title size and add top margin */
-    .main-title {
-        font-size: 2rem !important;
-        margin-top: 30px !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+USERS_PAGE_SIZE = 25
 
-# --- Initialize logs table ---
-init_db()
+def _fmt(value, spec):
+    """Format a stored metric; missing (NULL) and NaN values show as n/a."""
+    if value is None or value != value:
+        return "n/a"
+    return format(value, spec)
 
 # --- Admin Dashboard ---
 def show_admin_dashboard():
+    # --- Page config for wide layout ---
+    st.set_page_config(
+        page_title="Admin Dashboard",
+        layout="wide",
+        initial_sidebar_state="auto"
+    )
+
+    # --- Reduce side padding & adjust title ---
+    st.markdown(
+        """
+        <style>
+        .block-container {
+            padding: 1rem 1rem;   /* top-bottom, left-right */
+            max-width: 100%;
+        }
+        /* Reduce title size and add top margin */
+        .main-title {
+            font-size: 2rem !important;
+            margin-top: 30px !important;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # --- Initialize logs table ---
+    init_db()
+
     st.markdown('<h1 class="main-title">👨‍💼 Smart Farming — Admin Dashboard</h1>', unsafe_allow_html=True)
     user = st.session_state.get("user")
     if not user:
@@ -48,11 +60,25 @@ def show_admin_dashboard():
 
     # --- User Management ---
     st.subheader("🔍 User Management")
-    conn = get_connection()
-    users_df = pd.read_sql("SELECT * FROM users", conn)
-    conn.close()
-
+    search = st.text_input("Search username / email (prefix)").strip()
+    if st.session_state.get("users_search") != search:
+        st.session_state.users_search = search
+        st.session_state.users_page_starts = [0]  # after_id of each page visited (keyset pagination)
+    page_starts = st.session_state.users_page_starts
+    total_users = count_users(search or None)
+    total_pages = max(1, -(-total_users // USERS_PAGE_SIZE))
+    page_users = fetch_users_page(page_starts[-1], USERS_PAGE_SIZE, search or None)
+
+    users_df = pd.DataFrame(page_users, columns=USER_COLUMNS)
     st.dataframe(users_df)
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    if prev_col.button("◀ Prev", disabled=len(page_starts) == 1):
+        page_starts.pop()
+        st.rerun()
+    info_col.caption(f"{total_users} user(s) — page {len(page_starts)} of {total_pages}")
+    if next_col.button("Next ▶", disabled=len(page_starts) >= total_pages or not page_users):
+        page_starts.append(page_users[-1]["id"])
+        st.rerun()
 
     # Add / Remove User form below the table
     st.markdown("### Add / Remove User")
@@ -61,48 +87,105 @@ def show_admin_dashboard():
     new_role = st.selectbox("Role", ["farmer", "admin"])
 
     if st.button("Add User"):
-        if new_username in users_df["username"].values:
+        if username_exists(new_username):
             st.error("Username already exists!")
         else:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO users (username, name, role, last_login) VALUES (?, ?, ?, ?)",
-                (new_username, new_name, new_role, "")
-            )
-            conn.commit()
-            conn.close()
+            add_user(new_name, new_username, new_role)
+            invalidate_user(new_username)
             log_action(user["username"], f"Added user: {new_username}")
             st.success(f"User {new_username} added!")
-            st.experimental_rerun()
+            st.rerun()
 
-    remove_username = st.selectbox("Select user to remove", users_df["username"])
+    remove_username = st.selectbox("Select user to remove (search above to find others)", users_df["username"],
+                                   index=None, placeholder="Choose a user")
     if st.button("Remove User"):
-        if remove_username == user["username"]:
+        if not remove_username:
+            st.warning("Select a user to remove first.")
+        elif remove_username == user["username"]:
             st.error("You cannot remove yourself!")
+        elif not remove_user(remove_username):
+            st.error(f"User {remove_username} no longer exists.")
         else:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE username=?", (remove_username,))
-            conn.commit()
-            conn.close()
+            invalidate_user(remove_username)
             log_action(user["username"], f"Removed user: {remove_username}")
             st.success(f"User {remove_username} removed!")
-            st.experimental_rerun()
+            st.rerun()
+
+    # --- User Cache ---
+    st.markdown("---")
+    st.subheader("🧠 User Cache")
+    cache = user_cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Hit rate", f"{cache['hit_rate']:.0%}")
+    c2.metric("Hits / Misses", f"{cache['hits']} / {cache['misses']}")
+    c3.metric("Entries", f"{cache['size']} / {cache['maxsize']}")
+    c4.metric("Evictions", cache["evictions"])
+    st.caption(f"Entries expire after {cache['ttl']:.0f} s.")
 
     # --- Model Monitoring ---
     st.markdown("---")
     st.subheader("📈 Model Performance")
 
-    # Hardcoded R² values
-    models_r2 = {
-        "Irrigation Model": 0.848,
-        "Fertilizer Model": 0.869
-    }
-
-    for name, r2 in models_r2.items():
-        st.write(f"**{name}**")
-        st.write(f"- Training Score (R²): {r2}")
+    metrics = load_latest_metrics()
+    if not metrics:
+        st.info("No evaluation stored yet. Run `python -m app.model_monitor` to score the models.")
+
+    for key, m in metrics.items():
+        st.write(f"**{m['label']}** (version `{m['model_version'] or 'n/a'}`) — evaluated {m['evaluated_at']} "
+                 f"on {m['n_rows']} held-out rows")
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("R²", _fmt(m["r2"], ".3f"))
+        c2.metric("MAE", _fmt(m["mae"], ".3f"))
+        c3.metric("Latency p50 / p95",
+                  f"{_fmt(m['latency_p50_ms'], '.1f')} / {_fmt(m['latency_p95_ms'], '.1f')} ms")
+        c4.metric("Batch throughput", f"{_fmt(m['batch_rows_per_s'], ',.0f')} rows/s")
+        if m["drift"]:
+            drift_df = pd.DataFrame.from_dict(m["drift"], orient="index")
+            drift_df["alert"] = drift_df["psi"] > PSI_ALERT
+            with st.expander(f"Feature drift — {m['label']}"):
+                st.dataframe(drift_df.sort_values("psi", ascending=False))
+
+    # --- Model Registry ---
+    st.markdown("---")
+    st.subheader("📦 Model Registry")
+    loaded = model_registry.handle_stats()
+    for name, label in (("rf", "Random forests"), ("ppo", "PPO agent")):
+        active = model_registry.active_version(name)
+        serving = loaded.get(name, {}).get("version", "not loaded")
+        st.write(f"**{label}** — active: `{active or model_registry.UNREGISTERED}`, "
+                 f"serving in this process: `{serving}`")
+        if loaded.get(name, {}).get("last_error"):
+            st.error(f"Swap failed, still serving {serving}: {loaded[name]['last_error']}")
+        history = model_registry.versions(name)
+        if history:
+            versions_df = pd.DataFrame(history)[["version", "created_at", "notes", "files"]]
+            versions_df["files"] = versions_df["files"].map(lambda files: ", ".join(files))
+            versions_df["active"] = versions_df["version"] == active
+            st.dataframe(versions_df.iloc[::-1], hide_index=True)
+    st.caption("Activate a version with `python -m app.model_registry activate <name> <version>`; "
+               f"running processes swap to it within {model_registry.POLL_INTERVAL:.0f} s.")
+
+    # --- Pipeline Timings ---
+    st.markdown("---")
+    st.subheader("⏱️ Pipeline Timings")
+    timings = instrumentation.snapshot()
+    if not timings["spans"]:
+        st.info("No timings recorded in this process yet.")
+    else:
+        spans_df = pd.DataFrame.from_dict(timings["spans"], orient="index").drop(columns="buckets")
+        st.dataframe(spans_df.style.format("{:.2f}", subset=[c for c in spans_df.columns if c.endswith("_ms")]))
+        selected = st.selectbox("Latency histogram", list(timings["spans"]))
+        buckets = timings["spans"][selected]["buckets"]
+        st.bar_chart(pd.Series(buckets, name="count").rename_axis("≤ ms"))
+        if timings["counters"]:
+            st.write(timings["counters"])
+        st.download_button("Export timings (JSON)", instrumentation.export_json(),
+                           file_name="agrisense_timings.json", mime="application/json")
+
+    coalescers = batcher_stats()
+    if coalescers:
+        st.markdown("**Prediction coalescing**")
+        st.dataframe(pd.DataFrame.from_dict(coalescers, orient="index").drop(columns="batch_size_counts"))
 
     # --- System Logs ---
     st.markdown("---")
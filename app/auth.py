@@ -5,10 +5,21 @@ import hashlib
 import binascii
 import time
 import secrets
+from app.cache_utils import TTLCache
+from app.instrumentation import span, incr
 
 # Path: ../data/users.db (relative to project root)
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "users.db")
 
+# Reset tokens are valid for one hour and can be used once
+RESET_TOKEN_TTL = 60 * 60
+
+# Process-wide read-through cache for user rows (shared by all sessions so
+# that admin changes invalidate it everywhere). Keys: ("username"|"email", value)
+USER_CACHE_SIZE = 512
+USER_CACHE_TTL = 300.0
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
 def _ensure_db_dir():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
@@ -35,6 +46,19 @@ def init_db():
         )
         """
     )
+    # Reset tokens: only the SHA-256 of the token is stored (PRIMARY KEY -> indexed lookup)
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reset_tokens (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            used_at REAL
+        ) WITHOUT ROWID
+        """
+    )
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reset_tokens_expires ON reset_tokens (expires_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reset_tokens_user ON reset_tokens (user_id)")
     conn.commit()
     return conn
 
@@ -65,11 +89,13 @@ def create_user(name: str, username: str, email: str, password: str, role: str =
             (name, username, email, pw, role, time.time()),
         )
         conn.commit()
+        invalidate_user(username, email)
         return True, None
     except sqlite3.IntegrityError as e:
         return False, str(e)
 
-def get_user_by_username(username: str):
+def _load_user_by_username(username: str):
+    incr("db.user_lookups")
     conn = init_db()
     c = conn.cursor()
     c.execute(
@@ -82,7 +108,8 @@ def get_user_by_username(username: str):
         return dict(zip(keys, row))
     return None
 
-def get_user_by_email(email: str):
+def _load_user_by_email(email: str):
+    incr("db.user_lookups")
     conn = init_db()
     c = conn.cursor()
     c.execute(
@@ -95,35 +122,84 @@ def get_user_by_email(email: str):
         return dict(zip(keys, row))
     return None
 
+def get_user_by_username(username: str):
+    user = _user_cache.get_or_load(("username", username), lambda: _load_user_by_username(username))
+    return dict(user) if user else None
+
+def get_user_by_email(email: str):
+    user = _user_cache.get_or_load(("email", email), lambda: _load_user_by_email(email))
+    return dict(user) if user else None
+
+def invalidate_user(username: str = None, email: str = None):
+    """Drop cached rows for a user after it is created, changed or removed."""
+    _user_cache.invalidate(("username", username), ("email", email))
+    if username is not None:
+        _user_cache.invalidate_where(lambda u: u["username"] == username)
+
+def user_cache_stats() -> dict:
+    return _user_cache.stats()
+
 def verify_user(username: str, password: str):
-    user = get_user_by_username(username)
-    if not user:
-        return False, None
-    ok = verify_password(user["password_hash"], password)
-    return (ok, user if ok else None)
+    with span("auth.verify_user"):
+        user = get_user_by_username(username)
+        if not user:
+            return False, None
+        ok = verify_password(user["password_hash"], password)
+        return (ok, user if ok else None)
 
 # --- Reset password workflow ---
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def purge_expired_tokens(conn=None) -> int:
+    """
+    Delete expired reset tokens (a range delete on idx_reset_tokens_expires).
+    Used tokens need no purge: reset_password() deletes them. Returns rows removed.
+    """
+    own_conn = conn is None
+    conn = conn or init_db()
+    c = conn.cursor()
+    c.execute("DELETE FROM reset_tokens WHERE expires_at <= ?", (time.time(),))
+    removed = c.rowcount
+    conn.commit()
+    if own_conn:
+        conn.close()
+    return removed
+
 def create_reset_token(email_or_username: str) -> str | None:
     conn = init_db()
     c = conn.cursor()
 
-    # Support both email and username
-    c.execute("SELECT id FROM users WHERE email = ? OR username = ?", (email_or_username, email_or_username))
+    # Support both email and username: two point lookups on the UNIQUE indexes
+    c.execute("SELECT id FROM users WHERE username = ?", (email_or_username,))
     row = c.fetchone()
+    if not row:
+        c.execute("SELECT id FROM users WHERE email = ?", (email_or_username,))
+        row = c.fetchone()
     if not row:
         return None
 
+    purge_expired_tokens(conn)
     token = secrets.token_urlsafe(16)
-    c.execute("UPDATE users SET reset_token = ? WHERE id = ?", (token, row[0]))
+    c.execute(
+        "INSERT INTO reset_tokens (token_hash, user_id, expires_at) VALUES (?, ?, ?)",
+        (_hash_token(token), row[0], time.time() + RESET_TOKEN_TTL),
+    )
     conn.commit()
     return token
 
 def verify_reset_token(token: str):
+    if not token:
+        return None
     conn = init_db()
     c = conn.cursor()
     c.execute(
-        "SELECT id, name, username, email, password_hash, role, created_at, reset_token FROM users WHERE reset_token = ?",
-        (token,),
+        """
+        SELECT u.id, u.name, u.username, u.email, u.password_hash, u.role, u.created_at, u.reset_token
+        FROM reset_tokens t JOIN users u ON u.id = t.user_id
+        WHERE t.token_hash = ? AND t.used_at IS NULL AND t.expires_at > ?
+        """,
+        (_hash_token(token), time.time()),
     )
     row = c.fetchone()
     if row:
@@ -137,7 +213,19 @@ def reset_password(token: str, new_password: str) -> bool:
         return False
     conn = get_conn()
     c = conn.cursor()
+    # Claim the token first so a concurrent second use (or one that just expired) fails
+    now = time.time()
+    c.execute(
+        "UPDATE reset_tokens SET used_at = ? WHERE token_hash = ? AND used_at IS NULL AND expires_at > ?",
+        (now, _hash_token(token), now),
+    )
+    if c.rowcount != 1:
+        conn.rollback()
+        return False
     new_hash = hash_password(new_password)
     c.execute("UPDATE users SET password_hash = ?, reset_token = NULL WHERE id = ?", (new_hash, user["id"]))
+    # Any other outstanding tokens for this user are now void
+    c.execute("DELETE FROM reset_tokens WHERE user_id = ?", (user["id"],))
     conn.commit()
+    invalidate_user(user["username"], user["email"])
     return True
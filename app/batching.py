@@ -0,0 +1,128 @@
+# app/batching.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import observe
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into one batched call.
+
+    submit() returns a Future. A worker thread takes the first pending item,
+    keeps collecting until `max_batch` items or `max_wait_ms` have passed,
+    then calls `fn(items)`, which must return one result per item.
+    """
+
+    def __init__(self, fn, max_batch=64, max_wait_ms=5.0, name="micro-batcher"):
+        self.fn = fn
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.SimpleQueue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.wait_total = 0.0
+        self.size_counts = {}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        with _batchers_lock:
+            _batchers[name] = self
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit one item and wait for its result."""
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _record(self, batch):
+        started = time.perf_counter()
+        waits = [started - submitted for _, _, submitted in batch]
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.wait_total += sum(waits)
+            self.size_counts[len(batch)] = self.size_counts.get(len(batch), 0) + 1
+        for wait in waits:
+            observe(f"{self.name}.queue_wait", wait * 1000.0)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._record(batch)
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "max_batch_size": max(self.size_counts) if self.size_counts else 0,
+                "mean_queue_wait_ms": 1000.0 * self.wait_total / self.items if self.items else 0.0,
+                "batch_size_counts": dict(sorted(self.size_counts.items())),
+            }
+
+def batcher_stats():
+    """stats() of every MicroBatcher created in this process, by name."""
+    with _batchers_lock:
+        batchers = dict(_batchers)
+    return {name: b.stats() for name, b in batchers.items()}
+
+class CoalescingModel:
+    """
+    Wraps a fitted model so that one-row predict() calls made concurrently
+    from many threads (Streamlit sessions) run as one batched predict.
+    Multi-row calls go straight to the model. Other attributes are delegated.
+    """
+
+    def __init__(self, model, name, max_batch=64, max_wait_ms=2.0):
+        self.model = model
+        self.batcher = MicroBatcher(self._predict_rows, max_batch, max_wait_ms, name=name)
+
+    def _predict_rows(self, rows):
+        columns = rows[0][0]
+        X = pd.DataFrame(np.vstack([values for _, values in rows]), columns=columns)
+        return np.asarray(self.model.predict(X))
+
+    def predict(self, X):
+        if len(X) != 1 or not isinstance(X, pd.DataFrame):
+            return self.model.predict(X)
+        return np.array([self.batcher((list(X.columns), X.to_numpy()[0]))])
+
+    def __getattr__(self, attr):
+        if attr == "model":  # not yet set (e.g. during copy/unpickle)
+            raise AttributeError(attr)
+        return getattr(self.model, attr)
@@ -0,0 +1,304 @@
+# app/compact_forest.py
+"""
+Reduced random forest variants for low-memory deployments.
+
+    python -m app.compact_forest build            # writes models/<model>.<variant>.npz
+    python -m app.compact_forest report           # size / load / latency / accuracy per variant
+
+A CompactForest holds every tree of a fitted sklearn forest in a few flat
+numpy arrays and predicts with plain numpy, so serving it needs neither
+sklearn nor pickle. Variants trade accuracy for size by keeping the first
+`trees` share of the estimators, turning nodes at `max_depth` into leaves
+(their training mean), and storing thresholds either as float32 (exact) or
+as uint8 codes into a per-feature table of at most 256 split values.
+
+Single-row predictions (the dashboard path) are much faster than sklearn's;
+large batches are slower for the bigger variants, which walk every tree
+level by level in numpy. Pick a variant for the dashboard with
+dashboard.RF_VARIANT. To serve variants through the model registry,
+register the .npz files together with the .pkl files.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.recommender import MODELS_DIR, load_rf_models, irrigation_frame, fertilizer_frame
+
+MODEL_FILES = {"irrigation": "irrigation_rf_model", "fertilizer": "fertilizer_rf_model"}
+
+# name -> share of trees kept, depth limit, threshold storage
+VARIANTS = {
+    "f32":   {"trees": 1.0,  "max_depth": None, "thresholds": "float32"},  # same predictions, smaller
+    "half":  {"trees": 0.5,  "max_depth": 16,   "thresholds": "float32"},
+    "small": {"trees": 0.25, "max_depth": 12,   "thresholds": "uint8"},
+    "tiny":  {"trees": 0.1,  "max_depth": 8,    "thresholds": "uint8"},
+}
+CODEBOOK_SIZE = 256
+
+def variant_path(models_dir, model_key, variant):
+    return Path(models_dir) / f"{MODEL_FILES[model_key]}.{variant}.npz"
+
+# ===============================
+# CompactForest
+# ===============================
+def _prune(tree, max_depth):
+    """(feature, threshold, left, right, value) of one sklearn tree, cut at max_depth."""
+    t = tree.tree_
+    if t.value.shape[1] != 1:
+        raise ValueError("only single-output forests are supported")
+    feature, threshold = t.feature.astype(np.int64), t.threshold.copy()
+    left, right, value = t.children_left.copy(), t.children_right.copy(), t.value[:, 0, 0].copy()
+    if max_depth is not None:
+        depth = np.zeros(t.node_count, dtype=np.int64)
+        level, d = np.array([0]), 0
+        while len(level):
+            level = level[left[level] >= 0]
+            level = np.concatenate([left[level], right[level]])
+            d += 1
+            depth[level] = d
+        keep = depth <= max_depth
+        cut = depth == max_depth
+        feature[cut], left[cut], right[cut] = -2, -1, -1
+        new_index = np.cumsum(keep) - 1
+        internal = keep & (left >= 0)
+        left[internal], right[internal] = new_index[left[internal]], new_index[right[internal]]
+        feature, threshold, left, right, value = (a[keep] for a in (feature, threshold, left, right, value))
+    return feature, threshold, left, right, value
+
+class CompactForest:
+    """
+    Drop-in for a fitted RandomForestRegressor: predict(X) averages the
+    leaf values of all trees, walking every row through every tree one
+    level at a time.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, feature_names, codebooks=None):
+        self.feature, self.threshold, self.left, self.right = feature, threshold, left, right
+        self.value, self.roots, self.depth = value, roots, int(depth)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.codebooks = codebooks  # per-feature split values when thresholds are uint8 codes
+
+    @classmethod
+    def from_sklearn(cls, forest, trees=1.0, max_depth=None, thresholds="float32"):
+        estimators = forest.estimators_[:max(1, round(len(forest.estimators_) * trees))]
+        parts, roots, offset = [], [], 0
+        for est in estimators:
+            feature, threshold, left, right, value = _prune(est, max_depth)
+            leaf = left < 0
+            own = np.arange(len(feature)) + offset
+            # leaves loop to themselves, so every row can take the same number of steps
+            left = np.where(leaf, own, left + offset)
+            right = np.where(leaf, own, right + offset)
+            parts.append((np.where(leaf, 0, feature), np.where(leaf, np.inf, threshold), left, right, value))
+            roots.append(offset)
+            offset += len(feature)
+        feature, threshold, left, right, value = (np.concatenate(a) for a in zip(*parts))
+        depth = max(est.get_depth() for est in estimators)
+        depth = min(depth, max_depth) if max_depth is not None else depth
+
+        # sklearn compares float32 inputs against float64 thresholds: round down to stay exact
+        t32 = threshold.astype(np.float32)
+        t32 = np.where(t32 > threshold, np.nextafter(t32, np.float32(-np.inf)), t32).astype(np.float32)
+        names = getattr(forest, "feature_names_in_", [f"x{i}" for i in range(forest.n_features_in_)])
+        codebooks = None
+        if thresholds == "uint8":
+            t32, codebooks = cls._quantize(feature, t32, len(names))
+        elif thresholds != "float32":
+            raise ValueError(f"thresholds must be 'float32' or 'uint8', not {thresholds!r}")
+        index = np.int32 if offset < 2**31 else np.int64
+        return cls(feature.astype(np.int16), t32, left.astype(index), right.astype(index),
+                   value.astype(np.float32), np.array(roots, dtype=index), depth, names, codebooks)
+
+    @staticmethod
+    def _quantize(feature, threshold, n_features):
+        """Thresholds -> uint8 codes into per-feature tables of <= CODEBOOK_SIZE - 1 split values."""
+        codes = np.full(len(threshold), CODEBOOK_SIZE - 1, dtype=np.uint8)  # leaves: never compared
+        codebooks = []
+        split = np.isfinite(threshold)
+        for f in range(n_features):
+            nodes = split & (feature == f)
+            values = np.unique(threshold[nodes])
+            if len(values) >= CODEBOOK_SIZE:  # lossy: snap to quantiles of the feature's splits
+                values = np.unique(np.quantile(values, np.linspace(0, 1, CODEBOOK_SIZE - 1)).astype(np.float32))
+            if len(values):
+                t = threshold[nodes]
+                upper = np.minimum(np.searchsorted(values, t), len(values) - 1)
+                lower = np.maximum(upper - 1, 0)
+                codes[nodes] = np.where(t - values[lower] <= values[upper] - t, lower, upper)
+            codebooks.append(values)
+        return codes, codebooks
+
+    def _inputs(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)] if set(self.feature_names_in_) <= set(X.columns) else X
+            X = X.to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features_in_)
+        if self.codebooks is None:
+            return X
+        # x <= values[k]  <=>  (number of values < x) <= k
+        return np.column_stack([np.searchsorted(cb, X[:, f], side="left")
+                                for f, cb in enumerate(self.codebooks)]).astype(np.int16)
+
+    def _walk(self, X, attribute=False):
+        """
+        Leaf node per (row, tree), row-major. With `attribute`, also the
+        per-row, per-feature sum over trees of value changes along the path.
+        """
+        n, n_trees, n_features = len(X), len(self.roots), self.n_features_in_
+        flat = X.ravel()
+        # one (row, tree) walker per pair; walkers that reach a leaf drop out each level
+        pair = np.arange(n * n_trees)
+        node = np.tile(self.roots, n)
+        offset = np.repeat(np.arange(n) * n_features, n_trees)
+        leaf = np.empty(n * n_trees, dtype=node.dtype)
+        contributions = np.zeros(n * n_features) if attribute else None
+        for _ in range(self.depth + 1):
+            nxt = np.where(flat[offset + self.feature[node]] <= self.threshold[node], self.left[node], self.right[node])
+            done = nxt == node  # leaves loop to themselves
+            leaf[pair[done]] = node[done]
+            walking = ~done
+            pair, node, nxt, offset = pair[walking], node[walking], nxt[walking], offset[walking]
+            if attribute:
+                contributions += np.bincount(offset + self.feature[node], minlength=n * n_features,
+                                             weights=self.value[nxt].astype(np.float64) - self.value[node])
+            node = nxt
+            if not len(pair):
+                break
+        return leaf, contributions
+
+    def predict(self, X):
+        leaf, _ = self._walk(self._inputs(X))
+        return self.value[leaf].reshape(-1, len(self.roots)).mean(axis=1, dtype=np.float64)
+
+    def contributions(self, X):
+        """
+        Path attribution (Saabas): each split's change in node mean is
+        credited to its feature. Returns (bias, contributions) with
+        bias + contributions.sum(axis=1) == predict(X); contributions is
+        (rows, features) in feature_names_in_ order.
+        """
+        X = self._inputs(X)
+        _, contributions = self._walk(X, attribute=True)
+        bias = self.value[self.roots].mean(dtype=np.float64)
+        return np.full(len(X), bias), contributions.reshape(len(X), self.n_features_in_) / len(self.roots)
+
+    @property
+    def nbytes(self):
+        arrays = [self.feature, self.threshold, self.left, self.right, self.value, self.roots]
+        return sum(a.nbytes for a in arrays) + sum(cb.nbytes for cb in self.codebooks or [])
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    # --- Persistence: plain .npz, no pickle ---
+    def save(self, path):
+        arrays = dict(feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                      value=self.value, roots=self.roots, depth=np.array(self.depth),
+                      feature_names=self.feature_names_in_.astype(str))
+        if self.codebooks is not None:
+            arrays.update({f"codebook_{i}": cb for i, cb in enumerate(self.codebooks)})
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            codebooks = None
+            if "codebook_0" in data:
+                codebooks = [data[f"codebook_{i}"] for i in range(len(data["feature_names"]))]
+            return cls(data["feature"], data["threshold"], data["left"], data["right"], data["value"],
+                       data["roots"], data["depth"], data["feature_names"], codebooks)
+
+def load_variant(models_dir, variant):
+    """(irrigation, fertilizer) CompactForests of a built variant (raises FileNotFoundError)."""
+    return tuple(CompactForest.load(variant_path(models_dir, key, variant)) for key in MODEL_FILES)
+
+# ===============================
+# Build & report
+# ===============================
+def build_variants(models_dir=MODELS_DIR, variants=None):
+    """Write every requested variant of both forests next to the originals. Returns written paths."""
+    written = []
+    for key, forest in zip(MODEL_FILES, load_rf_models(models_dir)):
+        for name in variants or VARIANTS:
+            path = variant_path(models_dir, key, name)
+            CompactForest.from_sklearn(forest, **VARIANTS[name]).save(path)
+            written.append(path)
+    return written
+
+def _timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+def _sklearn_nbytes(forest):
+    return sum(est.tree_.node_count * (64 + 8 * est.tree_.value.shape[1]) for est in forest.estimators_)
+
+def variant_report(models_dir=MODELS_DIR, variants=None, n_rows=10_000, latency_samples=50, holdout=False, seed=0):
+    """
+    One row per model and variant (plus the original): file size, in-memory
+    size, load time, single-row latency, batch throughput, fidelity to the
+    original on random inputs and, with holdout=True, held-out R² / MAE.
+    """
+    from app.lookup_grid import random_inputs
+    from app.model_monitor import MODEL_SPECS, evaluate_model
+    inputs = random_inputs(n_rows, seed)
+    frames = {"irrigation": irrigation_frame(inputs), "fertilizer": fertilizer_frame(inputs)}
+    rows = []
+    for key, stem in MODEL_FILES.items():
+        X = frames[key]
+        original_path = Path(models_dir) / f"{stem}.pkl"
+        candidates = [("original", original_path, joblib.load)]
+        candidates += [(name, variant_path(models_dir, key, name), CompactForest.load) for name in variants or VARIANTS]
+        reference = None
+        for name, path, loader in candidates:
+            if not path.exists():
+                continue
+            model, load_s = _timed(lambda: loader(path))
+            pred, batch_s = _timed(lambda: np.asarray(model.predict(X), dtype=float))
+            _, single_s = _timed(lambda: model.predict(X.iloc[[0]]), latency_samples)
+            if reference is None:
+                reference = pred
+            err = pred - reference
+            row = {
+                "model": key, "variant": name,
+                "trees": len(model.estimators_) if name == "original" else len(model.roots),
+                "nodes": sum(e.tree_.node_count for e in model.estimators_) if name == "original" else model.node_count,
+                "file_kb": path.stat().st_size / 1024,
+                "memory_kb": (_sklearn_nbytes(model) if name == "original" else model.nbytes) / 1024,
+                "load_ms": load_s * 1000, "single_row_ms": single_s * 1000, "rows_per_s": len(X) / batch_s,
+                "fidelity_r2": 1 - (err ** 2).sum() / ((reference - reference.mean()) ** 2).sum(),
+                "fidelity_mae": np.abs(err).mean(),
+            }
+            spec = MODEL_SPECS[key]
+            if holdout and Path(spec["holdout"]).exists():
+                metrics = evaluate_model(model, spec["holdout"], spec["target"], latency_samples=0)
+                row.update(holdout_r2=metrics["r2"], holdout_mae=metrics["mae"])
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and compare reduced random forest variants.")
+    parser.add_argument("command", choices=["build", "report"])
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--variant", action="append", choices=list(VARIANTS), help="Repeatable (default: all)")
+    parser.add_argument("--rows", type=int, default=10_000, help="Random inputs for fidelity and throughput")
+    parser.add_argument("--holdout", action="store_true", help="Also score on data/holdout/<model>.csv")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        for path in build_variants(args.models_dir, args.variant):
+            print(f"Wrote {path} ({path.stat().st_size / 1024:,.0f} KB)")
+    else:
+        pd.set_option("display.width", 200)
+        report = variant_report(args.models_dir, args.variant, args.rows, holdout=args.holdout)
+        print(report.round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
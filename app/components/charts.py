@@ -1,8 +1,54 @@
 # app/components/charts.py
+import threading
+import time
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from collections import OrderedDict, deque
+from .downsampling import MAX_POINTS, downsample, downsample_indices, aggregate_by_time
+
+# --- Figure cache ---
+# Figures are keyed by chart name, plot options and a data key, so an
+# unchanged chart is not rebuilt on a Streamlit rerun. Shared by every
+# session's script thread, hence the lock.
+FIGURE_CACHE_SIZE = 64
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+def _data_key(df, cols):
+    """
+    Cheap identity for the plotted data. With the `version` attr set by the
+    simulator history helpers, the version plus a hash of the index and the
+    last row, so copies that keep the attr but were sliced or edited at the
+    end still miss; otherwise a content hash.
+    """
+    version = df.attrs.get("version")
+    if version is not None:
+        tail = int(pd.util.hash_pandas_object(df[cols].tail(1), index=True).sum()) if len(df) else 0
+        return ("version", version, len(df), int(pd.util.hash_pandas_object(df.index).sum()), tail)
+    return ("hash", len(df), int(pd.util.hash_pandas_object(df[cols], index=False).sum()))
+
+def _cached_figure(key, build):
+    with _figure_cache_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+            return fig
+    fig = build()  # outside the lock: building is slow and sessions should not queue on it
+    with _figure_cache_lock:
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return fig
+
+def _ensure_datetime(df, col="Time"):
+    """Parse the time column once (no-op when it is already datetime64)."""
+    if pd.api.types.is_datetime64_any_dtype(df[col]):
+        return df
+    return df.assign(**{col: pd.to_datetime(df[col])})
 
 # --- Current simple bar display (kept) ---
 def display_soil_and_fertilizer_chart(soil, fertilizer):
@@ -15,33 +61,132 @@ def display_soil_and_fertilizer_chart(soil, fertilizer):
     st.plotly_chart(fig, use_container_width=True)
 
 # --- Live simulation charts (kept) ---
-def display_live_charts(history_df, rewards):
+def _build_live_line(history_df, y, title, max_points):
+    df = downsample(_ensure_datetime(history_df), "Time", [y], max_points)
+    fig = px.line(df, x="Time", y=y, title=title)
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def _build_reward_trend(rewards, max_points):
+    steps = np.arange(len(rewards))
+    keep = downsample_indices(steps, [rewards], max_points)
+    fig = px.line(x=steps[keep], y=np.asarray(rewards)[keep], title="🏆 Reward Trend (AI Learning Progress)")
+    fig.update_layout(xaxis_title="Step", yaxis_title="Reward")
+    return fig
+
+def display_live_charts(history_df, rewards, max_points=MAX_POINTS):
     if not history_df.empty:
         st.subheader("📊 Live Simulation Results")
+        key = _data_key(history_df, ["Time", "Soil Moisture", "Fertilizer"])
 
         col1, col2 = st.columns(2)
         with col1:
-            fig1 = px.line(history_df, x="Time", y="Soil Moisture", title="💧 Soil Moisture Over Time")
-            fig1.update_xaxes(tickangle=45)
+            fig1 = _cached_figure(("live_soil", max_points, key), lambda: _build_live_line(
+                history_df, "Soil Moisture", "💧 Soil Moisture Over Time", max_points))
             st.plotly_chart(fig1, use_container_width=True)
 
         with col2:
-            fig2 = px.line(history_df, x="Time", y="Fertilizer", title="🌾 Fertilizer Levels Over Time")
-            fig2.update_xaxes(tickangle=45)
+            fig2 = _cached_figure(("live_fert", max_points, key), lambda: _build_live_line(
+                history_df, "Fertilizer", "🌾 Fertilizer Levels Over Time", max_points))
             st.plotly_chart(fig2, use_container_width=True)
 
         if rewards:
-            fig3 = px.line(x=list(range(len(rewards))), y=rewards, title="🏆 Reward Trend (AI Learning Progress)")
-            fig3.update_layout(xaxis_title="Step", yaxis_title="Reward")
+            rewards_key = (len(rewards), hash(tuple(rewards)))
+            fig3 = _cached_figure(("rewards", max_points, rewards_key),
+                                  lambda: _build_reward_trend(rewards, max_points))
             st.plotly_chart(fig3, use_container_width=True)
 
+# --- Streaming live mode ---
+class LiveChartStream:
+    """
+    Live charts for long simulations.
+
+    push() records a step; at most `fps` times per second the points pushed
+    since the previous frame are appended to the charts with add_rows().
+    Every `window` appended points (and on Streamlit releases without
+    add_rows) the charts are redrawn from the last `window` steps only, so
+    per-step cost stays constant however long the run. Call finish() (or use
+    the stream as a context manager) to draw the points left after the last
+    frame.
+    """
+    SERIES = {
+        "Soil Moisture": "💧 Soil Moisture Over Time",
+        "Fertilizer": "🌾 Fertilizer Levels Over Time",
+        "Reward": "🏆 Reward Trend (AI Learning Progress)",
+    }
+
+    def __init__(self, window=500, fps=4.0):
+        self.window = window
+        self.min_interval = 1.0 / fps if fps > 0 else 0.0
+        self._rows = deque(maxlen=window)  # (step, soil, fert, reward)
+        self._pending = []                 # rows not yet on the charts
+        self._since_redraw = 0
+        self._incremental = True
+        self._step = 0
+        self._last_frame = 0.0
+        self._charts = {}
+
+        st.subheader("📊 Live Simulation Results")
+        col1, col2 = st.columns(2)
+        self._slots = {}
+        for container, name in ((col1, "Soil Moisture"), (col2, "Fertilizer"), (st.container(), "Reward")):
+            with container:
+                st.markdown(f"**{self.SERIES[name]}**")
+                self._slots[name] = st.empty()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+
+    def push(self, soil, fert, reward):
+        """Record one simulation step; the charts update on the next frame."""
+        row = (self._step, float(soil), float(fert), float(reward))
+        self._rows.append(row)
+        self._pending.append(row)
+        self._step += 1
+        if time.monotonic() - self._last_frame >= self.min_interval:
+            self.render()
+
+    def _frame(self, rows):
+        return pd.DataFrame(list(rows), columns=["Step", *self.SERIES])
+
+    def render(self):
+        """Send the points pushed since the last frame to the charts."""
+        self._last_frame = time.monotonic()
+        if not self._pending:
+            return
+        delta, self._pending = self._frame(self._pending), []
+        self._since_redraw += len(delta)
+        if self._charts and self._incremental and self._since_redraw <= self.window:
+            try:
+                for chart in self._charts.values():
+                    chart.add_rows(delta)
+                return
+            except StreamlitAPIException:  # add_rows() is gone from newer Streamlit releases
+                self._incremental = False
+        self._redraw()
+
+    def _redraw(self):
+        """Replace each chart with one holding only the retained window."""
+        df = self._frame(self._rows)
+        for name, slot in self._slots.items():
+            self._charts[name] = slot.line_chart(df, x="Step", y=name, height=250)
+        self._since_redraw = 0
+
+    def finish(self):
+        """Draw whatever was pushed after the last frame (call once when the run ends)."""
+        self.render()
+
+    def history(self):
+        """The retained window as a DataFrame."""
+        return self._frame(self._rows)
+
 # --- Manual mode charts / helpers ---
-def plot_weather_trends_from_history(df):
-    """Plot temp, rain over time from manual_history"""
-    if df is None or df.empty:
-        st.info("No history available to plot.")
-        return
-    st.markdown("**Temperature & Rainfall (recent)**")
+def _build_weather_trends(df, max_points, bucket):
+    df = aggregate_by_time(_ensure_datetime(df), "Time", bucket, {"Temp": "mean", "Rain": "sum"})
+    df = downsample(df, "Time", ["Temp", "Rain"], max_points, method="minmax")
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=df["Time"], y=df["Temp"], mode="lines+markers", name="Temp (°C)"))
     fig.add_trace(go.Bar(x=df["Time"], y=df["Rain"], name="Rain (mm)", yaxis="y2", opacity=0.6))
@@ -52,26 +197,55 @@ def plot_weather_trends_from_history(df):
         yaxis=dict(title="Temperature (°C)"),
         yaxis2=dict(title="Rain (mm)", overlaying="y", side="right")
     )
+    return fig
+
+def plot_weather_trends_from_history(df, max_points=MAX_POINTS, bucket=None):
+    """Plot temp, rain over time from manual_history"""
+    if df is None or df.empty:
+        st.info("No history available to plot.")
+        return
+    st.markdown("**Temperature & Rainfall (recent)**")
+    key = ("weather", max_points, bucket, _data_key(df, ["Time", "Temp", "Rain"]))
+    fig = _cached_figure(key, lambda: _build_weather_trends(df, max_points, bucket))
     st.plotly_chart(fig, use_container_width=True)
 
-def plot_soil_vs_fertility(df):
+def _build_soil_vs_fertility(df, max_points, bucket):
+    df = aggregate_by_time(_ensure_datetime(df), "Time", bucket, {"Soil Moisture": "mean", "Fertilizer": "mean"})
+    df = downsample(df, "Time", ["Soil Moisture", "Fertilizer"], max_points)
+    fig = px.line(df, x="Time", y=["Soil Moisture", "Fertilizer"], title="Soil Moisture and Fertilizer Over Time")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def plot_soil_vs_fertility(df, max_points=MAX_POINTS, bucket=None):
     st.markdown("**Soil Moisture vs Fertilizer Level**")
     if df is None or df.empty:
         st.info("No data available.")
         return
-    fig = px.line(df, x="Time", y=["Soil Moisture", "Fertilizer"], title="Soil Moisture and Fertilizer Over Time")
-    fig.update_xaxes(tickangle=45)
+    key = ("soil_vs_fert", max_points, bucket, _data_key(df, ["Time", "Soil Moisture", "Fertilizer"]))
+    fig = _cached_figure(key, lambda: _build_soil_vs_fertility(df, max_points, bucket))
     st.plotly_chart(fig, use_container_width=True)
 
-def plot_irrigation_history(df):
+def _build_irrigation_history(df, max_points, bucket):
+    df = aggregate_by_time(_ensure_datetime(df), "Time", bucket, {"Irrigation_L": "sum"})
+    df = downsample(df, "Time", ["Irrigation_L"], max_points, method="minmax")
+    fig = px.bar(df, x="Time", y="Irrigation_L", title="Irrigation Applied Over Time")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def plot_irrigation_history(df, max_points=MAX_POINTS, bucket=None):
     st.markdown("**Irrigation History**")
     if df is None or df.empty:
         st.info("No irrigation records.")
         return
-    fig = px.bar(df, x="Time", y="Irrigation_L", title="Irrigation Applied Over Time")
-    fig.update_xaxes(tickangle=45)
+    key = ("irrigation", max_points, bucket, _data_key(df, ["Time", "Irrigation_L"]))
+    fig = _cached_figure(key, lambda: _build_irrigation_history(df, max_points, bucket))
     st.plotly_chart(fig, use_container_width=True)
 
+def _build_temperature_trend(df):
+    fig = px.line(_ensure_datetime(df), x="Time", y="Temp", title="Temperature Trend")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
 def plot_weather_summary(df):
     st.markdown("**Weather Summary**")
     if df is None or df.empty:
@@ -84,6 +258,5 @@ def plot_weather_summary(df):
     c1.metric("Avg Temp (recent)", f"{mean_temp:.1f} °C")
     c2.metric("Total Rain (recent)", f"{total_rain:.1f} mm")
     # small line chart for temps
-    fig = px.line(df, x="Time", y="Temp", title="Temperature Trend")
-    fig.update_xaxes(tickangle=45)
+    fig = _cached_figure(("temp_trend", _data_key(df, ["Time", "Temp"])), lambda: _build_temperature_trend(df))
     st.plotly_chart(fig, use_container_width=True)
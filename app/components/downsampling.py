@@ -0,0 +1,100 @@
+# app/components/downsampling.py
+import numpy as np
+import pandas as pd
+
+# Points per figure sent to the browser; plenty for a chart a few hundred px wide
+MAX_POINTS = 1500
+
+def _numeric_x(x):
+    """Float array for the x axis (datetimes become ns since epoch)."""
+    x = pd.Series(x)
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=float)
+    if not pd.api.types.is_datetime64_any_dtype(x):
+        x = pd.to_datetime(x, errors="coerce")
+        if x.isna().any():
+            return np.arange(len(x), dtype=float)
+    return x.astype("int64").to_numpy(dtype=float)
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: pick n_out indices that keep the visual
+    shape of the line. First and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        nxt_start, nxt_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_start:nxt_stop].mean()
+        avg_y = y[nxt_start:nxt_stop].mean()
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = prev
+    return selected
+
+def minmax_indices(y, n_out):
+    """Keep the min and max of n_out/2 equal-width buckets (exact envelope)."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    buckets = n_out // 2
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = np.asarray(y, dtype=float)
+    grid = padded.reshape(buckets, size)
+    valid = ~np.isnan(grid).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    lo = np.nanargmin(grid[valid], axis=1) + offsets
+    hi = np.nanargmax(grid[valid], axis=1) + offsets
+    return np.unique(np.concatenate([[0, n - 1], lo, hi]))
+
+def downsample_indices(x, ys, max_points=MAX_POINTS, method="lttb"):
+    """
+    Row indices to keep for one or more series sharing an x axis. The point
+    budget is split across series, and each series' global min and max are
+    always kept so visual extremes survive.
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    per_series = max(3, max_points // max(1, len(ys)))
+    x_num = _numeric_x(x)
+    keep = [np.array([0, n - 1])]
+    for y in ys:
+        y = pd.Series(y).to_numpy(dtype=float)
+        if method == "minmax":
+            keep.append(minmax_indices(y, per_series))
+        else:
+            keep.append(lttb_indices(x_num, y, per_series))
+        if np.isfinite(y).any():
+            keep.append([np.nanargmin(y), np.nanargmax(y)])
+    return np.unique(np.concatenate(keep))
+
+def downsample(df, x, y_cols, max_points=MAX_POINTS, method="lttb"):
+    """Return the rows of df needed to draw y_cols against x within max_points."""
+    if df is None or len(df) <= max_points:
+        return df
+    idx = downsample_indices(df[x], [df[c] for c in y_cols], max_points, method)
+    return df.iloc[idx]
+
+def aggregate_by_time(df, x, freq, agg=None):
+    """
+    Bucket rows into fixed time intervals (e.g. "1h", "1D") before plotting.
+    `agg` maps column -> aggregation; numeric columns default to the mean.
+    """
+    if df is None or df.empty or not freq:
+        return df
+    if agg is None:
+        agg = {c: "mean" for c in df.columns if c != x and pd.api.types.is_numeric_dtype(df[c])}
+    out = df.assign(**{x: pd.to_datetime(df[x])}).set_index(x).resample(freq).agg(agg)
+    return out.dropna(how="all").reset_index()
@@ -12,6 +12,25 @@ from gymnasium import spaces
 import numpy as np
 import random
 
+# --- Crop Parameters (realistic optima + growth) ---
+CROP_DATA = {
+    "maize":  {"opt_m": 0.65, "opt_n": 0.60, "base_growth": 0.03},
+    "rice":   {"opt_m": 0.75, "opt_n": 0.55, "base_growth": 0.025},
+    "wheat":  {"opt_m": 0.55, "opt_n": 0.50, "base_growth": 0.035},
+    "tomato": {"opt_m": 0.60, "opt_n": 0.65, "base_growth": 0.03},
+    "soybean":{"opt_m": 0.58, "opt_n": 0.60, "base_growth": 0.028},
+    "carrot": {"opt_m": 0.60, "opt_n": 0.58, "base_growth": 0.027},
+    "potato": {"opt_m": 0.68, "opt_n": 0.62, "base_growth": 0.028},
+    "beans":  {"opt_m": 0.60, "opt_n": 0.60, "base_growth": 0.03},
+}
+
+# --- Soil Parameters ---
+SOIL_DATA = {
+    "sandy": {"evap_factor": 1.2, "leach_factor": 1.2},
+    "loamy": {"evap_factor": 1.0, "leach_factor": 1.0},
+    "clay":  {"evap_factor": 0.8, "leach_factor": 0.8},
+}
+
 class IrrigationEnv(gym.Env):
     """
     Hybrid Irrigation Environment:
@@ -30,25 +49,10 @@ class IrrigationEnv(gym.Env):
 
         self.max_days = days
 
-        # --- Crop Parameters (realistic optima + growth) ---
-        self.crop_data = {
-            "maize":  {"opt_m": 0.65, "opt_n": 0.60, "base_growth": 0.03},
-            "rice":   {"opt_m": 0.75, "opt_n": 0.55, "base_growth": 0.025},
-            "wheat":  {"opt_m": 0.55, "opt_n": 0.50, "base_growth": 0.035},
-            "tomato": {"opt_m": 0.60, "opt_n": 0.65, "base_growth": 0.03},
-            "soybean":{"opt_m": 0.58, "opt_n": 0.60, "base_growth": 0.028},
-            "carrot": {"opt_m": 0.60, "opt_n": 0.58, "base_growth": 0.027},
-            "potato": {"opt_m": 0.68, "opt_n": 0.62, "base_growth": 0.028},
-            "beans":  {"opt_m": 0.60, "opt_n": 0.60, "base_growth": 0.03},
-        }
+        self.crop_data = CROP_DATA
         self.crop_types = list(self.crop_data.keys())
 
-        # --- Soil Parameters ---
-        self.soil_data = {
-            "sandy": {"evap_factor": 1.2, "leach_factor": 1.2},
-            "loamy": {"evap_factor": 1.0, "leach_factor": 1.0},
-            "clay":  {"evap_factor": 0.8, "leach_factor": 0.8},
-        }
+        self.soil_data = SOIL_DATA
         self.soil_types = list(self.soil_data.keys())
 
         # Assign crop/soil
@@ -91,6 +95,33 @@ class IrrigationEnv(gym.Env):
 
         return self._get_obs(), {}
 
+    # -------------------------------------------------------------- #
+    def set_state(self, soil_moisture=None, nutrients=None, growth=None, crop=None, soil=None,
+                  day=None, **_unused):
+        """
+        Place the environment in an observed field state (used for inference).
+        soil_moisture and nutrients may be fractions (0-1) or percentages;
+        only the N entry of nutrients [N, P, K] is modelled. Other keyword
+        readings (e.g. temperature, rain) are not part of the state and are ignored.
+        """
+        if crop in self.crop_types:
+            self.crop = crop
+        if soil in self.soil_types:
+            self.soil = soil
+        if soil_moisture is not None:
+            m = float(soil_moisture)
+            self.M = float(np.clip(m / 100.0 if m > 1 else m, 0, 1))
+        if nutrients is not None:
+            n = float(nutrients[0] if np.ndim(nutrients) else nutrients)
+            self.N = float(np.clip(n / 100.0 if n > 1 else n, 0, 1))
+        if growth is not None:
+            self.G = float(np.clip(growth, 0, 1))
+        if day is not None:
+            self.day = int(day)
+
+    def get_observation(self):
+        return self._get_obs()
+
     # -------------------------------------------------------------- #
     def _get_obs(self):
         day_norm = self.day / self.max_days
@@ -155,6 +186,83 @@ class IrrigationEnv(gym.Env):
               f"M={self.M:.2f}, N={self.N:.2f}, G={self.G:.2f}")
 
 
+# -------------------------------------------------------------- #
+class VecIrrigationEnv:
+    """
+    n independent IrrigationEnv episodes stepped together with numpy arrays.
+    Same dynamics, reward and observation layout as IrrigationEnv.step().
+
+    Weather (rain, evaporation) and initial M / N are drawn up front from
+    `seed`, independently of the actions taken, so policies evaluated with
+    the same seed face identical conditions (common random numbers).
+    """
+
+    def __init__(self, crops, soils, days=30, seed=None):
+        self.crop_types = list(CROP_DATA)
+        self.soil_types = list(SOIL_DATA)
+        self.crop_idx = np.array([self.crop_types.index(c) for c in crops])
+        self.soil_idx = np.array([self.soil_types.index(s) for s in soils])
+        self.n = len(self.crop_idx)
+        self.max_days = days
+        self.seed = seed
+
+        crop_params = np.array([[p["opt_m"], p["opt_n"], p["base_growth"]] for p in CROP_DATA.values()])
+        soil_params = np.array([[p["evap_factor"], p["leach_factor"]] for p in SOIL_DATA.values()])
+        self.opt_m, self.opt_n, self.base_growth = crop_params[self.crop_idx].T
+        self.evap_factor, self.leach_factor = soil_params[self.soil_idx].T
+        self._onehots = np.hstack([np.eye(len(self.crop_types))[self.crop_idx],
+                                   np.eye(len(self.soil_types))[self.soil_idx]]).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        rng = np.random.default_rng(self.seed)
+        shape = (self.max_days, self.n)
+        self._rain = np.where(rng.random(shape) < 0.2, rng.uniform(0, 0.05, shape), 0.0)
+        self._evap = self.evap_factor * rng.uniform(0.015, 0.025, shape)
+        self.day = 0
+        self.M = rng.uniform(0.3, 0.5, self.n)
+        self.N = rng.uniform(0.3, 0.5, self.n)
+        self.G = np.full(self.n, 0.05)
+        self.total_water = np.zeros(self.n)
+        self.total_fertilizer = np.zeros(self.n)
+        self.total_leaching = np.zeros(self.n)
+        self.total_reward = np.zeros(self.n)
+        return self.get_observation()
+
+    def get_observation(self):
+        state = np.column_stack([self.M, self.N, self.G, np.full(self.n, self.day / self.max_days)])
+        return np.hstack([state.astype(np.float32), self._onehots])
+
+    def step(self, actions):
+        """actions: (n, 2) [irrigation, fertilizer]. Returns obs, reward, terminated, info."""
+        actions = np.asarray(actions, dtype=float).reshape(self.n, 2)
+        irrigation = np.clip(actions[:, 0], 0, 0.1)
+        fertilizer = np.clip(actions[:, 1], 0, 0.05)
+        rain, evap = self._rain[self.day], self._evap[self.day]
+
+        self.M = np.clip(self.M + irrigation + rain - evap, 0, 1)
+        leaching = self.leach_factor * 0.01 * np.maximum(0, self.M - 0.6)
+        uptake = 0.02 * self.G * self.M
+        self.N = np.clip(self.N + fertilizer - uptake - leaching, 0, 1)
+
+        effective_M = np.minimum(self.M / self.opt_m, 1.2)
+        effective_N = np.minimum(self.N / self.opt_n, 1.2)
+        growth_rate = np.clip(self.base_growth * effective_M * effective_N * (1 - self.G), 0, 0.03)
+        self.G = np.clip(self.G + growth_rate, 0, 1)
+
+        reward = 10 * growth_rate - 3 * irrigation - 2 * fertilizer - 5 * leaching
+        self.day += 1
+        terminated = self.day >= self.max_days
+        if terminated:
+            reward = reward + 100 * self.G  # final yield bonus
+
+        self.total_water += irrigation
+        self.total_fertilizer += fertilizer
+        self.total_leaching += leaching
+        self.total_reward += reward
+        return self.get_observation(), reward, terminated, {"rain": rain, "leaching": leaching}
+
+
 # ---------------------- Quick Test ---------------------- #
 if __name__ == "__main__":
     env = IrrigationEnv(days=30)
@@ -1,12 +1,37 @@
 # app/components/model_runner.py
 import os
 import numpy as np
-from stable_baselines3 import PPO
-from .irrigation_env import IrrigationEnv
+from app.components.irrigation_env import IrrigationEnv
+from app.instrumentation import span, incr
+from app.model_registry import watch
 
-# Load trained model
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "ppo_irrigation_final")
-model = PPO.load(MODEL_PATH)
+# Trained model: the registry's active "ppo" version, else this legacy file (loaded on first use)
+MODEL_FILE = "ppo_irrigation_final"
+LEGACY_DIR = os.path.join(os.path.dirname(__file__), "..")
+_handle = None
+
+def _load_ppo(directory):
+    from stable_baselines3 import PPO
+    return PPO.load(os.path.join(directory, MODEL_FILE))
+
+def get_model():
+    """The current PPO model; re-read per prediction so registry swaps take effect."""
+    global _handle
+    if _handle is None:
+        with span("model_runner.load"):
+            _handle = watch("ppo", _load_ppo, legacy_dir=LEGACY_DIR)
+    return _handle.model
+
+def _observation(env, obs):
+    env.set_state(
+        crop=obs["crop"],
+        soil=obs["soil"],
+        soil_moisture=obs["soil_moisture"],
+        temperature=obs["temperature"],
+        rain=obs["rain"],
+        nutrients=obs["nutrients"]
+    )
+    return env.get_observation()
 
 def predict_daily_action(obs):
     """
@@ -25,23 +50,30 @@ def predict_daily_action(obs):
     """
     # Create environment for 1-day prediction
     env = IrrigationEnv(days=1, crop=obs["crop"], soil=obs["soil"])
-    
-    # Reset environment with the current state
-    env.set_state(
-        soil_moisture=obs["soil_moisture"],
-        temperature=obs["temperature"],
-        rain=obs["rain"],
-        nutrients=obs["nutrients"]
-    )
-    
-    # Predict action
-    action, _ = model.predict(env.get_observation(), deterministic=True)
-    
+
+    # Predict action from the current state
+    with span("model_runner.predict"):
+        action, _ = get_model().predict(_observation(env, obs), deterministic=True)
+
     irrigation_liters = action[0] if len(action) > 0 else 0.0
     fertilizer_kg = action[1] if len(action) > 1 else 0.0
-    
+
     return irrigation_liters, fertilizer_kg
 
+def predict_daily_actions(obs_list):
+    """
+    Batch version of predict_daily_action: one policy forward pass for all
+    observations. Returns an (n, 2) array of [irrigation, fertilizer].
+    """
+    if not obs_list:
+        return np.zeros((0, 2), dtype=np.float32)
+    env = IrrigationEnv(days=1)
+    batch = np.stack([_observation(env, obs) for obs in obs_list])
+    with span("model_runner.predict_batch"):
+        actions, _ = get_model().predict(batch, deterministic=True)
+    incr("model_runner.batch_rows", len(obs_list))
+    return np.asarray(actions).reshape(len(obs_list), -1)
+
 def map_fertilizer(total_kg, obs):
     """
     Convert total fertilizer kg into N, P, K distribution.
@@ -1,4 +1,5 @@
 # app/components/simulator.py
+import uuid
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -15,27 +16,30 @@ def get_recommendation(soil_moisture, temp, rain, nutrient):
     fertilizer = float(np.round(max(0.0, (1.0 - nutrient) * 5), 2))
     return irrigation, fertilizer
 
-def simulate_step(soil, fert):
+def simulate_step(soil, fert, rng=None):
     """
     Simulates a single time-step update.
+    `rng` is a numpy Generator (default: the global np.random state).
     Returns new_soil, new_fert, irrigation_volume_L, fertilizer_kg, reward, temp, rain
     """
+    rng = np.random if rng is None else rng
+
     # Simulate simple weather conditions
-    temp = float(np.round(np.random.uniform(18.0, 32.0), 2))
-    rain = float(np.round(np.random.uniform(0.0, 8.0), 2))  # mm
+    temp = float(np.round(rng.uniform(18.0, 32.0), 2))
+    rain = float(np.round(rng.uniform(0.0, 8.0), 2))  # mm
 
     # Agent decides irrigation and fertilizer (random for now)
-    irrigation = float(np.round(np.random.uniform(0, 20), 2))  # liters applied this step
-    fertilizer = float(np.round(np.random.uniform(0, 2), 2))  # kg applied this step
+    irrigation = float(np.round(rng.uniform(0, 20), 2))  # liters applied this step
+    fertilizer = float(np.round(rng.uniform(0, 2), 2))  # kg applied this step
 
     # Update soil moisture: irrigation increases, rain increases, natural loss decreases
     soil_gain = irrigation * 0.2 + rain * 0.5
-    soil_loss = np.random.uniform(0, 3)
+    soil_loss = rng.uniform(0, 3)
     new_soil = min(100.0, max(0.0, soil + soil_gain - soil_loss))
 
     # Update fertilizer level (scale 0..1): fertilizer adds small amount, natural decline
     fert_gain = fertilizer * 0.01
-    fert_loss = np.random.uniform(0, 0.02)
+    fert_loss = rng.uniform(0, 0.02)
     new_fert = min(1.0, max(0.0, fert + fert_gain - fert_loss))
 
     # Simple reward: encourage moderate soil (not too dry, not flooded) and sufficient fert
@@ -45,18 +49,37 @@ def simulate_step(soil, fert):
 
     return new_soil, new_fert, irrigation, fertilizer, reward, temp, rain
 
+def run_simulation(steps, init_soil=30.0, init_fert=0.6, rng=None, on_step=None):
+    """
+    Run `steps` simulate_step() updates from the given state.
+    on_step(soil, fert, reward) is called after every step (e.g. LiveChartStream.push).
+    Returns final soil, final fert, total reward.
+    """
+    soil, fert, total = init_soil, init_fert, 0.0
+    for _ in range(int(steps)):
+        soil, fert, _, _, reward, _, _ = simulate_step(soil, fert, rng)
+        total += reward
+        if on_step is not None:
+            on_step(soil, fert, reward)
+    return soil, fert, total
+
 # ---------------- Manual history helpers ----------------
+def _new_version(df):
+    """Tag a history frame with a fresh version so chart caches can key on it."""
+    df.attrs["version"] = uuid.uuid4().hex
+    return df
+
 def init_manual_history(init_soil=30.0, init_fert=0.6, steps=48):
     """
     Create an initial manual history dataframe (e.g., recent 48 records hourly)
     with synthetic realistic variations centered on init_soil/init_fert.
     """
-    now = datetime.now()
+    now = datetime.now().replace(microsecond=0)
     rows = []
     soil = init_soil
     fert = init_fert
     for i in range(steps):
-        t = (now - timedelta(hours=(steps - i))).strftime("%Y-%m-%d %H:%M:%S")
+        t = now - timedelta(hours=(steps - i))
         # small random walk
         soil = max(0.0, min(100.0, soil + np.random.uniform(-2, 2)))
         fert = max(0.0, min(1.0, fert + np.random.uniform(-0.01, 0.01)))
@@ -75,11 +98,13 @@ def init_manual_history(init_soil=30.0, init_fert=0.6, steps=48):
             "Rain": rain,
             "Action": action
         })
-    return pd.DataFrame(rows)
+    df = pd.DataFrame(rows)
+    df["Time"] = pd.to_datetime(df["Time"])
+    return _new_version(df)
 
 def append_manual_record(df, soil, fert, irrigation_l, fertilizer_kg, temp, rain, action=None):
     """Append a manual observation to manual_history DataFrame."""
-    t = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    t = pd.Timestamp(datetime.now().replace(microsecond=0))
     action_text = action if action is not None else f"Recorded (Irr:{irrigation_l}L / Fert:{fertilizer_kg}kg)"
     new_row = {
         "Time": t,
@@ -91,8 +116,8 @@ def append_manual_record(df, soil, fert, irrigation_l, fertilizer_kg, temp, rain
         "Rain": float(np.round(rain, 2)),
         "Action": action_text
     }
-    df = df.append(new_row, ignore_index=True)
-    return df
+    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+    return _new_version(df)
 
 def compute_manual_kpis(df):
     """
@@ -1,11 +1,25 @@
+import time
+from functools import partial
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import altair as alt
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 # from app.db_utils import log_action  # Optional logging
+from app.recommender import STAGE_ORDER, INPUT_RANGES, recommend, recommend_batch, load_rf_models
+from app.fields import init_fields_db, save_field, remove_field, load_farm
+from app.sensor_store import SENSOR_METRICS, query as query_readings
+from app.prediction_log import log_prediction
+from app.instrumentation import span, observe
+from app.batching import CoalescingModel
+from app.model_registry import watch, ModelProxy
+from app.lookup_grid import IrrigationGrid, GRID_PATH
+from app.diagnostics import radar_frame, trend_frame
+from app.explain import explain_inputs
+from app.weather import forecast, get_source, weekly_plan
+from app.components.charts import LiveChartStream
+from app.components.simulator import run_simulation
 
 # ===============================
 # Paths
@@ -14,60 +28,47 @@ CURRENT_DIR = Path(__file__).resolve().parent
 BASE_DIR = CURRENT_DIR.parent
 MODELS_DIR = BASE_DIR / "models"
 
+# Coalesce concurrent single-row predictions across sessions (see app/batching.py)
+COALESCE_PREDICTIONS = True
+COALESCE_WAIT_MS = 2.0
+
+# Reduced forest variant to serve, e.g. "small" (build: python -m app.compact_forest build); None = full models
+RF_VARIANT = None
+
+# Weather forecasts (see app/weather.py): source name and its options, default field location
+WEATHER_SOURCE = "local"
+WEATHER_SOURCE_OPTIONS = {}
+DEFAULT_LOCATION = (41.88, -93.10)  # lat, lon
+
+# Serve the irrigation ML term from the precomputed grid (build: python -m app.lookup_grid build)
+USE_IRRIGATION_GRID = False
+
 # ===============================
 # Load Models
 # ===============================
 @st.cache_resource
 def load_models():
     try:
-        irrigation_model = joblib.load(MODELS_DIR / "irrigation_rf_model.pkl")
-        fertilizer_model = joblib.load(MODELS_DIR / "fertilizer_rf_model.pkl")
+        with span("dashboard.load_models"):
+            # Registry-backed: swaps to a newly activated version without a restart
+            rf = watch("rf", partial(load_rf_models, variant=RF_VARIANT), legacy_dir=MODELS_DIR)
+            irrigation_model, fertilizer_model = ModelProxy(rf, 0), ModelProxy(rf, 1)
+        if USE_IRRIGATION_GRID and GRID_PATH.exists():
+            irrigation_model = IrrigationGrid.load(GRID_PATH)
+        elif COALESCE_PREDICTIONS:
+            # Shared by every session: concurrent one-row predicts run as one batch
+            irrigation_model = CoalescingModel(irrigation_model, "coalescer.irrigation", max_wait_ms=COALESCE_WAIT_MS)
+        if COALESCE_PREDICTIONS:
+            fertilizer_model = CoalescingModel(fertilizer_model, "coalescer.fertilizer", max_wait_ms=COALESCE_WAIT_MS)
         return irrigation_model, fertilizer_model
     except FileNotFoundError:
         st.warning("Model files not found. Using dummy models.")
         class DummyModel:
             def predict(self, X):
-                if X.shape[1] < 10: return np.array([8.5])
-                else: return np.array([35.0])
+                if X.shape[1] < 10: return np.full(len(X), 8.5)
+                else: return np.full(len(X), 35.0)
         return DummyModel(), DummyModel() 
 
-# ===============================
-# Agronomic Rule Helpers
-# ===============================
-def smooth_dryness_factor(soil_moisture_pct, field_capacity_pct=30.0):
-    diff = max(0.0, field_capacity_pct - soil_moisture_pct)
-    return np.clip(diff / 20.0, 0.0, 1.0)
-
-def et0_scaling_factor(et0, baseline=3.0):
-    factor = 1.0 + (et0 - baseline) * 0.08
-    return float(np.clip(factor, 0.75, 1.5))
-
-def rainfall_reduction_factor(rainfall_mm, saturation=12.0):
-    factor = 1.0 - (rainfall_mm / saturation)
-    return float(np.clip(factor, 0.0, 1.0))
-
-def smooth_stage_factor(encoded_stage):
-    x = float(encoded_stage)
-    factor = np.exp(-((x - 2.5) ** 2) / 2.0)
-    scaled = 0.5 + 0.7 * factor
-    return float(np.clip(scaled, 0.4, 1.3))
-
-def organic_matter_factor(om_pct):
-    factor = 1.0 - (om_pct / 20.0)
-    return float(np.clip(factor, 0.5, 1.0))
-
-def ph_penalty_factor(soil_ph, optimal=6.5):
-    penalty = 1.0 + (abs(optimal - soil_ph) * 0.05)
-    return float(np.clip(penalty, 1.0, 1.3))
-
-def cumulative_n_cap_factor(cum_n, soft_threshold=80.0, hard_reduction_start=120.0):
-    if cum_n <= soft_threshold:
-        return 1.0
-    span = max(1.0, hard_reduction_start - soft_threshold)
-    reduction = (cum_n - soft_threshold) / (span * 2.0)
-    factor = 1.0 - reduction
-    return float(np.clip(factor, 0.12, 1.0))
-
 # ===============================
 # Dashboard
 # ===============================
@@ -132,6 +133,12 @@ def show_dashboard():
 
     st.markdown("<hr>", unsafe_allow_html=True)
 
+    init_fields_db()
+    view = st.sidebar.radio("View", ["Single Field", "Farm Overview"], horizontal=True)
+    if view == "Farm Overview":
+        show_farm_overview(user)
+        return
+
     # --- Sidebar Inputs ---
     st.sidebar.header("🚀 Action & Status")
     default_inputs = {
@@ -146,10 +153,27 @@ def show_dashboard():
         if k not in st.session_state:
             st.session_state[k] = v
 
+    # --- Field Registry: load a saved field into the inputs ---
+    farm = load_farm(user.get('username'))
+    if not farm.empty:
+        load_name = st.sidebar.selectbox("Saved Field", farm['name'], key='registry_field')
+        st.sidebar.button("📂 Load Field Readings", use_container_width=True, on_click=_load_field_inputs,
+                          args=(farm.loc[farm['name']==load_name].iloc[0], default_inputs))
+
+    # --- Weather forecast: fill the weather inputs and plan the week ---
+    with st.sidebar.expander("🌤️ Weather Forecast"):
+        lat = st.number_input("Latitude", -90.0, 90.0, DEFAULT_LOCATION[0], format="%.2f", key='lat')
+        lon = st.number_input("Longitude", -180.0, 180.0, DEFAULT_LOCATION[1], format="%.2f", key='lon')
+        elevation = st.number_input("Elevation (m)", 0.0, 5000.0, 300.0, key='elevation')
+        st.button("📡 Load Forecast", use_container_width=True, on_click=_load_forecast, args=(lat, lon, elevation))
+        if st.session_state.get('forecast_error'):
+            st.warning(st.session_state['forecast_error'])
+        elif st.session_state.get('forecast') is not None:
+            st.caption(f"Forecast loaded: {len(st.session_state['forecast'])} days; today's weather filled in.")
+
     growth_stage = st.sidebar.selectbox("Current Growth Stage", ["Emergence", "Vegetative", "Flowering", "Grainfill", "Maturity"], key='growth_stage')
     run_button = st.sidebar.button("✨ Get Recommendations", use_container_width=True, type="primary")
-    stage_order = {'Emergence':1,'Vegetative':2,'Flowering':3,'Grainfill':4,'Maturity':5}
-    growth_stage_encoded = stage_order[growth_stage]
+    growth_stage_encoded = STAGE_ORDER[growth_stage]
 
     # --- Expander for Detailed Inputs ---
     st.markdown('<div class="section-header">🔍 Field & Weather Data Input</div>', unsafe_allow_html=True)
@@ -157,97 +181,58 @@ def show_dashboard():
         col_env, col_soil, col_crop = st.columns(3)
         with col_env:
             st.subheader("🌦️ Environmental & Weather")
-            st.number_input("Average Temperature (°C)", 5.0, 40.0, st.session_state.avg_temp, key='avg_temp')
-            st.number_input("Rainfall (mm)",0.0,200.0, st.session_state.rainfall, key='rainfall')
-            st.number_input("ET0 (mm) - Evapotranspiration",0.0,10.0, st.session_state.et0, key='et0')
-            st.number_input("Humidity (%)",0.0,100.0, st.session_state.humidity, key='humidity')
-            st.number_input("Wind Speed (m/s)",0.0,20.0, st.session_state.wind, key='wind')
-            st.number_input("Day of Year (DOY)",1,365, st.session_state.doy, key='doy')
+            st.number_input("Average Temperature (°C)", *INPUT_RANGES['avg_temp'], st.session_state.avg_temp, key='avg_temp')
+            st.number_input("Rainfall (mm)", *INPUT_RANGES['rainfall'], st.session_state.rainfall, key='rainfall')
+            st.number_input("ET0 (mm) - Evapotranspiration", *INPUT_RANGES['et0'], st.session_state.et0, key='et0')
+            st.number_input("Humidity (%)", *INPUT_RANGES['humidity'], st.session_state.humidity, key='humidity')
+            st.number_input("Wind Speed (m/s)", *INPUT_RANGES['wind'], st.session_state.wind, key='wind')
+            st.number_input("Day of Year (DOY)", *INPUT_RANGES['doy'], st.session_state.doy, key='doy')
         with col_soil:
             st.subheader("💧 Soil Conditions")
-            st.number_input("Soil Moisture (% vol)",0.0,60.0, st.session_state.soil_moisture, key='soil_moisture')
-            st.number_input("Organic Matter (%)",0.0,15.0, st.session_state.organic_matter, key='organic_matter')
-            st.number_input("Soil pH",3.0,9.0, st.session_state.soil_ph, key='soil_ph')
-            st.number_input("AWC (mm) - Available Water Capacity",20.0,300.0, st.session_state.awc, key='awc')
+            st.number_input("Soil Moisture (% vol)", *INPUT_RANGES['soil_moisture'], st.session_state.soil_moisture, key='soil_moisture')
+            st.number_input("Organic Matter (%)", *INPUT_RANGES['organic_matter'], st.session_state.organic_matter, key='organic_matter')
+            st.number_input("Soil pH", *INPUT_RANGES['soil_ph'], st.session_state.soil_ph, key='soil_ph')
+            st.number_input("AWC (mm) - Available Water Capacity", *INPUT_RANGES['awc'], st.session_state.awc, key='awc')
         with col_crop:
             st.subheader("🌱 Crop & History")
-            st.number_input("NDVI - Crop Vigor Index",0.0,1.0, st.session_state.ndvi, key='ndvi')
-            st.number_input("Plant Height (cm)",0.0,300.0, st.session_state.plant_height, key='plant_height')
-            st.number_input("LAI - Leaf Area Index",0.0,10.0, st.session_state.lai, key='lai')
-            st.number_input("Days Since Planting",0,200, st.session_state.days_since_planting, key='days_since_planting')
-            st.number_input("Cumulative N Applied (kg/ha)",0.0,300.0, st.session_state.cumulative_n, key='cumulative_n')
-            st.number_input("Days Since Last Fertilization",0,200, st.session_state.last_fert_days, key='last_fert_days')
-            st.number_input("Irrigation Applied Yesterday (mm)",0.0,50.0, st.session_state.irrigation_applied, key='irrigation_applied')
+            st.number_input("NDVI - Crop Vigor Index", *INPUT_RANGES['ndvi'], st.session_state.ndvi, key='ndvi')
+            st.number_input("Plant Height (cm)", *INPUT_RANGES['plant_height'], st.session_state.plant_height, key='plant_height')
+            st.number_input("LAI - Leaf Area Index", *INPUT_RANGES['lai'], st.session_state.lai, key='lai')
+            st.number_input("Days Since Planting", *INPUT_RANGES['days_since_planting'], st.session_state.days_since_planting, key='days_since_planting')
+            st.number_input("Cumulative N Applied (kg/ha)", *INPUT_RANGES['cumulative_n'], st.session_state.cumulative_n, key='cumulative_n')
+            st.number_input("Days Since Last Fertilization", *INPUT_RANGES['last_fert_days'], st.session_state.last_fert_days, key='last_fert_days')
+            st.number_input("Irrigation Applied Yesterday (mm)", *INPUT_RANGES['irrigation_applied'], st.session_state.irrigation_applied, key='irrigation_applied')
 
     irrigation_model, fertilizer_model = load_models()
     current_inputs = {k: st.session_state[k] for k in default_inputs.keys() if k!='growth_stage'}
 
+    # --- Field Registry: save the current inputs ---
+    with st.sidebar.expander("💾 Save to Field Registry"):
+        field_name = st.text_input("Field Name", value=st.session_state.get('registry_field', ""))
+        # Existing fields start from their stored area (blank if none), so a re-save keeps it
+        stored = farm.loc[farm['name'] == field_name.strip(), 'area_ha']
+        default_area = (None if pd.isna(stored.iloc[0]) else float(stored.iloc[0])) if len(stored) else 1.0
+        area_ha = st.number_input("Area (ha)", 0.0, 10000.0, default_area)
+        if st.button("Save Field", use_container_width=True) and field_name.strip():
+            save_field(user.get('username'), field_name.strip(),
+                       {**current_inputs, 'growth_stage_encoded': growth_stage_encoded}, area_ha)
+            st.success(f"Saved readings for {field_name.strip()}.")
+
     # --- Run Predictions ---
     if run_button:
-        soil_moisture = current_inputs['soil_moisture']
-        avg_temp = current_inputs['avg_temp']
-        rainfall = current_inputs['rainfall']
-        et0 = current_inputs['et0']
-        ndvi = current_inputs['ndvi']
-        humidity = current_inputs['humidity']
-        wind = current_inputs['wind']
-        doy = current_inputs['doy']
-        plant_height = current_inputs['plant_height']
-        days_since_planting = current_inputs['days_since_planting']
-        lai = current_inputs['lai']
-        organic_matter = current_inputs['organic_matter']
-        soil_ph = current_inputs['soil_ph']
-        awc = current_inputs['awc']
+        run_started = time.perf_counter()
         cumulative_n = current_inputs['cumulative_n']
-        last_fert_days = current_inputs['last_fert_days']
-        irrigation_applied = current_inputs['irrigation_applied']
-
-        # ML Inputs
-        X_irrigation = pd.DataFrame([{
-            'Soil_Moisture_pct_vol': soil_moisture,'Avg_Temp_C': avg_temp,'Rainfall_mm': rainfall,
-            'ET0_mm': et0,'NDVI': ndvi,'DOY': doy,'Wind_Speed_m_s': wind,'Humidity_%': humidity
-        }])
-        irrigation_ml = irrigation_model.predict(X_irrigation)[0]
-
-        X_fertilizer = pd.DataFrame([{
-            'Days_Since_Planting': days_since_planting,'Growth_Stage': growth_stage_encoded,
-            'Plant_Height_cm': plant_height,'NDVI': ndvi,'LAI': lai,'Organic_Matter_%': organic_matter,
-            'Soil_pH': soil_ph,'AWC_mm': awc,'Avg_Temp_C': avg_temp,'Rainfall_mm': rainfall,'Humidity_%': humidity,
-            'Cumulative_N_applied_kg_ha': cumulative_n,'Last_Fertilization_DaysAgo': last_fert_days,
-            'Soil_Moisture_pct_vol': soil_moisture,'ET0_mm': et0,'Irrigation_mm_applied': irrigation_applied
-        }])
-        fertilizer_ml = fertilizer_model.predict(X_fertilizer)[0]
-
-        # --- Hybrid Agronomic Rules Applied ---
-        # IRRIGATION
-        dryness = smooth_dryness_factor(soil_moisture)
-        et_factor = et0_scaling_factor(et0)
-        rain_factor = rainfall_reduction_factor(rainfall)
-        stage_modifier = smooth_stage_factor(growth_stage_encoded)/0.9
-        base_rule = et0*stage_modifier + dryness*6.0
-        irrigation_candidate = 0.5*irrigation_ml + 0.5*base_rule
-        irrigation_candidate *= et_factor*rain_factor
-        if avg_temp>30: irrigation_candidate*=1.05
-        if humidity<40: irrigation_candidate*=1.05
-        if irrigation_applied>15 and soil_moisture>25: irrigation_candidate*=0.6
-        irrigation_output = float(np.clip(irrigation_candidate,0.0,30.0))
-
-        # FERTILIZER
-        stage_factor = smooth_stage_factor(growth_stage_encoded)
-        om_factor = organic_matter_factor(organic_matter)
-        ph_factor = ph_penalty_factor(soil_ph)
-        cum_n_factor = cumulative_n_cap_factor(cumulative_n)
-        seasonal_N_total = 150.0
-        stage_shares={1:0.08,2:0.40,3:0.35,4:0.12,5:0.05}
-        stage_share=stage_shares.get(growth_stage_encoded,0.2)
-        rule_baseline_N = seasonal_N_total*stage_share*np.clip((ndvi*1.2 + plant_height/200.0),0.3,1.6)
-        rule_candidate_N = rule_baseline_N*stage_factor*om_factor*ph_factor*cum_n_factor
-        fertilizer_candidate = 0.45*fertilizer_ml + 0.55*rule_candidate_N
-        if last_fert_days<7: fertilizer_candidate*=0.6
-        fertilizer_output = float(np.clip(fertilizer_candidate,0.0,80.0))
-        if growth_stage_encoded in [1,2]: fert_type="N fertilizer"
-        elif growth_stage_encoded==3: fert_type="Balanced NPK"
-        else: fert_type="Top-dressing / Maintenance"
+
+        # --- Hybrid ML + Agronomic Rules ---
+        result = recommend(current_inputs, growth_stage_encoded, irrigation_model, fertilizer_model)
+        irrigation_ml = result['irrigation_ml']
+        base_rule = result['irrigation_rule']
+        irrigation_output = result['irrigation_output']
+        fertilizer_ml = result['fertilizer_ml']
+        rule_candidate_N = result['fertilizer_rule']
+        fertilizer_output = result['fertilizer_output']
+        fert_type = result['fert_type']
+        log_prediction(username=user.get('username'), growth_stage_encoded=growth_stage_encoded, **current_inputs, **result)
 
         # --- Display Metrics ---
         st.markdown('<div class="section-header">✅ Daily Actionable Recommendations</div>', unsafe_allow_html=True)
@@ -288,25 +273,27 @@ def show_dashboard():
 
         # --- Display Charts ---
         st.markdown('<div class="section-header">📈 Diagnostics and Justification</div>', unsafe_allow_html=True)
-        st.altair_chart(rec_chart, use_container_width=True)
+        with span("dashboard.render.synthesis_chart"):
+            st.altair_chart(rec_chart, use_container_width=True)
+        field_df=pd.DataFrame([{**current_inputs,'growth_stage_encoded':growth_stage_encoded}])
+
+        # What drove the ML terms: per-feature path attributions (cached per input)
+        contrib_df=explain_inputs(field_df, irrigation_model, fertilizer_model)
+        if not contrib_df.empty:
+            contrib_cols=st.columns(contrib_df['model'].nunique())
+            for col,(label,part) in zip(contrib_cols, contrib_df.groupby('model',sort=False)):
+                part=part.assign(direction=np.where(part['contribution']>=0,'raises','lowers'))
+                contrib_chart=alt.Chart(part).mark_bar().encode(
+                    x=alt.X('contribution:Q',title='Contribution'),
+                    y=alt.Y('feature:N',sort=alt.EncodingSortField('contribution',op='sum',order='descending'),title=None),
+                    color=alt.Color('direction:N',scale=alt.Scale(domain=['raises','lowers'],range=['#2ecc71','#e74c3c']),legend=None),
+                    tooltip=['feature:N',alt.Tooltip('value:Q',format='.2f'),alt.Tooltip('contribution:Q',format='.3f')]
+                ).properties(title=f"ML {label}: base {part['bias'].iloc[0]:.1f} + feature contributions")
+                with col, span("dashboard.render.contributions"):
+                    st.altair_chart(contrib_chart,use_container_width=True)
 
         # Crop Condition Radar (full-width below bar chart)
-        metrics=["NDVI (Vigor)","Soil_Moisture (Water)","LAI (Canopy)","Stage (Demand)","Temp_Stress (Heat)","Water_Stress (E/R)"]
-        ndvi_norm=np.clip((ndvi-0.2)/(0.8-0.2),0,1)
-        sm_norm=np.clip((soil_moisture-15)/(35-15),0,1)
-        lai_norm=np.clip((lai-0)/(6-0),0,1)
-        stage_norm=(growth_stage_encoded-1)/4
-        temp_stress=np.clip((avg_temp-25)/10,0,1)
-        water_stress=np.clip((et0/6)*(1-rainfall/12),0,1)
-        values=[ndvi_norm,sm_norm,lai_norm,stage_norm,temp_stress,water_stress]
-        n=len(metrics)
-        angles=np.linspace(0,2*np.pi,n,endpoint=False)
-        radar_rows=[]
-        for i,(m,v) in enumerate(zip(metrics,values)):
-            angle=angles[i]
-            radar_rows.append({"metric":m,"value":v,"x":v*np.cos(angle),"y":v*np.sin(angle),"angle":angle})
-        radar_rows.append(radar_rows[0])
-        radar_df=pd.DataFrame(radar_rows)
+        radar_df=radar_frame(field_df)
         radar_base=alt.Chart(radar_df).mark_line(point=True,color='#004D40').encode(
             x='x:Q',y='y:Q',tooltip=['metric:N',alt.Tooltip('value:Q',format='.2f')]
         ).properties(width=1100,height=400)
@@ -314,27 +301,140 @@ def show_dashboard():
             x='x:Q',y='y:Q',text='metric:N',color=alt.value('gray')
         )
         radar_chart=(radar_base+text_layer).properties(title="🌿 Crop Status Diagnostic Wheel (Normalized)").configure_title(fontSize=16).configure_view(stroke=None)
-        st.altair_chart(radar_chart, use_container_width=True)
+        with span("dashboard.render.diagnostic_wheel"):
+            st.altair_chart(radar_chart, use_container_width=True)
         st.markdown("<p style='font-size:0.8rem;text-align:center;color:#555;'><i>The Diagnostic Wheel shows normalized health and stress metrics (0-1). Closer to center = higher stress.</i></p>", unsafe_allow_html=True)
 
-        # --- 7-Day Simulated Trends ---
-        st.markdown('<div class="section-header">🗓️ 7-Day Simulated Field Trends</div>', unsafe_allow_html=True)
-        days=7
-        end_date=datetime.now().date()
-        dates=[end_date-timedelta(days=(days-1-i)) for i in range(days)]
-        rng=np.random.default_rng(seed=42)
-        sm_series=np.clip(soil_moisture + rng.normal(0,1.5,days).cumsum()*0.1,0,60)
-        ndvi_series=np.clip(ndvi + rng.normal(0,0.02,days).cumsum()*0.02,0,1)
-        et0_series=np.clip(et0 + rng.normal(0,0.1,days).cumsum()*0.05,0,10)
-        temp_series=np.clip(avg_temp + rng.normal(0,0.5,days).cumsum()*0.2,5,45)
-        trend_df=pd.DataFrame({"date":pd.to_datetime(dates),"Soil_Moisture":sm_series,"NDVI":ndvi_series,"ET0":et0_series,"Temp":temp_series})
-        trend_melt=trend_df.melt(id_vars=["date"],var_name="metric",value_name="value")
-        trend_chart=alt.Chart(trend_melt).mark_line(point=True).encode(
-            x='date:T',y='value:Q',color='metric:N',tooltip=['date:T','metric:N','value:Q']
-        ).properties(title="Key Parameter Projections (Demonstrative)")
-        st.altair_chart(trend_chart,use_container_width=True)
+        forecast_df=st.session_state.get('forecast')
+        if forecast_df is not None:
+            # --- Week-ahead plan from the forecast: every day in one batched call ---
+            st.markdown('<div class="section-header">🗓️ 7-Day Forecast Plan</div>', unsafe_allow_html=True)
+            plan=weekly_plan(current_inputs, growth_stage_encoded, forecast_df, irrigation_model, fertilizer_model)
+            plan_melt=plan.melt(id_vars='date', value_vars=['irrigation_output','et0','rainfall'], var_name='series', value_name='mm')
+            plan_melt['series']=plan_melt['series'].map({'irrigation_output':'Irrigation','et0':'ET0','rainfall':'Rainfall'})
+            plan_chart=alt.Chart(plan_melt).mark_line(point=True).encode(
+                x='date:T',y=alt.Y('mm:Q',title='mm/day'),color='series:N',tooltip=['date:T','series:N',alt.Tooltip('mm:Q',format='.1f')]
+            ).properties(title="Forecast-Driven Irrigation vs. ET0 and Rainfall")
+            with span("dashboard.render.weekly_plan"):
+                st.altair_chart(plan_chart,use_container_width=True)
+            st.dataframe(plan[['date','avg_temp','rainfall','et0','irrigation_output','fertilizer_output','fert_type']].rename(columns={
+                'avg_temp':'Temp (°C)','rainfall':'Rain (mm)','et0':'ET0 (mm)','irrigation_output':'Irrigation (mm)',
+                'fertilizer_output':'Fertilizer (kg/ha)','fert_type':'Type'}).round(1), use_container_width=True, hide_index=True)
+        else:
+            # --- 7-Day Simulated Trends ---
+            st.markdown('<div class="section-header">🗓️ 7-Day Simulated Field Trends</div>', unsafe_allow_html=True)
+            trend_melt=trend_frame(field_df,days=7,seed=42)
+            trend_chart=alt.Chart(trend_melt).mark_line(point=True).encode(
+                x='date:T',y='value:Q',color='metric:N',tooltip=['date:T','metric:N','value:Q']
+            ).properties(title="Key Parameter Projections (Demonstrative; load a weather forecast for a real plan)")
+            with span("dashboard.render.trends"):
+                st.altair_chart(trend_chart,use_container_width=True)
+        observe("dashboard.recommendation_run", (time.perf_counter() - run_started) * 1000.0)
     else:
         st.info("👆 Adjust inputs then press '✨ Get Recommendations' to run Hybrid ML and generate insights.")
 
+    # --- Live Simulation: soil/fertilizer dynamics streamed step by step ---
+    with st.expander("🧪 Live Simulation"):
+        sim_steps = st.number_input("Steps", 10, 100000, 500, step=10)
+        if st.button("Run Simulation", use_container_width=True):
+            with LiveChartStream() as stream:
+                _, _, total_reward = run_simulation(sim_steps, init_soil=current_inputs['soil_moisture'],
+                                                    rng=np.random.default_rng(), on_step=stream.push)
+            st.caption(f"Total reward over {int(sim_steps)} steps: {total_reward:.1f}")
+
+# ===============================
+# Field Registry
+# ===============================
+STAGE_NAMES = {code: name for name, code in STAGE_ORDER.items()}
+
+def _load_field_inputs(field, default_inputs):
+    """Button callback: copy a saved field's readings into the input widgets."""
+    for k, default in default_inputs.items():
+        if k == 'growth_stage':
+            st.session_state[k] = STAGE_NAMES[int(field['growth_stage_encoded'])]
+        elif pd.notna(field[k]):
+            st.session_state[k] = type(default)(field[k])
+
+def _load_forecast(lat, lon, elevation):
+    """Button callback: fetch (or read the cached) forecast and fill today's weather inputs."""
+    try:
+        forecast_df = forecast(lat, lon, source=get_source(WEATHER_SOURCE, **WEATHER_SOURCE_OPTIONS), elevation=elevation)
+    except (FileNotFoundError, ValueError) as e:
+        st.session_state['forecast'], st.session_state['forecast_error'] = None, f"No forecast: {e}"
+        return
+    if forecast_df.empty:
+        st.session_state['forecast'], st.session_state['forecast_error'] = None, "The forecast has no days from today."
+        return
+    today = forecast_df.iloc[0]
+    weather = {'avg_temp': (today['t_min'] + today['t_max']) / 2, 'rainfall': today['rainfall'], 'et0': today['et0'],
+               'humidity': today['rh_mean'], 'wind': today['wind_2m']}
+    for k, v in weather.items():
+        st.session_state[k] = float(np.clip(v if pd.notna(v) else 0.0, *INPUT_RANGES[k]))
+    st.session_state['doy'] = int(today['date'].dayofyear)
+    st.session_state['forecast'], st.session_state['forecast_error'] = forecast_df, None
+
+def show_farm_overview(user):
+    """All of the farmer's saved fields, scored in one batched call."""
+    st.markdown('<div class="section-header">🗺️ Farm Overview</div>', unsafe_allow_html=True)
+    farm = load_farm(user.get('username'))
+    if farm.empty:
+        st.info("No saved fields yet. Use '💾 Save to Field Registry' in the Single Field view to add plots.")
+        return
+
+    irrigation_model, fertilizer_model = load_models()
+    run_started = time.perf_counter()
+    recs = recommend_batch(farm, irrigation_model, fertilizer_model)
+    observe("dashboard.farm_run", (time.perf_counter() - run_started) * 1000.0)
+    # Log each field's recommendation once per saved reading, not on every rerun
+    logged = st.session_state.setdefault('farm_logged', set())
+    for key, inputs, rec in zip(zip(farm.index, farm['updated_at']), farm.to_dict("records"), recs.to_dict("records")):
+        if key not in logged:
+            logged.add(key)
+            log_prediction(username=user.get('username'), **{**inputs, **rec})
+
+    table = pd.DataFrame({
+        "Field": farm['name'],
+        "Area (ha)": farm['area_ha'],
+        "Stage": farm['growth_stage_encoded'].map(STAGE_NAMES),
+        "Soil Moisture (%)": farm['soil_moisture'],
+        "NDVI": farm['ndvi'],
+        "Irrigation (mm)": recs['irrigation_output'],
+        "Fertilizer (kg/ha)": recs['fertilizer_output'],
+        "Fertilizer Type": recs['fert_type'],
+        "Updated": pd.to_datetime(farm['updated_at'], unit='s'),
+    })
+    area = farm['area_ha'].fillna(0.0)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Fields", len(farm))
+    col2.metric("Irrigation Water", f"{(recs['irrigation_output'] * area * 10).sum():,.0f} m³")  # 1 mm on 1 ha = 10 m³
+    col3.metric("Nitrogen", f"{(recs['fertilizer_output'] * area).sum():,.0f} kg")
+    st.dataframe(table, use_container_width=True, hide_index=True, column_config={
+        "Irrigation (mm)": st.column_config.NumberColumn(format="%.1f"),
+        "Fertilizer (kg/ha)": st.column_config.NumberColumn(format="%.1f"),
+        "NDVI": st.column_config.NumberColumn(format="%.2f"),
+    })
+    st.caption("Click a column header to sort.")
+
+    with st.expander("📡 Sensor History"):
+        col1, col2, col3 = st.columns(3)
+        history_name = col1.selectbox("Field", farm['name'], key='history_field')
+        history_metrics = col2.multiselect("Readings", SENSOR_METRICS, default=["soil_moisture"])
+        history_days = col3.selectbox("Range", [1, 7, 30, 90, 365], index=1, format_func=lambda d: f"Last {d} day(s)")
+        if history_metrics:
+            field_id = farm.index[farm['name']==history_name][0]
+            now = time.time()
+            readings = query_readings(int(field_id), history_metrics, now - history_days*86400, now)
+            if readings.empty:
+                st.info("No sensor readings stored for this field and range.")
+            else:
+                st.line_chart(readings.pivot_table(index='Time', columns='metric', values='value'))
+                st.caption(f"Resolution: {readings.attrs['resolution']} ({len(readings)} points)")
+
+    with st.expander("Remove a Field"):
+        remove_name = st.selectbox("Field", farm['name'])
+        if st.button("Remove Field"):
+            remove_field(user.get('username'), remove_name)
+            st.rerun()
+
 if __name__=="__main__":
     show_dashboard()
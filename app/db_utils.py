@@ -1,11 +1,17 @@
 # app/db_utils.py
 import sqlite3
+import time
 from pathlib import Path
 from datetime import datetime
+from app.instrumentation import span
 
 DB_PATH = Path(__file__).resolve().parent.parent / "data" / "users.db"
 
+# Columns shown in the admin user table (never password_hash / reset_token)
+USER_COLUMNS = ["id", "name", "username", "email", "role", "created_at"]
+
 def get_connection():
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     return sqlite3.connect(DB_PATH)
 
 def init_db():
@@ -25,11 +31,87 @@ def init_db():
 
 def log_action(username, action):
     """Insert a log entry into the logs table."""
+    with span("db.log_action"):
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO logs (username, action, timestamp) VALUES (?, ?, ?)",
+            (username, action, datetime.now().isoformat())
+        )
+        conn.commit()
+        conn.close()
+
+# --- User management helpers (admin dashboard) ---
+def _user_search_clause(search):
+    """
+    WHERE clause for a username/email prefix search.
+    Uses range predicates so SQLite can walk the UNIQUE indexes on
+    username and email instead of scanning the table (LIKE would scan).
+    """
+    if not search:
+        return "", ()
+    upper = search + "\uffff"
+    return (
+        " WHERE ((username >= ? AND username < ?) OR (email >= ? AND email < ?))",
+        (search, upper, search, upper),
+    )
+
+def count_users(search=None):
+    """Number of users matching the optional username/email prefix."""
+    where, params = _user_search_clause(search)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM users{where}", params)
+    total = cursor.fetchone()[0]
+    conn.close()
+    return total
+
+def fetch_users_page(after_id=0, page_size=25, search=None):
+    """
+    Return the next page of users (ordered by id) as a list of dicts with
+    USER_COLUMNS only. Keyset pagination: pass the last id of the previous
+    page as `after_id`, so each page is a bounded walk from that id however
+    deep it is (no OFFSET scan).
+    """
+    where, params = _user_search_clause(search)
+    where = f"{where} AND id > ?" if where else " WHERE id > ?"
+    with span("db.fetch_users_page"):
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(USER_COLUMNS)} FROM users{where} ORDER BY id LIMIT ?",
+            params + (after_id, page_size),
+        )
+        rows = cursor.fetchall()
+        conn.close()
+    return [dict(zip(USER_COLUMNS, row)) for row in rows]
+
+def username_exists(username):
+    """Indexed point lookup on users.username."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM users WHERE username = ? LIMIT 1", (username,))
+    found = cursor.fetchone() is not None
+    conn.close()
+    return found
+
+def add_user(name, username, role):
+    """Insert a user created from the admin dashboard (no password set yet)."""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO logs (username, action, timestamp) VALUES (?, ?, ?)",
-        (username, action, datetime.now().isoformat())
+        "INSERT INTO users (name, username, role, created_at) VALUES (?, ?, ?, ?)",
+        (name, username, role, time.time())
     )
     conn.commit()
     conn.close()
+
+def remove_user(username):
+    """Delete a user by username. Returns True if a row was removed."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM users WHERE username = ?", (username,))
+    removed = cursor.rowcount > 0
+    conn.commit()
+    conn.close()
+    return removed
@@ -0,0 +1,77 @@
+# app/diagnostics.py
+"""
+Vectorized data builders for the dashboard diagnostics: the normalized
+crop-status wheel and the simulated trend series. Every function takes a
+DataFrame with one row per field (dashboard input keys plus
+growth_stage_encoded), so region-wide views need no per-field loops.
+"""
+import numpy as np
+import pandas as pd
+
+RADAR_METRICS = ["NDVI (Vigor)","Soil_Moisture (Water)","LAI (Canopy)","Stage (Demand)","Temp_Stress (Heat)","Water_Stress (E/R)"]
+RADAR_ANGLES = np.linspace(0, 2*np.pi, len(RADAR_METRICS), endpoint=False)
+
+# Trend metric -> (input key, step sd, drift scale, lower, upper)
+TREND_SERIES = {
+    "Soil_Moisture": ("soil_moisture", 1.5, 0.1, 0, 60),
+    "NDVI": ("ndvi", 0.02, 0.02, 0, 1),
+    "ET0": ("et0", 0.1, 0.05, 0, 10),
+    "Temp": ("avg_temp", 0.5, 0.2, 5, 45),
+}
+
+def radar_metrics(fields):
+    """(fields x metrics) array of normalized 0-1 health and stress scores."""
+    col = lambda k: fields[k].to_numpy(dtype=float)
+    return np.column_stack([
+        np.clip((col('ndvi') - 0.2) / (0.8 - 0.2), 0, 1),
+        np.clip((col('soil_moisture') - 15) / (35 - 15), 0, 1),
+        np.clip(col('lai') / 6, 0, 1),
+        (col('growth_stage_encoded') - 1) / 4,
+        np.clip((col('avg_temp') - 25) / 10, 0, 1),
+        np.clip((col('et0') / 6) * (1 - col('rainfall') / 12), 0, 1),
+    ])
+
+def radar_frame(fields, close=True):
+    """
+    Long-format polar points for the diagnostic wheel: one row per field and
+    metric with value, angle and x/y. With `close`, each field's first point
+    is repeated at the end so a line mark closes the polygon.
+    """
+    values = radar_metrics(fields)
+    n_fields, n_metrics = values.shape
+    point = np.arange(n_metrics)
+    if close:
+        point = np.append(point, 0)
+    v = values[:, point]
+    angle = np.broadcast_to(RADAR_ANGLES[point], v.shape)
+    return pd.DataFrame({
+        "field": np.repeat(fields.index.to_numpy(), len(point)),
+        "metric": np.tile(np.asarray(RADAR_METRICS)[point], n_fields),
+        "value": v.ravel(),
+        "x": (v * np.cos(angle)).ravel(),
+        "y": (v * np.sin(angle)).ravel(),
+        "angle": angle.ravel(),
+    })
+
+def trend_frame(fields, days=7, end_date=None, seed=42):
+    """
+    Long-format simulated trends (field, date, metric, value) for the last
+    `days` days: a damped random walk from each field's current reading.
+    Draw order matches the original single-field loop for the same seed.
+    """
+    end_date = pd.Timestamp(end_date if end_date is not None else pd.Timestamp.now()).normalize()
+    dates = pd.date_range(end=end_date, periods=days, freq="D")
+    rng = np.random.default_rng(seed=seed)
+    n_fields = len(fields)
+    series = []
+    for key, sd, scale, lower, upper in TREND_SERIES.values():
+        walk = rng.normal(0, sd, (n_fields, days)).cumsum(axis=1) * scale
+        series.append(np.clip(fields[key].to_numpy(dtype=float)[:, None] + walk, lower, upper))
+    values = np.stack(series, axis=1)  # (fields, metrics, days)
+    n_metrics = len(TREND_SERIES)
+    return pd.DataFrame({
+        "field": np.repeat(fields.index.to_numpy(), n_metrics * days),
+        "date": np.tile(dates.to_numpy(), n_fields * n_metrics),
+        "metric": np.tile(np.repeat(list(TREND_SERIES), days), n_fields),
+        "value": values.ravel(),
+    })
@@ -0,0 +1,134 @@
+# app/explain.py
+"""
+Per-feature contribution breakdowns for the irrigation and fertilizer forests.
+
+    python -m app.explain fields.csv --out contributions.csv
+
+Uses path attribution on the tree arrays (CompactForest.contributions):
+every split's change in node mean is credited to its feature, so a
+prediction is exactly bias + the sum of its feature contributions.
+Fitted sklearn forests are converted to an exact float32 CompactForest once
+per loaded model. Attributions are cached per (model, input row) hash, so
+re-explaining the same inputs costs only the lookup, and a batch computes
+only its uncached rows, in one vectorized call.
+"""
+import argparse
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from app.batching import CoalescingModel
+from app.cache_utils import TTLCache
+from app.compact_forest import CompactForest
+from app.instrumentation import span, incr
+from app.model_registry import ModelProxy
+from app.recommender import IRRIGATION_FEATURES, FERTILIZER_FEATURES, irrigation_frame, fertilizer_frame, load_rf_models
+
+CACHE_SIZE = 4096
+CACHE_TTL = 3600.0
+BIAS = "(bias)"
+
+_cache = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+_forests = weakref.WeakKeyDictionary()  # loaded sklearn forest -> (CompactForest, fingerprint)
+_forests_lock = threading.Lock()
+
+def _fingerprint(forest):
+    digest = hashlib.blake2b(digest_size=16)
+    for a in (forest.feature, forest.threshold, forest.left, forest.value):
+        digest.update(a.tobytes())
+    return digest.hexdigest()
+
+def as_forest(model):
+    """
+    (CompactForest, fingerprint) behind a served model, unwrapping coalescers
+    and registry proxies; None for models without trees (grid, dummy).
+    """
+    while isinstance(model, (CoalescingModel, ModelProxy)):
+        model = model.model if isinstance(model, CoalescingModel) else model.current
+    if not isinstance(model, CompactForest) and not hasattr(model, "estimators_"):
+        return None
+    with _forests_lock:
+        if model not in _forests:
+            with span("explain.convert"):
+                forest = model if isinstance(model, CompactForest) else CompactForest.from_sklearn(model)
+                _forests[model] = (forest, _fingerprint(forest))
+        return _forests[model]
+
+def attributions(model, X):
+    """
+    Contributions per row of model input frame X: a DataFrame with one column
+    per feature plus BIAS, on X's index. None if the model has no trees.
+    """
+    found = as_forest(model)
+    if found is None:
+        return None
+    forest, fingerprint = found
+    X = X[list(forest.feature_names_in_)]
+    values = X.to_numpy(dtype=np.float32)
+    keys = [(fingerprint, row.tobytes()) for row in values]
+    cached = [_cache.get(k) for k in keys]
+    missing = [i for i, c in enumerate(cached) if c is None]
+    if missing:
+        with span("explain.attributions"):
+            bias, contributions = forest.contributions(values[missing])
+        for i, b, c in zip(missing, bias, contributions):
+            cached[i] = np.append(c, b)
+            _cache.set(keys[i], cached[i])
+        incr("explain.rows_computed", len(missing))
+    return pd.DataFrame(np.vstack(cached) if cached else np.empty((0, forest.n_features_in_ + 1)),
+                        index=X.index, columns=[*forest.feature_names_in_, BIAS])
+
+def explain_inputs(inputs, irrigation_model, fertilizer_model):
+    """
+    Long-format breakdown for a DataFrame of dashboard inputs (plus
+    growth_stage_encoded): row, model, feature, input key, value and
+    contribution. Models without trees are left out.
+    """
+    frames = []
+    for label, model, frame, features in (
+        ("Irrigation (mm)", irrigation_model, irrigation_frame, IRRIGATION_FEATURES),
+        ("Fertilizer (kg/ha)", fertilizer_model, fertilizer_frame, FERTILIZER_FEATURES),
+    ):
+        X = frame(inputs)
+        contributions = attributions(model, X)
+        if contributions is None:
+            continue
+        names = contributions.columns[:-1]
+        n, k = len(X), len(names)
+        long = pd.DataFrame({
+            "row": np.repeat(X.index.to_numpy(), k),
+            "feature": np.tile(names.to_numpy(), n),
+            "input": np.tile([features[f] for f in names], n),
+            "value": X[names].to_numpy(dtype=float).ravel(),
+            "contribution": contributions[names].to_numpy().ravel(),
+            "bias": np.repeat(contributions[BIAS].to_numpy(), k),
+        })
+        frames.append(long.assign(model=label))
+    columns = ["row", "model", "feature", "input", "value", "contribution", "bias"]
+    return pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
+
+def cache_stats():
+    return _cache.stats()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feature contributions of the RF models for a CSV of field inputs.")
+    parser.add_argument("inputs", help="CSV with the dashboard input columns and growth_stage_encoded")
+    parser.add_argument("--models-dir", help="Directory with the RF .pkl files")
+    parser.add_argument("--variant", help="Explain a CompactForest variant instead (app/compact_forest.py)")
+    parser.add_argument("--out", help="Write the long-format breakdown to this CSV")
+    args = parser.parse_args(argv)
+
+    models = load_rf_models(args.models_dir, args.variant) if args.models_dir else load_rf_models(variant=args.variant)
+    report = explain_inputs(pd.read_csv(args.inputs), *models)
+    if args.out:
+        report.to_csv(args.out, index=False)
+        print(f"Wrote {len(report):,} contributions to {args.out}")
+    else:
+        top = report.loc[report["contribution"].abs().groupby([report["row"], report["model"]]).idxmax()]
+        print(top.round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# app/fields.py
+"""
+Field registry: each farmer's plots and the latest readings per plot,
+so a whole farm can be loaded with one query and scored in one batch.
+"""
+import time
+
+import pandas as pd
+
+from app.db_utils import get_connection
+from app.instrumentation import span
+from app.recommender import INPUT_RANGES
+
+# One REAL column per dashboard input, plus the current growth stage
+READING_COLUMNS = sorted(INPUT_RANGES) + ["growth_stage_encoded"]
+
+def init_fields_db():
+    conn = get_connection()
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS fields (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner TEXT NOT NULL,
+        name TEXT NOT NULL,
+        area_ha REAL,
+        created_at REAL,
+        UNIQUE (owner, name)
+    )
+    """)
+    readings = ",\n        ".join(f"{c} REAL" for c in READING_COLUMNS)
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS field_readings (
+        field_id INTEGER PRIMARY KEY REFERENCES fields (id) ON DELETE CASCADE,
+        updated_at REAL,
+        {readings}
+    )
+    """)
+    conn.commit()
+    conn.close()
+
+def save_field(owner, name, readings, area_ha=None):
+    """
+    Create the field if needed and upsert its latest readings.
+    `readings` holds the dashboard input keys plus growth_stage_encoded.
+    Returns the field id.
+    """
+    return save_fields(owner, [(name, readings, area_ha)])[0]
+
+def save_fields(owner, entries):
+    """Bulk save_field(): `entries` is an iterable of (name, readings, area_ha). One transaction."""
+    now = time.time()
+    upsert = (
+        f"INSERT INTO field_readings (field_id, updated_at, {', '.join(READING_COLUMNS)}) "
+        f"VALUES (?, ?, {', '.join('?' * len(READING_COLUMNS))}) "
+        f"ON CONFLICT (field_id) DO UPDATE SET updated_at = excluded.updated_at, "
+        + ", ".join(f"{c} = excluded.{c}" for c in READING_COLUMNS)
+    )
+    ids = []
+    conn = get_connection()
+    with conn:
+        for name, readings, area_ha in entries:
+            conn.execute(
+                "INSERT INTO fields (owner, name, area_ha, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (owner, name) DO UPDATE SET area_ha = COALESCE(excluded.area_ha, area_ha)",
+                (owner, name, area_ha, now),
+            )
+            field_id = conn.execute("SELECT id FROM fields WHERE owner = ? AND name = ?", (owner, name)).fetchone()[0]
+            conn.execute(upsert, (field_id, now, *(readings.get(c) for c in READING_COLUMNS)))
+            ids.append(field_id)
+    conn.close()
+    return ids
+
+def remove_field(owner, name):
+    """Delete a field and its readings. Returns True if a row was removed."""
+    conn = get_connection()
+    conn.execute("PRAGMA foreign_keys = ON")
+    with conn:
+        removed = conn.execute("DELETE FROM fields WHERE owner = ? AND name = ?", (owner, name)).rowcount > 0
+    conn.close()
+    return removed
+
+def load_farm(owner):
+    """
+    All of `owner`'s fields with their latest readings, one row per field
+    (indexed by field id). Fields without readings are left out.
+    """
+    with span("db.fields.load_farm"):
+        conn = get_connection()
+        df = pd.read_sql(
+            f"SELECT f.id AS field_id, f.name, f.area_ha, r.updated_at, "
+            f"{', '.join('r.' + c for c in READING_COLUMNS)} "
+            "FROM fields f JOIN field_readings r ON r.field_id = f.id "
+            "WHERE f.owner = ? ORDER BY f.name",
+            conn, params=(owner,), index_col="field_id",
+        )
+        conn.close()
+    df["growth_stage_encoded"] = df["growth_stage_encoded"].astype(int)
+    return df
@@ -0,0 +1,125 @@
+# app/instrumentation.py
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Set AGRISENSE_INSTRUMENTATION=0 to turn spans, observations and counters into no-ops
+ENABLED = os.environ.get("AGRISENSE_INSTRUMENTATION", "1") != "0"
+
+# Histogram bucket upper bounds (ms), 1-2-5 log spacing
+BUCKETS_MS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500,
+              1000, 2000, 5000, 10000, math.inf]
+
+class Histogram:
+    """Fixed-bucket latency histogram; constant memory per span name."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, ms):
+        i = 0
+        while ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = self.min
+        for bound, n in zip(BUCKETS_MS, self.counts):
+            if n and seen + n >= rank:
+                upper = min(bound, self.max)
+                lo = max(lower, self.min)
+                return lo + (upper - lo) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "min_ms": self.min if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max,
+            "buckets": {str(b): n for b, n in zip(BUCKETS_MS, self.counts) if n},
+        }
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+def observe(name, ms):
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(ms)
+
+def incr(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+@contextmanager
+def span(name):
+    """Time the enclosed block into the `name` histogram."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000.0)
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """Current spans and counters as plain dicts."""
+    with _lock:
+        return {
+            "spans": {name: h.as_dict() for name, h in sorted(_histograms.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+def export_json(path=None):
+    """Serialize snapshot() to JSON; also write it to `path` when given."""
+    payload = json.dumps({"exported_at": time.time(), **snapshot()}, indent=2)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(payload)
+    return payload
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
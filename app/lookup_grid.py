@@ -0,0 +1,197 @@
+# app/lookup_grid.py
+"""
+Precomputed lookup grid for the irrigation RF.
+
+The irrigation model only sees 8 bounded inputs, so its prediction can be
+evaluated once on a regular grid over the sidebar ranges, stored as a
+memory-mapped .npy and served by multilinear interpolation. The grid holds
+the ML term only: the agronomic rules (stage, thresholds, the
+irrigation_applied cut-back and the final clip) are still applied exactly
+after the lookup, so the hybrid output only inherits the interpolation error.
+
+Usage (from the project root):
+    python -m app.lookup_grid build --points 6 --doy-points 13
+    python -m app.lookup_grid check --samples 20000
+"""
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import span
+from app.recommender import (
+    MODELS_DIR, INPUT_RANGES, IRRIGATION_FEATURES, STAGE_ORDER,
+    load_rf_models, irrigation_frame, irrigation_rules_batch,
+)
+
+GRID_PATH = MODELS_DIR / "irrigation_grid.npy"  # metadata alongside as .json
+DEFAULT_POINTS = 6       # grid points per axis (6**8 ~ 1.7M cells, ~6.7 MB float32)
+BUILD_CHUNK = 200_000    # grid cells per predict call while building
+RAIN_SHUTOFF_MM = 12.0   # the rules scale irrigation to 0 from this much rainfall on
+
+FEATURES = list(IRRIGATION_FEATURES)                     # model column order
+INPUT_KEYS = [IRRIGATION_FEATURES[f] for f in FEATURES]  # matching input keys
+
+class IrrigationGrid:
+    """
+    Drop-in for the irrigation model: predict(X) interpolates the stored grid
+    instead of walking the forest. X is an irrigation_frame() / (n, 8) array.
+    """
+
+    def __init__(self, axes, values, meta=None):
+        self.axes = [np.asarray(a, dtype=float) for a in axes]
+        if min(len(a) for a in self.axes) < 2:
+            raise ValueError("every grid axis needs at least 2 points")
+        self.values = values
+        self.meta = meta or {}
+        self.feature_names_in_ = np.array(FEATURES, dtype=object)
+        # axes are uniform (linspace), so the cell index is arithmetic, not a search
+        self._lo = np.array([a[0] for a in self.axes])
+        self._step = np.array([a[1] - a[0] for a in self.axes])
+        self._last_cell = np.array([len(a) - 2 for a in self.axes])
+        self._strides = np.array([st // values.itemsize for st in values.strides])
+        # flat offsets of the 2**8 cell corners, last axis fastest
+        self._corner_offsets = np.array(list(itertools.product((0, 1), repeat=len(axes)))) @ self._strides
+        self._flat = np.asarray(values).reshape(-1)  # plain ndarray view: memmap indexing is slow
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = (X if list(X.columns) == FEATURES else X[FEATURES]).to_numpy(dtype=float)
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        pos = np.clip((X - self._lo) / self._step, 0.0, self._last_cell + 1)
+        cell = np.minimum(pos.astype(np.intp), self._last_cell)
+        frac = pos - cell
+        # corner weights: outer product of (1-f, f) per axis, built last axis
+        # first so the first axis ends up most significant (= corner order)
+        weights = np.ones((len(X), 1))
+        for j in range(len(self.axes) - 1, -1, -1):
+            f = frac[:, j:j + 1]
+            weights = np.concatenate([weights * (1.0 - f), weights * f], axis=1)
+        return (self._flat[(cell @ self._strides)[:, None] + self._corner_offsets] * weights).sum(axis=1)
+
+    # --- Build / persist ---
+    @classmethod
+    def build(cls, irrigation_model, points=DEFAULT_POINTS, axis_points=None, path=GRID_PATH, chunk=BUILD_CHUNK):
+        """Evaluate `irrigation_model` on the grid, writing straight into a .npy memmap."""
+        axis_points = axis_points or {}
+        too_small = [k for k in INPUT_KEYS if axis_points.get(k, points) < 2]
+        if too_small:
+            raise ValueError(f"every grid axis needs at least 2 points: {', '.join(too_small)}")
+        axes = [np.linspace(*INPUT_RANGES[k], axis_points.get(k, points)) for k in INPUT_KEYS]
+        shape = tuple(len(a) for a in axes)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        values = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+        flat_values = values.reshape(-1)
+        started = time.perf_counter()
+        with span("lookup_grid.build"):
+            for start in range(0, flat_values.size, chunk):
+                idx = np.unravel_index(np.arange(start, min(start + chunk, flat_values.size)), shape)
+                X = pd.DataFrame({f: axis[i] for f, axis, i in zip(FEATURES, axes, idx)})
+                flat_values[start:start + len(X)] = irrigation_model.predict(X)
+        values.flush()
+        meta = {
+            "features": FEATURES,
+            "axes": [a.tolist() for a in axes],
+            "cells": int(flat_values.size),
+            "size_mb": round(values.nbytes / 1e6, 2),
+            "build_seconds": round(time.perf_counter() - started, 2),
+            "built_at": time.time(),
+        }
+        _meta_path(path).write_text(json.dumps(meta, indent=2))
+        del values
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path=GRID_PATH):
+        """Memory-map a saved grid (raises FileNotFoundError)."""
+        path = Path(path)
+        meta = json.loads(_meta_path(path).read_text())
+        values = np.load(path, mmap_mode="r")
+        return cls(meta["axes"], values, meta)
+
+    def save_meta(self, path=GRID_PATH):
+        _meta_path(Path(path)).write_text(json.dumps(self.meta, indent=2))
+
+def _meta_path(path):
+    return path.with_suffix(".json")
+
+# ===============================
+# Accuracy against the live model
+# ===============================
+def random_inputs(n, seed=0):
+    """
+    Uniform random dashboard inputs over INPUT_RANGES, with a random growth
+    stage. Rainfall is drawn below RAIN_SHUTOFF_MM: above it the rules zero the
+    output whatever the model says, so those rows would only dilute the error.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({k: rng.uniform(lo, hi, n) for k, (lo, hi) in INPUT_RANGES.items()})
+    lo, hi = INPUT_RANGES["rainfall"]
+    df["rainfall"] = rng.uniform(lo, min(hi, RAIN_SHUTOFF_MM), n)
+    df["growth_stage_encoded"] = rng.integers(1, len(STAGE_ORDER) + 1, n)
+    return df
+
+def grid_error(grid, irrigation_model, inputs):
+    """
+    Compare grid-served vs live hybrid irrigation output (mm) on `inputs`.
+    Also reports the per-row lookup and live-model timings.
+    """
+    X = irrigation_frame(inputs)
+    started = time.perf_counter()
+    live_ml = np.asarray(irrigation_model.predict(X), dtype=float)
+    live_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    grid_ml = grid.predict(X)
+    grid_seconds = time.perf_counter() - started
+
+    _, live = irrigation_rules_batch(inputs, live_ml)
+    _, served = irrigation_rules_batch(inputs, grid_ml)
+    err = np.abs(served - live)
+    single = X.iloc[[0]]
+    started = time.perf_counter()
+    for _ in range(200):
+        grid.predict(single)
+    single_us = (time.perf_counter() - started) / 200 * 1e6
+    return {
+        "samples": int(len(inputs)),
+        "max_abs_error_mm": float(err.max()),
+        "mean_abs_error_mm": float(err.mean()),
+        "p99_abs_error_mm": float(np.quantile(err, 0.99)),
+        "max_abs_error_ml_mm": float(np.abs(grid_ml - live_ml).max()),
+        "grid_rows_per_s": len(inputs) / grid_seconds,
+        "live_rows_per_s": len(inputs) / live_seconds,
+        "grid_single_row_us": single_us,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the irrigation lookup grid.")
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--path", default=str(GRID_PATH))
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="Grid points per axis")
+    parser.add_argument("--doy-points", type=int, help="Override the DOY axis (seasonality)")
+    parser.add_argument("--samples", type=int, default=20_000, help="Random inputs for the error check")
+    args = parser.parse_args(argv)
+
+    irrigation_model, _ = load_rf_models(args.models_dir)
+    if args.command == "build":
+        axis_points = {"doy": args.doy_points} if args.doy_points else None
+        grid = IrrigationGrid.build(irrigation_model, args.points, axis_points, args.path)
+        print(f"Built {grid.meta['cells']:,} cells ({grid.meta['size_mb']} MB) in {grid.meta['build_seconds']} s")
+    else:
+        grid = IrrigationGrid.load(args.path)
+    report = grid_error(grid, irrigation_model, random_inputs(args.samples))
+    grid.meta["error"] = report
+    grid.save_meta(args.path)
+    print(f"max |error| {report['max_abs_error_mm']:.3f} mm, mean {report['mean_abs_error_mm']:.3f} mm, "
+          f"p99 {report['p99_abs_error_mm']:.3f} mm over {report['samples']:,} samples")
+    print(f"lookup {report['grid_single_row_us']:.0f} µs/row single, {report['grid_rows_per_s']:,.0f} rows/s batched "
+          f"(live model {report['live_rows_per_s']:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
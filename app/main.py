@@ -1,16 +1,29 @@
 # app/main.py
-from db_utils import init_db
+import sys, os, importlib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-init_db()
+from app.db_utils import init_db
 
-import sys, os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+init_db()
 
 import streamlit as st
-from auth import init_db, create_user, verify_user, create_reset_token, reset_password
-from dashboard import show_dashboard
-from admin_dash import show_admin_dashboard
-from landing import show_landing 
+from app.auth import init_db, create_user, verify_user, create_reset_token, reset_password
+
+# ========================================================
+# PAGE ROUTES (imported on first use)
+# ========================================================
+# The farmer and admin pages pull in joblib / sklearn / altair; importing
+# them lazily keeps the landing and auth pages fast on a cold start.
+PAGE_ROUTES = {
+    "landing": ("landing", "show_landing"),
+    "farmer": ("dashboard", "show_dashboard"),
+    "admin": ("admin_dash", "show_admin_dashboard"),
+}
+
+def load_page(route):
+    """Import the module behind a route and return its page function."""
+    module_name, func_name = PAGE_ROUTES[route]
+    return getattr(importlib.import_module(module_name), func_name)
 
 # ========================================================
 # MAIN ENTRY POINT
@@ -31,16 +44,16 @@ def main():
 
     # 1️⃣ Landing page first (before login)
     if st.session_state.page == "landing" and not st.session_state.authenticated:
-        show_landing()
+        load_page("landing")()
         return
 
     # 2️⃣ If logged in → go to dashboard
     if st.session_state.authenticated:
         user = st.session_state.get("user")
         if user and user.get("role") == "admin":
-            show_admin_dashboard()
+            load_page("admin")()
         else:
-            show_dashboard()
+            load_page("farmer")()
         return
 
     # 3️⃣ Authentication-related pages
@@ -0,0 +1,267 @@
+# app/model_monitor.py
+"""
+Scores the RF models on held-out data and stores one metrics row per model.
+
+Usage (from the project root):
+    python -m app.model_monitor --model irrigation --holdout data/holdout/irrigation.csv
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.db_utils import get_connection
+from app.model_registry import active_dir
+from app.prediction_log import INPUT_COLUMNS, load_predictions
+from app.recommender import irrigation_frame, fertilizer_frame
+
+# ===============================
+# Paths & model specs
+# ===============================
+BASE_DIR = Path(__file__).resolve().parent.parent
+MODELS_DIR = BASE_DIR / "models"
+HOLDOUT_DIR = BASE_DIR / "data" / "holdout"
+
+MODEL_SPECS = {
+    "irrigation": {
+        "label": "Irrigation Model",
+        "file": "irrigation_rf_model.pkl",
+        "holdout": HOLDOUT_DIR / "irrigation.csv",
+        "target": "Irrigation_mm",
+        "frame": irrigation_frame,
+    },
+    "fertilizer": {
+        "label": "Fertilizer Model",
+        "file": "fertilizer_rf_model.pkl",
+        "holdout": HOLDOUT_DIR / "fertilizer.csv",
+        "target": "Fertilizer_kg_ha",
+        "frame": fertilizer_frame,
+    },
+}
+
+CHUNK_SIZE = 5_000
+LATENCY_SAMPLES = 200
+REFERENCE_ROWS = 10_000
+DRIFT_BINS = 10
+RECENT_DAYS = 30  # window of logged predictions used as "recent" inputs
+PSI_ALERT = 0.2  # PSI above this is usually read as significant drift
+
+# ===============================
+# Metrics table
+# ===============================
+def init_metrics_table():
+    conn = get_connection()
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS model_metrics (
+        model TEXT PRIMARY KEY,
+        label TEXT,
+        r2 REAL,
+        mae REAL,
+        n_rows INTEGER,
+        latency_p50_ms REAL,
+        latency_p95_ms REAL,
+        latency_p99_ms REAL,
+        batch_rows_per_s REAL,
+        drift TEXT,
+        evaluated_at TEXT,
+        model_version TEXT
+    )
+    """)
+    # Tables created before model_version existed
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(model_metrics)")}
+    if "model_version" not in columns:
+        conn.execute("ALTER TABLE model_metrics ADD COLUMN model_version TEXT")
+    conn.commit()
+    conn.close()
+
+def save_metrics(model_key, metrics):
+    """Upsert the latest evaluation for one model."""
+    init_metrics_table()
+    conn = get_connection()
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO model_metrics
+            (model, label, r2, mae, n_rows, latency_p50_ms, latency_p95_ms, latency_p99_ms,
+             batch_rows_per_s, drift, evaluated_at, model_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            model_key, metrics["label"], metrics["r2"], metrics["mae"], metrics["n_rows"],
+            metrics["latency_p50_ms"], metrics["latency_p95_ms"], metrics["latency_p99_ms"],
+            metrics["batch_rows_per_s"], json.dumps(metrics.get("drift", {})),
+            datetime.now().isoformat(timespec="seconds"), metrics.get("model_version"),
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+def load_latest_metrics():
+    """Return {model_key: metrics dict} — one stored row per model."""
+    init_metrics_table()
+    conn = get_connection()
+    cursor = conn.execute("SELECT * FROM model_metrics ORDER BY model")
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+    metrics = {}
+    for row in rows:
+        record = dict(zip(columns, row))
+        record["drift"] = json.loads(record["drift"] or "{}")
+        metrics[record["model"]] = record
+    return metrics
+
+# ===============================
+# Evaluation
+# ===============================
+def _feature_columns(model, frame, target):
+    if hasattr(model, "feature_names_in_"):
+        return list(model.feature_names_in_)
+    return [c for c in frame.columns if c != target]
+
+def evaluate_model(model, holdout_path, target, chunk_size=CHUNK_SIZE,
+                   latency_samples=LATENCY_SAMPLES, reference_rows=REFERENCE_ROWS, seed=0):
+    """
+    Stream the held-out CSV through the model.
+    Returns R², MAE, latency percentiles (NaN with latency_samples=0) and a
+    uniform reference sample of the feature columns (used as the drift baseline).
+    """
+    rng = np.random.default_rng(seed)
+    n = 0
+    sum_y = sum_y2 = sse = sae = 0.0
+    predict_seconds = 0.0
+    latencies = []
+    features = None
+    reference, reference_keys = None, None
+
+    for chunk in pd.read_csv(holdout_path, chunksize=chunk_size):
+        if features is None:
+            features = _feature_columns(model, chunk, target)
+        X = chunk[features]
+        y = chunk[target].to_numpy(dtype=float)
+
+        # Single-row latency (the path the dashboard uses), sampled from the first chunk
+        while len(latencies) < latency_samples and len(latencies) < len(X):
+            row = X.iloc[[len(latencies)]]
+            t0 = time.perf_counter()
+            model.predict(row)
+            latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        pred = np.asarray(model.predict(X), dtype=float)
+        predict_seconds += time.perf_counter() - t0
+
+        err = y - pred
+        n += len(y)
+        sum_y += y.sum()
+        sum_y2 += (y * y).sum()
+        sse += (err * err).sum()
+        sae += np.abs(err).sum()
+
+        # Reservoir sample: keep the rows with the smallest random keys
+        keys = rng.random(len(X))
+        if reference is None:
+            reference, reference_keys = X.reset_index(drop=True), keys
+        else:
+            reference = pd.concat([reference, X], ignore_index=True)
+            reference_keys = np.concatenate([reference_keys, keys])
+        if len(reference) > reference_rows:
+            keep = np.argpartition(reference_keys, reference_rows)[:reference_rows]
+            reference, reference_keys = reference.iloc[keep].reset_index(drop=True), reference_keys[keep]
+
+    if n == 0:
+        raise ValueError(f"Held-out dataset is empty: {holdout_path}")
+
+    sst = sum_y2 - sum_y * sum_y / n
+    lat_ms = np.asarray(latencies) * 1000.0
+    percentile = (lambda q: float(np.percentile(lat_ms, q))) if len(lat_ms) else (lambda q: float("nan"))
+    return {
+        "r2": float(1.0 - sse / sst) if sst > 0 else float("nan"),
+        "mae": float(sae / n),
+        "n_rows": int(n),
+        "latency_p50_ms": percentile(50),
+        "latency_p95_ms": percentile(95),
+        "latency_p99_ms": percentile(99),
+        "batch_rows_per_s": float(n / predict_seconds) if predict_seconds > 0 else float("nan"),
+        "reference": reference,
+    }
+
+def feature_drift(reference, recent, bins=DRIFT_BINS):
+    """
+    Per-feature drift of `recent` inputs against the `reference` sample.
+    Reports mean shift in reference standard deviations and the population
+    stability index (PSI) over reference quantile bins.
+    """
+    drift = {}
+    eps = 1e-6
+    for col in reference.columns:
+        if col not in recent.columns:
+            continue
+        ref = reference[col].to_numpy(dtype=float)
+        cur = recent[col].dropna().to_numpy(dtype=float)
+        if len(ref) == 0 or len(cur) == 0:
+            continue
+        edges = np.unique(np.quantile(ref, np.linspace(0, 1, bins + 1)))
+        edges = np.concatenate([[-np.inf], edges[1:-1], [np.inf]])
+        ref_frac = np.histogram(ref, edges)[0] / len(ref) + eps
+        cur_frac = np.histogram(cur, edges)[0] / len(cur) + eps
+        ref_sd = ref.std()
+        drift[col] = {
+            "ref_mean": float(ref.mean()),
+            "recent_mean": float(cur.mean()),
+            "shift_sd": float((cur.mean() - ref.mean()) / ref_sd) if ref_sd > 0 else 0.0,
+            "psi": float(((cur_frac - ref_frac) * np.log(cur_frac / ref_frac)).sum()),
+            "n_recent": int(len(cur)),
+        }
+    return drift
+
+def run_evaluation(model_key, holdout_path=None, target=None, recent_path=None,
+                   models_dir=None, chunk_size=CHUNK_SIZE):
+    """
+    Evaluate one model end to end and store the result in model_metrics.
+    Scores the registry's active "rf" version unless `models_dir` is given.
+    """
+    spec = MODEL_SPECS[model_key]
+    version = None
+    if models_dir is None:
+        models_dir, version = active_dir("rf", legacy_dir=MODELS_DIR)
+    model = joblib.load(Path(models_dir) / spec["file"])
+    metrics = evaluate_model(model, holdout_path or spec["holdout"], target or spec["target"], chunk_size)
+    reference = metrics.pop("reference")
+
+    if recent_path is not None:
+        recent = pd.read_csv(recent_path)
+    else:
+        logged = load_predictions(start=time.time() - RECENT_DAYS * 86400, columns=INPUT_COLUMNS)
+        recent = spec["frame"](logged)
+    metrics["drift"] = feature_drift(reference, recent)
+
+    metrics["label"] = spec["label"]
+    metrics["model_version"] = version
+    save_metrics(model_key, metrics)
+    return metrics
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the RF models and store monitoring metrics.")
+    parser.add_argument("--model", choices=sorted(MODEL_SPECS), action="append",
+                        help="Model to evaluate (repeatable, default: all)")
+    parser.add_argument("--holdout", help="Held-out CSV (default: data/holdout/<model>.csv)")
+    parser.add_argument("--target", help="Target column in the held-out CSV")
+    parser.add_argument("--recent", help="CSV of recent model inputs for drift statistics "
+                                         "(default: the last RECENT_DAYS of the prediction log)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if (args.holdout or args.target) and len(args.model or []) != 1:
+        parser.error("--holdout and --target describe one model's data; pass exactly one --model with them")
+
+    for key in args.model or sorted(MODEL_SPECS):
+        metrics = run_evaluation(key, args.holdout, args.target, args.recent, chunk_size=args.chunk_size)
+        print(f"{MODEL_SPECS[key]['label']} ({metrics['model_version']}): R²={metrics['r2']:.3f} MAE={metrics['mae']:.3f} "
+              f"p95={metrics['latency_p95_ms']:.2f} ms ({metrics['n_rows']} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# app/model_registry.py
+"""
+Local registry of versioned model artifacts, with hot swapping in running processes.
+
+    python -m app.model_registry register rf models/irrigation_rf_model.pkl models/fertilizer_rf_model.pkl --activate
+    python -m app.model_registry register ppo app/ppo_irrigation_final.zip --notes "sweep lr/short_to_long" --activate
+    python -m app.model_registry list rf
+    python -m app.model_registry activate rf v1          # roll back
+
+Layout (models/registry):
+    <name>/<version>/          the artifact files, a drop-in models directory
+    <name>/<version>/manifest.json   version, created_at, notes, sha256 per file
+    <name>/ACTIVE              the active version, replaced atomically
+
+Processes serve models through watch(): the active version is loaded once and
+a daemon thread polls ACTIVE. A new version is verified and loaded on that
+thread, then swapped in with a single reference assignment, so predictions
+already running finish on the model they started with and none are blocked.
+Without an ACTIVE version a handle loads the legacy, unregistered files.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.instrumentation import span, incr
+
+REGISTRY_DIR = Path(__file__).resolve().parent.parent / "models" / "registry"
+POLL_INTERVAL = 5.0  # seconds between ACTIVE checks
+UNREGISTERED = "unregistered"
+
+_handles = {}
+_handles_lock = threading.Lock()
+
+class ChecksumError(ValueError):
+    pass
+
+# ===============================
+# Registry on disk
+# ===============================
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def version_dir(name, version, registry_dir=REGISTRY_DIR):
+    return Path(registry_dir) / name / version
+
+def versions(name, registry_dir=REGISTRY_DIR):
+    """Manifests of every version of `name`, oldest first."""
+    root = Path(registry_dir) / name
+    manifests = [json.loads(p.read_text()) for p in root.glob("v*/manifest.json")]
+    return sorted(manifests, key=lambda m: int(m["version"][1:]))
+
+def register(name, files, notes="", activate=False, registry_dir=REGISTRY_DIR):
+    """Copy `files` into a new version of `name` and return its manifest."""
+    root = Path(registry_dir) / name
+    root.mkdir(parents=True, exist_ok=True)
+    files = [Path(f) for f in files]
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=root))
+    for f in files:
+        shutil.copy2(f, staging / f.name)
+    manifest = {
+        "name": name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "notes": notes,
+        "files": {f.name: _sha256(staging / f.name) for f in files},
+        "sources": {f.name: str(f.resolve()) for f in files},
+    }
+    while True:  # next free version; rename fails if another process took it first
+        existing = [int(m["version"][1:]) for m in versions(name, registry_dir)]
+        manifest["version"] = f"v{max(existing, default=0) + 1}"
+        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        try:
+            staging.rename(root / manifest["version"])
+            break
+        except OSError:
+            if not (root / manifest["version"]).exists():
+                raise
+    if activate:
+        set_active(name, manifest["version"], registry_dir)
+    return manifest
+
+def verify(name, version, registry_dir=REGISTRY_DIR):
+    """Check every artifact against its manifest checksum (raises ChecksumError)."""
+    path = version_dir(name, version, registry_dir)
+    manifest = json.loads((path / "manifest.json").read_text())
+    for filename, expected in manifest["files"].items():
+        if _sha256(path / filename) != expected:
+            raise ChecksumError(f"{name} {version}: {filename} does not match its checksum")
+    return manifest
+
+def active_version(name, registry_dir=REGISTRY_DIR):
+    try:
+        return (Path(registry_dir) / name / "ACTIVE").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def active_dir(name, legacy_dir=None, registry_dir=REGISTRY_DIR):
+    """
+    (directory, version) of the verified active version of `name`, or
+    (legacy_dir, UNREGISTERED) when nothing is active. For one-off loads
+    (evaluation, benchmarks) that should score what is being served.
+    """
+    version = active_version(name, registry_dir)
+    if version is None:
+        if legacy_dir is None:
+            raise FileNotFoundError(f"no active version of {name!r} in {registry_dir}")
+        return Path(legacy_dir), UNREGISTERED
+    verify(name, version, registry_dir)
+    return version_dir(name, version, registry_dir), version
+
+def set_active(name, version, registry_dir=REGISTRY_DIR):
+    """Point `name` at a verified version; watching processes pick it up on their next poll."""
+    verify(name, version, registry_dir)
+    pointer = Path(registry_dir) / name / "ACTIVE"
+    tmp = pointer.with_suffix(".tmp")
+    tmp.write_text(version)
+    os.replace(tmp, pointer)
+
+# ===============================
+# Hot-swapping handles
+# ===============================
+class ModelHandle:
+    """
+    The loaded active version of one registered model. `model` always
+    returns the current object; callers should read it once per prediction.
+    loader(directory) builds the model from a version (or legacy) directory.
+    """
+
+    def __init__(self, name, loader, legacy_dir=None, poll_interval=POLL_INTERVAL, registry_dir=REGISTRY_DIR):
+        self.name = name
+        self.loader = loader
+        self.legacy_dir = legacy_dir
+        self.poll_interval = poll_interval
+        self.registry_dir = registry_dir
+        self.swaps = 0
+        self.last_error = None
+        self._failed_version = None  # not retried until ACTIVE points elsewhere
+        self._thread_pid = None
+        self._current = self._load(active_version(name, registry_dir))  # errors surface to the caller
+
+    def _load(self, version):
+        with span(f"model_registry.load.{self.name}"):
+            if version is None:
+                if self.legacy_dir is None:
+                    raise FileNotFoundError(f"no active version of {self.name!r} in {self.registry_dir}")
+                model, manifest = self.loader(Path(self.legacy_dir)), None
+            else:
+                manifest = verify(self.name, version, self.registry_dir)
+                model = self.loader(version_dir(self.name, version, self.registry_dir))
+        return {"version": version or UNREGISTERED, "model": model, "manifest": manifest,
+                "loaded_at": datetime.now().isoformat(timespec="seconds")}
+
+    @property
+    def model(self):
+        if self._thread_pid != os.getpid():  # first use in this process (threads do not survive fork)
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._watch, name=f"model-registry-{self.name}", daemon=True).start()
+        return self._current["model"]
+
+    @property
+    def version(self):
+        return self._current["version"]
+
+    def refresh(self):
+        """Load and swap in the active version if it changed. Returns True on a swap."""
+        wanted = active_version(self.name, self.registry_dir)
+        if wanted != self._failed_version:
+            self._failed_version = None
+        if wanted is None or wanted in (self._current["version"], self._failed_version):
+            return False
+        try:
+            loaded = self._load(wanted)
+        except Exception as e:  # keep serving the current model
+            self.last_error = f"{wanted}: {type(e).__name__}: {e}"
+            self._failed_version = wanted
+            return False
+        self._current = loaded  # one reference assignment: in-flight predictions keep the old model
+        self.swaps += 1
+        self.last_error = None
+        incr(f"model_registry.swaps.{self.name}")
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            self.refresh()
+
+    def stats(self):
+        manifest = self._current["manifest"] or {}
+        return {"version": self.version, "loaded_at": self._current["loaded_at"],
+                "created_at": manifest.get("created_at"), "notes": manifest.get("notes"),
+                "swaps": self.swaps, "last_error": self.last_error}
+
+class ModelProxy:
+    """predict()-able view of part of a handle's model, resolved on every call."""
+
+    def __init__(self, handle, index=None):
+        self.handle = handle
+        self.index = index
+
+    @property
+    def current(self):
+        model = self.handle.model
+        return model if self.index is None else model[self.index]
+
+    def predict(self, X):
+        return self.current.predict(X)
+
+    def __getattr__(self, attr):
+        if attr in ("handle", "index"):  # not yet set (e.g. during copy/unpickle)
+            raise AttributeError(attr)
+        return getattr(self.current, attr)
+
+def watch(name, loader, legacy_dir=None, poll_interval=POLL_INTERVAL, registry_dir=REGISTRY_DIR):
+    """The process-wide ModelHandle for `name` (created and loaded on first call)."""
+    with _handles_lock:
+        if name not in _handles:
+            _handles[name] = ModelHandle(name, loader, legacy_dir, poll_interval, registry_dir)
+        return _handles[name]
+
+def handle_stats():
+    """Loaded version per watched model in this process."""
+    with _handles_lock:
+        return {name: h.stats() for name, h in _handles.items()}
+
+# ===============================
+# CLI
+# ===============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts.")
+    parser.add_argument("--registry-dir", default=str(REGISTRY_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("register", help="Add files as a new version")
+    p.add_argument("name")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--notes", default="")
+    p.add_argument("--activate", action="store_true")
+    p = sub.add_parser("activate", help="Make a version active (running processes swap to it)")
+    p.add_argument("name")
+    p.add_argument("version")
+    p = sub.add_parser("list", help="Show versions")
+    p.add_argument("name")
+    p = sub.add_parser("verify", help="Check a version's checksums")
+    p.add_argument("name")
+    p.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.command == "register":
+        manifest = register(args.name, args.files, args.notes, args.activate, args.registry_dir)
+        print(f"Registered {args.name} {manifest['version']}" + (" (active)" if args.activate else ""))
+    elif args.command == "activate":
+        set_active(args.name, args.version, args.registry_dir)
+        print(f"{args.name}: {args.version} is active")
+    elif args.command == "verify":
+        verify(args.name, args.version, args.registry_dir)
+        print(f"{args.name} {args.version}: checksums OK")
+    else:
+        active = active_version(args.name, args.registry_dir)
+        for m in versions(args.name, args.registry_dir):
+            mark = "*" if m["version"] == active else " "
+            print(f"{mark} {m['version']:>5}  {m['created_at']}  {', '.join(m['files'])}  {m['notes']}")
+
+if __name__ == "__main__":
+    main()
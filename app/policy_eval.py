@@ -0,0 +1,174 @@
+# app/policy_eval.py
+"""
+Compares irrigation/fertilizer policies on IrrigationEnv episodes.
+
+    python -m app.policy_eval --seeds 200 --days 30
+    python -m app.policy_eval --policies rule hybrid --by crop
+
+Policies:
+    ppo     the trained PPO agent (components/model_runner.py)
+    rule    simulator.get_recommendation()
+    hybrid  the dashboard's RF + agronomic rules (recommender.recommend_batch)
+
+Every policy plays the same crop x soil x seed grid in one VecIrrigationEnv
+with identical weather (common random numbers). Results report yield (final
+G), water, fertilizer, leaching and return as means with 95% confidence
+intervals.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.components.irrigation_env import VecIrrigationEnv, CROP_DATA, SOIL_DATA
+from app.instrumentation import span
+
+METRICS = ["yield", "water", "fertilizer", "leaching", "return"]
+Z_95 = 1.96
+
+# --- Action scaling: env actions are daily fractions up to ENV_MAX_ACTION ---
+ENV_MAX_ACTION = np.array([0.1, 0.05])  # [irrigation, fertilizer], IrrigationEnv.action_space.high
+RULE_MAX_IRRIGATION_L = 50.0    # get_recommendation() irrigation at its driest
+RULE_MAX_FERTILIZER_KG = 5.0    # get_recommendation() fertilizer at zero nutrients
+HYBRID_MAX_IRRIGATION_MM = 30.0  # recommender output clip
+HYBRID_MAX_FERTILIZER_KG = 80.0  # recommender output clip
+
+# Env state -> dashboard inputs for the hybrid policy. M is relative water
+# content; this scale puts a typical crop optimum (M ~ 0.65) at the 30 % vol
+# field capacity the agronomic rules assume.
+MOISTURE_PCT_AT_SATURATION = 46.0
+# Readings the env does not model: the dashboard's default inputs
+HYBRID_DEFAULTS = {
+    'avg_temp':25.0, 'rainfall':0.0, 'humidity':65.0, 'wind':1.5, 'doy':150,
+    'organic_matter':3.0, 'soil_ph':6.5, 'awc':60.0, 'last_fert_days':10,
+}
+
+# ===============================
+# Policies: VecIrrigationEnv -> (n, 2) actions
+# ===============================
+def rule_policy(env):
+    from app.components.simulator import get_recommendation
+    actions = np.array([get_recommendation(m * 100.0, 25.0, 0.0, n) for m, n in zip(env.M, env.N)])
+    return actions / [RULE_MAX_IRRIGATION_L, RULE_MAX_FERTILIZER_KG] * ENV_MAX_ACTION
+
+def make_hybrid_policy(irrigation_model, fertilizer_model):
+    from app.recommender import recommend_batch
+
+    def hybrid_policy(env):
+        if env.day == 0:
+            hybrid_policy.last_irrigation_mm = np.zeros(env.n)
+        day_norm = env.day / env.max_days
+        inputs = pd.DataFrame({
+            **{k: np.full(env.n, v) for k, v in HYBRID_DEFAULTS.items()},
+            'soil_moisture': env.M * MOISTURE_PCT_AT_SATURATION,
+            'et0': 3.5 * env.evap_factor,
+            'ndvi': 0.2 + 0.7 * env.G,
+            'lai': 6.0 * env.G,
+            'plant_height': 250.0 * env.G,
+            'days_since_planting': np.full(env.n, env.day),
+            'cumulative_n': env.total_fertilizer / ENV_MAX_ACTION[1] * HYBRID_MAX_FERTILIZER_KG,
+            'irrigation_applied': hybrid_policy.last_irrigation_mm,
+            'growth_stage_encoded': np.full(env.n, min(5, 1 + int(day_norm * 5))),
+        })
+        out = recommend_batch(inputs, irrigation_model, fertilizer_model)
+        hybrid_policy.last_irrigation_mm = out['irrigation_output'].to_numpy()
+        mm_kg = out[['irrigation_output', 'fertilizer_output']].to_numpy()
+        return mm_kg / [HYBRID_MAX_IRRIGATION_MM, HYBRID_MAX_FERTILIZER_KG] * ENV_MAX_ACTION
+
+    return hybrid_policy
+
+def make_ppo_policy(model=None):
+    """Wrap a PPO model (default: the deployed one from model_runner)."""
+    if model is None:
+        from app.components.model_runner import get_model
+        model = get_model()
+
+    def ppo_policy(env):
+        actions, _ = model.predict(env.get_observation(), deterministic=True)
+        return actions
+
+    return ppo_policy
+
+def build_policies(names, models_dir=None):
+    """Instantiate the requested policies; unavailable ones are reported and skipped."""
+    policies, skipped = {}, {}
+    for name in names:
+        try:
+            if name == "rule":
+                policies[name] = rule_policy
+            elif name == "ppo":
+                policies[name] = make_ppo_policy()
+            elif name == "hybrid":
+                from app.recommender import load_rf_models
+                models = load_rf_models(models_dir) if models_dir else load_rf_models()
+                policies[name] = make_hybrid_policy(*models)
+        except (ImportError, FileNotFoundError) as e:
+            skipped[name] = f"{type(e).__name__}: {e}"
+    return policies, skipped
+
+# ===============================
+# Evaluation
+# ===============================
+def episode_grid(seeds, crops=None, soils=None):
+    """(crops, soils) lists covering every crop x soil pair `seeds` times."""
+    crops = crops or list(CROP_DATA)
+    soils = soils or list(SOIL_DATA)
+    pairs = [(c, s) for c in crops for s in soils] * seeds
+    return [c for c, _ in pairs], [s for _, s in pairs]
+
+def run_policy(policy, crops, soils, days=30, seed=0):
+    """Play one episode per (crop, soil) entry. Returns one row per episode."""
+    env = VecIrrigationEnv(crops, soils, days, seed)
+    with span("policy_eval.episodes"):
+        terminated = False
+        while not terminated:
+            _, _, terminated, _ = env.step(policy(env))
+    return pd.DataFrame({
+        "crop": crops, "soil": soils,
+        "yield": env.G, "water": env.total_water, "fertilizer": env.total_fertilizer,
+        "leaching": env.total_leaching, "return": env.total_reward,
+    })
+
+def compare_policies(policies, seeds=100, days=30, seed=0, crops=None, soils=None):
+    """Episodes for every policy on the same grid and weather, concatenated with a policy column."""
+    crops, soils = episode_grid(seeds, crops, soils)
+    frames = []
+    for name, policy in policies.items():
+        frames.append(run_policy(policy, crops, soils, days, seed).assign(policy=name))
+    return pd.concat(frames, ignore_index=True)
+
+def summarize(episodes, by=None):
+    """Mean and 95% CI half-width per metric, grouped by policy (and `by`)."""
+    keys = ["policy"] + ([by] if by else [])
+    grouped = episodes.groupby(keys, sort=False)[METRICS]
+    mean, sem = grouped.mean(), grouped.sem()
+    return pd.concat({"mean": mean, "ci95": Z_95 * sem}, axis=1).swaplevel(axis=1).reindex(columns=METRICS, level=0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare PPO, rule-based and hybrid policies on IrrigationEnv.")
+    parser.add_argument("--policies", nargs="+", choices=["ppo", "rule", "hybrid"], default=["ppo", "rule", "hybrid"])
+    parser.add_argument("--seeds", type=int, default=100, help="Episodes per crop x soil pair")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--models-dir", help="Directory with the RF .pkl files (hybrid policy)")
+    parser.add_argument("--by", choices=["crop", "soil"], help="Break results down by crop or soil")
+    parser.add_argument("--out", help="Also write per-episode results to this CSV")
+    args = parser.parse_args(argv)
+
+    policies, skipped = build_policies(args.policies, args.models_dir)
+    for name, reason in skipped.items():
+        print(f"skipped {name}: {reason}")
+    if not policies:
+        return
+    started = time.perf_counter()
+    episodes = compare_policies(policies, args.seeds, args.days, args.seed)
+    elapsed = time.perf_counter() - started
+    pd.set_option("display.width", 200)
+    print(summarize(episodes, args.by).round(3).to_string())
+    print(f"\n{len(episodes):,} episodes x {args.days} days in {elapsed:.1f} s")
+    if args.out:
+        episodes.to_csv(args.out, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# app/ppo_sweep.py
+"""
+Hyperparameter and curriculum sweeps for the PPO irrigation agent (CPU only).
+
+    python -m app.ppo_sweep --name lr --learning-rate 3e-4 1e-4 --curriculum flat short_to_long --workers 4
+    python -m app.ppo_sweep --name lr --leaderboard      # rank the runs finished so far
+
+Every grid point is one run in models/sweeps/<name>/<run_id>/:
+    config.json      the run's parameters
+    checkpoint.zip   latest training state, replaced atomically every --checkpoint-every steps
+    model.zip        final model (a drop-in for app/ppo_irrigation_final.zip)
+    result.json      evaluation on policy_eval's episode grid
+
+Re-running the same command resumes the sweep: finished runs are skipped and
+interrupted ones continue from their checkpoint. Runs train in parallel
+processes with one torch thread each. All runs are evaluated on the same
+episodes and weather, so leaderboard differences come from the policies.
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from app.components.irrigation_env import IrrigationEnv
+
+SWEEPS_DIR = Path(__file__).resolve().parent.parent / "models" / "sweeps"
+
+# Curriculum: (episode days, share of the run's timesteps) stages, trained in order
+CURRICULA = {
+    "flat": ((30, 1.0),),
+    "short_to_long": ((10, 0.25), (20, 0.25), (30, 0.5)),
+}
+TIMESTEPS = 100_000
+CHECKPOINT_EVERY = 10_000
+EVAL_SEEDS = 20  # episodes per crop x soil pair
+EVAL_SEED = 12345
+EVAL_DAYS = 30
+
+# ===============================
+# Grid
+# ===============================
+def sweep_grid(learning_rates=(3e-4,), n_steps=(2048,), gammas=(0.99,), ent_coefs=(0.0,),
+               curricula=("flat",), seeds=(0,), timesteps=TIMESTEPS):
+    """One config dict per combination of the given values."""
+    return [
+        {"learning_rate": lr, "n_steps": n, "gamma": g, "ent_coef": ent, "curriculum": cur, "seed": seed,
+         "timesteps": timesteps}
+        for lr, n, g, ent, cur, seed in itertools.product(learning_rates, n_steps, gammas, ent_coefs, curricula, seeds)
+    ]
+
+def run_id(config):
+    return (f"{config['curriculum']}-lr{config['learning_rate']:g}-n{config['n_steps']}"
+            f"-g{config['gamma']:g}-ent{config['ent_coef']:g}-s{config['seed']}")
+
+def _stage(config, done):
+    """(episode days, end timestep) of the curriculum stage containing step `done`."""
+    end = 0.0
+    for days, share in CURRICULA[config["curriculum"]]:
+        end += share * config["timesteps"]
+        if done < end:
+            return days, int(end)
+    return days, config["timesteps"]
+
+# ===============================
+# One run (executes in a worker process)
+# ===============================
+def _write_json(path, data):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+def _save_model(model, path):
+    tmp = path.with_name(path.stem + ".tmp.zip")
+    model.save(tmp)
+    os.replace(tmp, path)
+
+def evaluate(model, seeds=EVAL_SEEDS, days=EVAL_DAYS, seed=EVAL_SEED):
+    """Mean episode metrics on the fixed policy_eval grid, plus a 95% CI on return."""
+    from app.policy_eval import METRICS, Z_95, episode_grid, make_ppo_policy, run_policy
+    crops, soils = episode_grid(seeds)
+    episodes = run_policy(make_ppo_policy(model), crops, soils, days, seed)
+    result = {f"eval_{m}": float(episodes[m].mean()) for m in METRICS}
+    result["eval_return_ci95"] = float(Z_95 * episodes["return"].sem())
+    result["eval_episodes"] = len(episodes)
+    return result
+
+def train_run(run_dir, config, checkpoint_every=CHECKPOINT_EVERY, eval_seeds=EVAL_SEEDS):
+    """Train (or resume) one run to config["timesteps"], evaluate it and write result.json."""
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    import torch
+    from stable_baselines3 import PPO
+    torch.set_num_threads(1)  # one core per run; parallelism comes from the process pool
+
+    run_dir = Path(run_dir)
+    checkpoint = run_dir / "checkpoint.zip"
+    started = time.perf_counter()
+    if checkpoint.exists():
+        model = PPO.load(checkpoint, device="cpu")
+    else:
+        days, _ = _stage(config, 0)
+        model = PPO("MlpPolicy", IrrigationEnv(days=days, seed=config["seed"]), device="cpu", verbose=0,
+                    learning_rate=config["learning_rate"], n_steps=config["n_steps"], gamma=config["gamma"],
+                    ent_coef=config["ent_coef"], seed=config["seed"])
+    resumed_from = model.num_timesteps
+
+    env_days = None
+    while model.num_timesteps < config["timesteps"]:
+        days, stage_end = _stage(config, model.num_timesteps)
+        if days != env_days:
+            model.set_env(IrrigationEnv(days=days, seed=config["seed"] + model.num_timesteps))
+            env_days = days
+        model.learn(min(checkpoint_every, stage_end - model.num_timesteps), reset_num_timesteps=False)
+        _save_model(model, checkpoint)
+    _save_model(model, run_dir / "model.zip")
+
+    result = {"run_id": run_dir.name, **config, **evaluate(model, eval_seeds),
+              "trained_timesteps": model.num_timesteps, "resumed_from": resumed_from,
+              "seconds": time.perf_counter() - started}
+    _write_json(run_dir / "result.json", result)
+    return result
+
+# ===============================
+# Sweep
+# ===============================
+def run_sweep(configs, sweep_dir, workers=None, checkpoint_every=CHECKPOINT_EVERY, eval_seeds=EVAL_SEEDS):
+    """Train every config without a result.json across `workers` processes. Returns the leaderboard."""
+    sweep_dir = Path(sweep_dir)
+    pending = []
+    for config in configs:
+        run_dir = sweep_dir / run_id(config)
+        run_dir.mkdir(parents=True, exist_ok=True)
+        if not (run_dir / "result.json").exists():
+            _write_json(run_dir / "config.json", config)
+            pending.append((run_dir, config))
+    print(f"{len(configs) - len(pending)} of {len(configs)} runs already finished; training {len(pending)}")
+
+    workers = min(workers or os.cpu_count() or 1, len(pending) or 1)
+    if workers == 1:
+        for run_dir, config in pending:
+            _report(run_dir.name, lambda: train_run(run_dir, config, checkpoint_every, eval_seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(train_run, run_dir, config, checkpoint_every, eval_seeds): run_dir.name
+                       for run_dir, config in pending}
+            for future in as_completed(futures):
+                _report(futures[future], future.result)
+    return leaderboard(sweep_dir)
+
+def _report(name, get_result):
+    """Print one run's outcome; a failed run is reported and left to resume on the next invocation."""
+    try:
+        result = get_result()
+    except Exception as e:
+        print(f"  {name}: failed ({type(e).__name__}: {e})")
+        return
+    print(f"  {name}: return {result['eval_return']:.2f} ± {result['eval_return_ci95']:.2f} "
+          f"({result['seconds']:.0f} s)")
+
+def leaderboard(sweep_dir):
+    """Finished runs ranked by mean evaluation return; also written to leaderboard.csv."""
+    sweep_dir = Path(sweep_dir)
+    results = [json.loads(p.read_text()) for p in sorted(sweep_dir.glob("*/result.json"))]
+    board = pd.DataFrame(results)
+    if len(board):
+        board = board.sort_values("eval_return", ascending=False, ignore_index=True)
+        board.to_csv(sweep_dir / "leaderboard.csv", index=False)
+    return board
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train PPO on IrrigationEnv across a parameter grid.")
+    parser.add_argument("--name", default="default", help="Sweep name (directory under models/sweeps)")
+    parser.add_argument("--learning-rate", type=float, nargs="+", default=[3e-4])
+    parser.add_argument("--n-steps", type=int, nargs="+", default=[2048])
+    parser.add_argument("--gamma", type=float, nargs="+", default=[0.99])
+    parser.add_argument("--ent-coef", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--curriculum", nargs="+", choices=list(CURRICULA), default=["flat"])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--timesteps", type=int, default=TIMESTEPS)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--eval-seeds", type=int, default=EVAL_SEEDS, help="Evaluation episodes per crop x soil pair")
+    parser.add_argument("--workers", type=int, help="Concurrent trainings (default: all cores)")
+    parser.add_argument("--leaderboard", action="store_true", help="Only print the leaderboard")
+    args = parser.parse_args(argv)
+
+    sweep_dir = SWEEPS_DIR / args.name
+    if args.leaderboard:
+        board = leaderboard(sweep_dir)
+    else:
+        configs = sweep_grid(args.learning_rate, args.n_steps, args.gamma, args.ent_coef, args.curriculum,
+                             args.seeds, args.timesteps)
+        board = run_sweep(configs, sweep_dir, args.workers, args.checkpoint_every, args.eval_seeds)
+    if len(board) == 0:
+        print("No finished runs.")
+        return
+    columns = ["run_id", "eval_return", "eval_return_ci95", "eval_yield", "eval_water", "eval_fertilizer",
+               "eval_leaching", "seconds"]
+    pd.set_option("display.width", 200)
+    print(board[columns].round(3).to_string(index=False))
+    print(f"\nBest model: {sweep_dir / board['run_id'][0] / 'model.zip'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# app/prediction_log.py
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.recommender import IRRIGATION_FEATURES, FERTILIZER_FEATURES
+from app.instrumentation import span, incr
+
+# Kept out of users.db so analytics writes never contend with logins
+PREDICTIONS_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "predictions.db"
+
+BATCH_SIZE = 200         # rows per INSERT transaction
+FLUSH_INTERVAL = 2.0     # seconds a partial batch may wait
+
+INPUT_COLUMNS = sorted(set(IRRIGATION_FEATURES.values()) | set(FERTILIZER_FEATURES.values()))
+OUTPUT_COLUMNS = [
+    "irrigation_ml", "irrigation_rule", "irrigation_output",
+    "fertilizer_ml", "fertilizer_rule", "fertilizer_output",
+]
+COLUMNS = ["ts", "username"] + INPUT_COLUMNS + OUTPUT_COLUMNS + ["fert_type"]
+INSERT_SQL = f"INSERT INTO prediction_log ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+def get_connection():
+    PREDICTIONS_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(PREDICTIONS_DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def init_db():
+    """One typed column per input/output; ts is indexed for range scans."""
+    numeric = ",\n        ".join(f"{c} REAL" for c in INPUT_COLUMNS + OUTPUT_COLUMNS)
+    conn = get_connection()
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS prediction_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        username TEXT,
+        {numeric},
+        fert_type TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_prediction_log_ts ON prediction_log (ts)")
+    conn.commit()
+    conn.close()
+
+class PredictionLogger:
+    """
+    Buffers prediction records in memory and writes them from a background
+    thread with one executemany per batch, so the request path only pays
+    for a queue put.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.errors = 0
+        self.dropped = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        init_db()
+        self._thread.start()
+
+    def log(self, record):
+        self._queue.put(tuple(record.get(c) for c in COLUMNS))
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def flush(self):
+        """
+        Write everything queued so far. Returns the number of rows written.
+        A batch that finds the database locked goes back on the queue for the
+        next flush; any other failing batch is retried row by row and only
+        the rows that still fail are dropped (counted in `dropped`).
+        """
+        written = 0
+        with self._flush_lock:
+            conn = None
+            try:
+                while True:
+                    rows = self._drain(self.batch_size)
+                    if not rows:
+                        break
+                    try:
+                        conn = conn or get_connection()
+                        with span("db.prediction_log.flush"), conn:
+                            conn.executemany(INSERT_SQL, rows)
+                    except sqlite3.OperationalError as e:  # locked / busy: keep the rows for the next flush
+                        self._error(e)
+                        for row in rows:
+                            self._queue.put(row)
+                        break
+                    except sqlite3.Error as e:
+                        self._error(e)
+                        stored = self._insert_each(conn, rows)
+                        self.dropped += len(rows) - stored
+                        incr("db.prediction_log.dropped", len(rows) - stored)
+                        rows = rows[:stored]
+                    incr("db.prediction_log.rows", len(rows))
+                    written += len(rows)
+            finally:
+                if conn is not None:
+                    conn.close()
+        return written
+
+    @staticmethod
+    def _insert_each(conn, rows):
+        stored = 0
+        for row in rows:
+            try:
+                with conn:
+                    conn.execute(INSERT_SQL, row)
+                stored += 1
+            except sqlite3.Error:
+                pass
+        return stored
+
+    def _error(self, e):
+        self.errors += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+        incr("db.prediction_log.errors")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:  # the writer thread must outlive any one bad batch
+                self._error(e)
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+_logger = None
+_logger_lock = threading.Lock()
+
+def get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = PredictionLogger()
+            atexit.register(_logger.close)
+    return _logger
+
+def log_prediction(username=None, **values):
+    """Queue one recommendation (inputs, ML, rule and final outputs) for batched storage."""
+    get_logger().log({"ts": time.time(), "username": username, **values})
+
+def load_predictions(start=None, end=None, columns=None):
+    """
+    Read logged predictions between two epoch timestamps (inclusive start,
+    exclusive end), projecting only `columns`. Uses the ts index.
+    """
+    columns = columns or COLUMNS
+    where, params = [], []
+    if start is not None:
+        where.append("ts >= ?")
+        params.append(start)
+    if end is not None:
+        where.append("ts < ?")
+        params.append(end)
+    sql = f"SELECT {', '.join(columns)} FROM prediction_log"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    init_db()
+    conn = get_connection()
+    df = pd.read_sql(sql + " ORDER BY ts", conn, params=params)
+    conn.close()
+    return df
@@ -0,0 +1,208 @@
+# app/recommender.py
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from app.instrumentation import span
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+
+# ===============================
+# Inputs & model features
+# ===============================
+STAGE_ORDER = {'Emergence':1,'Vegetative':2,'Flowering':3,'Grainfill':4,'Maturity':5}
+
+# Model feature name -> dashboard input key (order matters: it is the training order)
+IRRIGATION_FEATURES = {
+    'Soil_Moisture_pct_vol':'soil_moisture','Avg_Temp_C':'avg_temp','Rainfall_mm':'rainfall',
+    'ET0_mm':'et0','NDVI':'ndvi','DOY':'doy','Wind_Speed_m_s':'wind','Humidity_%':'humidity'
+}
+FERTILIZER_FEATURES = {
+    'Days_Since_Planting':'days_since_planting','Growth_Stage':'growth_stage_encoded',
+    'Plant_Height_cm':'plant_height','NDVI':'ndvi','LAI':'lai','Organic_Matter_%':'organic_matter',
+    'Soil_pH':'soil_ph','AWC_mm':'awc','Avg_Temp_C':'avg_temp','Rainfall_mm':'rainfall','Humidity_%':'humidity',
+    'Cumulative_N_applied_kg_ha':'cumulative_n','Last_Fertilization_DaysAgo':'last_fert_days',
+    'Soil_Moisture_pct_vol':'soil_moisture','ET0_mm':'et0','Irrigation_mm_applied':'irrigation_applied'
+}
+
+# Dashboard input key -> (min, max), the bounds of the sidebar inputs
+INPUT_RANGES = {
+    'avg_temp':(5.0,40.0), 'rainfall':(0.0,200.0), 'et0':(0.0,10.0), 'humidity':(0.0,100.0),
+    'wind':(0.0,20.0), 'doy':(1,365), 'soil_moisture':(0.0,60.0), 'organic_matter':(0.0,15.0),
+    'soil_ph':(3.0,9.0), 'awc':(20.0,300.0), 'ndvi':(0.0,1.0), 'plant_height':(0.0,300.0),
+    'lai':(0.0,10.0), 'days_since_planting':(0,200), 'cumulative_n':(0.0,300.0),
+    'last_fert_days':(0,200), 'irrigation_applied':(0.0,50.0)
+}
+
+def irrigation_frame(inputs):
+    """Model input frame for the irrigation RF from a DataFrame of dashboard inputs."""
+    return pd.DataFrame({f: inputs[k] for f, k in IRRIGATION_FEATURES.items()})
+
+def fertilizer_frame(inputs):
+    """Model input frame for the fertilizer RF from a DataFrame of dashboard inputs."""
+    return pd.DataFrame({f: inputs[k] for f, k in FERTILIZER_FEATURES.items()})
+
+def load_rf_models(models_dir=MODELS_DIR, variant=None):
+    """
+    Load the irrigation and fertilizer forests (raises FileNotFoundError).
+    `variant` loads a reduced CompactForest build instead (app/compact_forest.py).
+    """
+    models_dir = Path(models_dir)
+    if variant:
+        from app.compact_forest import load_variant
+        return load_variant(models_dir, variant)
+    irrigation_model = joblib.load(models_dir / "irrigation_rf_model.pkl")
+    fertilizer_model = joblib.load(models_dir / "fertilizer_rf_model.pkl")
+    return irrigation_model, fertilizer_model
+
+# ===============================
+# Agronomic Rule Helpers
+# ===============================
+# Element-wise on scalars or arrays: apply_rules() and apply_rules_batch()
+# share these, so the single-field and batched paths cannot drift apart.
+STAGE_SHARES = {1: 0.08, 2: 0.40, 3: 0.35, 4: 0.12, 5: 0.05}  # share of the seasonal N budget
+UNKNOWN_STAGE_SHARE = 0.2
+SEASONAL_N_TOTAL = 150.0
+FERTILIZER_TYPES = {1: "N fertilizer", 2: "N fertilizer", 3: "Balanced NPK"}
+DEFAULT_FERTILIZER_TYPE = "Top-dressing / Maintenance"
+
+def smooth_dryness_factor(soil_moisture_pct, field_capacity_pct=30.0):
+    diff = np.maximum(0.0, field_capacity_pct - soil_moisture_pct)
+    return np.clip(diff / 20.0, 0.0, 1.0)
+
+def et0_scaling_factor(et0, baseline=3.0):
+    factor = 1.0 + (et0 - baseline) * 0.08
+    return np.clip(factor, 0.75, 1.5)
+
+def rainfall_reduction_factor(rainfall_mm, saturation=12.0):
+    factor = 1.0 - (rainfall_mm / saturation)
+    return np.clip(factor, 0.0, 1.0)
+
+def smooth_stage_factor(encoded_stage):
+    x = np.asarray(encoded_stage, dtype=float)
+    factor = np.exp(-((x - 2.5) ** 2) / 2.0)
+    scaled = 0.5 + 0.7 * factor
+    return np.clip(scaled, 0.4, 1.3)
+
+def organic_matter_factor(om_pct):
+    factor = 1.0 - (om_pct / 20.0)
+    return np.clip(factor, 0.5, 1.0)
+
+def ph_penalty_factor(soil_ph, optimal=6.5):
+    penalty = 1.0 + (np.abs(optimal - soil_ph) * 0.05)
+    return np.clip(penalty, 1.0, 1.3)
+
+def cumulative_n_cap_factor(cum_n, soft_threshold=80.0, hard_reduction_start=120.0):
+    span = max(1.0, hard_reduction_start - soft_threshold)
+    reduction = (cum_n - soft_threshold) / (span * 2.0)
+    return np.where(cum_n <= soft_threshold, 1.0, np.clip(1.0 - reduction, 0.12, 1.0))
+
+def stage_share(encoded_stage):
+    """STAGE_SHARES lookup; codes outside 1-5 (or non-integer) get UNKNOWN_STAGE_SHARE."""
+    stage = np.asarray(encoded_stage, dtype=float)
+    if stage.ndim == 0:  # one field: a dict lookup (2.0 == 2) is much cheaper than np.select
+        return STAGE_SHARES.get(float(stage), UNKNOWN_STAGE_SHARE)
+    return np.select([stage == code for code in STAGE_SHARES], list(STAGE_SHARES.values()), UNKNOWN_STAGE_SHARE)
+
+def fertilizer_type(growth_stage_encoded):
+    stage = np.asarray(growth_stage_encoded, dtype=float)
+    if stage.ndim == 0:
+        return FERTILIZER_TYPES.get(float(stage), DEFAULT_FERTILIZER_TYPE)
+    return np.select([stage == code for code in FERTILIZER_TYPES], list(FERTILIZER_TYPES.values()),
+                     DEFAULT_FERTILIZER_TYPE)
+
+def _irrigation_rules(get, stage, irrigation_ml):
+    """(rule baseline, final output) for inputs read through get(key)."""
+    soil_moisture, et0 = get('soil_moisture'), get('et0')
+    dryness = smooth_dryness_factor(soil_moisture)
+    stage_modifier = smooth_stage_factor(stage) / 0.9
+    base_rule = et0 * stage_modifier + dryness * 6.0
+    irrigation_candidate = 0.5 * irrigation_ml + 0.5 * base_rule
+    irrigation_candidate = irrigation_candidate * et0_scaling_factor(et0) * rainfall_reduction_factor(get('rainfall'))
+    irrigation_candidate = irrigation_candidate * np.where(get('avg_temp') > 30, 1.05, 1.0)
+    irrigation_candidate = irrigation_candidate * np.where(get('humidity') < 40, 1.05, 1.0)
+    irrigation_candidate = irrigation_candidate * np.where(
+        (get('irrigation_applied') > 15) & (soil_moisture > 25), 0.6, 1.0)
+    return base_rule, np.clip(irrigation_candidate, 0.0, 30.0)
+
+def _fertilizer_rules(get, stage, fertilizer_ml):
+    """(rule candidate N, final output) for inputs read through get(key)."""
+    vigor = np.clip(get('ndvi') * 1.2 + get('plant_height') / 200.0, 0.3, 1.6)
+    rule_baseline_N = SEASONAL_N_TOTAL * stage_share(stage) * vigor
+    rule_candidate_N = (rule_baseline_N * smooth_stage_factor(stage) * organic_matter_factor(get('organic_matter'))
+                        * ph_penalty_factor(get('soil_ph')) * cumulative_n_cap_factor(get('cumulative_n')))
+    fertilizer_candidate = 0.45 * fertilizer_ml + 0.55 * rule_candidate_N
+    fertilizer_candidate = fertilizer_candidate * np.where(get('last_fert_days') < 7, 0.6, 1.0)
+    return rule_candidate_N, np.clip(fertilizer_candidate, 0.0, 80.0)
+
+# ===============================
+# Hybrid recommendation
+# ===============================
+def recommend(inputs, growth_stage_encoded, irrigation_model, fertilizer_model):
+    """
+    Hybrid ML + agronomic-rule recommendation for one field.
+    `inputs` holds the dashboard input keys. Returns the ML, rule and final
+    values for irrigation (mm) and fertilizer (kg/ha).
+    """
+    with span("recommender.build_frames"):
+        row = pd.DataFrame([{**inputs, 'growth_stage_encoded': growth_stage_encoded}])
+        X_irrigation, X_fertilizer = irrigation_frame(row), fertilizer_frame(row)
+    with span("recommender.rf_predict.irrigation"):
+        irrigation_ml = irrigation_model.predict(X_irrigation)[0]
+    with span("recommender.rf_predict.fertilizer"):
+        fertilizer_ml = fertilizer_model.predict(X_fertilizer)[0]
+    with span("recommender.rules"):
+        return apply_rules(inputs, growth_stage_encoded, irrigation_ml, fertilizer_ml)
+
+def apply_rules(inputs, growth_stage_encoded, irrigation_ml, fertilizer_ml):
+    """Blend the two ML predictions with the agronomic rules."""
+    base_rule, irrigation_output = _irrigation_rules(inputs.__getitem__, growth_stage_encoded, irrigation_ml)
+    rule_candidate_N, fertilizer_output = _fertilizer_rules(inputs.__getitem__, growth_stage_encoded, fertilizer_ml)
+    return {
+        'irrigation_ml': float(irrigation_ml),
+        'irrigation_rule': float(base_rule),
+        'irrigation_output': float(irrigation_output),
+        'fertilizer_ml': float(fertilizer_ml),
+        'fertilizer_rule': float(rule_candidate_N),
+        'fertilizer_output': float(fertilizer_output),
+        'fert_type': fertilizer_type(growth_stage_encoded),
+    }
+
+# ===============================
+# Vectorized (many fields at once)
+# ===============================
+def recommend_batch(inputs, irrigation_model, fertilizer_model):
+    """
+    Vectorized recommend(): `inputs` is a DataFrame with one row per field,
+    holding the dashboard input keys plus growth_stage_encoded. One predict
+    call per model. Returns a DataFrame with the same keys as recommend().
+    """
+    with span("recommender.batch.rf_predict"):
+        irrigation_ml = np.asarray(irrigation_model.predict(irrigation_frame(inputs)), dtype=float)
+        fertilizer_ml = np.asarray(fertilizer_model.predict(fertilizer_frame(inputs)), dtype=float)
+    with span("recommender.batch.rules"):
+        return apply_rules_batch(inputs, irrigation_ml, fertilizer_ml)
+
+def _columns(inputs):
+    return lambda k: inputs[k].to_numpy(dtype=float)
+
+def irrigation_rules_batch(inputs, irrigation_ml):
+    """Irrigation half of apply_rules_batch(): returns (rule baseline, final output) arrays."""
+    col = _columns(inputs)
+    return _irrigation_rules(col, col('growth_stage_encoded'), irrigation_ml)
+
+def apply_rules_batch(inputs, irrigation_ml, fertilizer_ml):
+    """Array version of apply_rules(): the same rule helpers, one row per field."""
+    col = _columns(inputs)
+    stage = col('growth_stage_encoded')
+    base_rule, irrigation_output = _irrigation_rules(col, stage, irrigation_ml)
+    rule_candidate_N, fertilizer_output = _fertilizer_rules(col, stage, fertilizer_ml)
+    return pd.DataFrame({
+        'irrigation_ml': irrigation_ml,
+        'irrigation_rule': base_rule,
+        'irrigation_output': irrigation_output,
+        'fertilizer_ml': fertilizer_ml,
+        'fertilizer_rule': rule_candidate_N,
+        'fertilizer_output': fertilizer_output,
+        'fert_type': fertilizer_type(stage),
+    }, index=inputs.index)
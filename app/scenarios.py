@@ -0,0 +1,89 @@
+# app/scenarios.py
+"""
+Monte Carlo season scenarios for the simulator, fanned out over processes.
+
+    python -m app.scenarios --seasons 20000 --days 120 --workers 4 --seed 7
+
+Seasons are split into fixed-size chunks. Each chunk gets its own Generator
+from SeedSequence(seed).spawn(), so chunks never share random streams and a
+run is reproducible for a given seed and chunk size whatever the worker count.
+Chunks are independent, so throughput scales with the number of cores.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.components.simulator import simulate_step
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+CHUNK_SEASONS = 250  # seasons per task: big enough to amortize pickling, small enough to balance
+SEASON_COLUMNS = ["water_L", "fertilizer_kg", "reward", "final_soil", "final_fert"]
+
+def simulate_season(rng, days=120, init_soil=30.0, init_fert=0.6):
+    """One season of daily simulate_step() calls. Returns the SEASON_COLUMNS values."""
+    soil, fert = init_soil, init_fert
+    water = fertilizer = reward = 0.0
+    for _ in range(days):
+        soil, fert, irrigation, fert_kg, step_reward, _, _ = simulate_step(soil, fert, rng)
+        water += irrigation
+        fertilizer += fert_kg
+        reward += step_reward
+    return water, fertilizer, reward, soil, fert
+
+def _run_chunk(seed_seq, n_seasons, days, init_soil, init_fert):
+    rng = np.random.default_rng(seed_seq)
+    return np.array([simulate_season(rng, days, init_soil, init_fert) for _ in range(n_seasons)])
+
+def run_scenarios(n_seasons, days=120, init_soil=30.0, init_fert=0.6, seed=None, workers=None,
+                  chunk_size=CHUNK_SEASONS):
+    """
+    Simulate `n_seasons` independent seasons across `workers` processes
+    (default: all cores; 1 runs in-process). Returns one row per season.
+    """
+    workers = workers or os.cpu_count() or 1
+    sizes = [min(chunk_size, n_seasons - start) for start in range(0, n_seasons, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(s, n, days, init_soil, init_fert) for s, n in zip(seeds, sizes)]
+    if workers == 1:
+        chunks = [_run_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_chunk, *zip(*args)))
+    return pd.DataFrame(np.concatenate(chunks) if chunks else np.empty((0, len(SEASON_COLUMNS))),
+                        columns=SEASON_COLUMNS)
+
+def summarize(seasons, quantiles=QUANTILES):
+    """Mean and quantiles per season metric (rows) as a DataFrame."""
+    summary = seasons.quantile(list(quantiles)).T
+    summary.columns = [f"p{round(q * 100):02d}" for q in quantiles]
+    summary.insert(0, "mean", seasons.mean())
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo season scenarios for the simulator.")
+    parser.add_argument("--seasons", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--init-soil", type=float, default=30.0)
+    parser.add_argument("--init-fert", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, help="Root seed (default: fresh entropy)")
+    parser.add_argument("--workers", type=int, help="Processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SEASONS)
+    parser.add_argument("--out", help="Also write per-season results to this CSV")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    seasons = run_scenarios(args.seasons, args.days, args.init_soil, args.init_fert, args.seed,
+                            args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(summarize(seasons).round(3).to_string())
+    print(f"\n{len(seasons):,} seasons x {args.days} days in {elapsed:.1f} s "
+          f"({len(seasons) / elapsed:,.0f} seasons/s, {args.workers or os.cpu_count()} worker(s))")
+    if args.out:
+        seasons.to_csv(args.out, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# app/sensor_store.py
+"""
+Persistent time-series store for per-field sensor readings.
+
+Layout (data/sensors.db):
+    readings_YYYYMM   raw readings, one table per UTC month, clustered on
+                      (field_id, metric, ts) so a range read is one index walk
+    rollup_hour       count / sum / min / max per field, metric and hour
+    rollup_day        the same per day (built from the hourly rollup)
+
+ingest() writes a batch in one transaction and refreshes exactly the hour
+and day buckets it touched. query() reads only the months overlapping the
+requested range, and picks raw, hourly or daily resolution from the span.
+Naive timestamps are taken as UTC.
+"""
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import span, incr
+from app.components.downsampling import MAX_POINTS
+
+SENSORS_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "sensors.db"
+
+# Append-only: a metric's position is the id stored on disk
+SENSOR_METRICS = (
+    "soil_moisture", "avg_temp", "rainfall", "et0", "ndvi", "humidity",
+    "wind", "lai", "plant_height", "irrigation_applied", "nutrient_index",
+)
+METRIC_IDS = {m: i for i, m in enumerate(SENSOR_METRICS)}
+
+# simulator history column -> sensor metric
+HISTORY_COLUMNS = {"Soil Moisture": "soil_moisture", "Temp": "avg_temp", "Rain": "rainfall", "Fertilizer": "nutrient_index"}
+
+ROLLUPS = {"hour": 3600, "day": 86400}
+RAW_MAX_SPAN = 2 * 86400  # auto resolution serves raw rows up to this span (s)
+
+def get_connection():
+    SENSORS_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SENSORS_DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def init_db(conn=None):
+    own = conn is None
+    conn = conn or get_connection()
+    for name in ROLLUPS:
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS rollup_{name} (
+            field_id INTEGER NOT NULL,
+            metric INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            total REAL NOT NULL,
+            min REAL NOT NULL,
+            max REAL NOT NULL,
+            PRIMARY KEY (field_id, metric, bucket)
+        ) WITHOUT ROWID
+        """)
+    conn.commit()
+    if own:
+        conn.close()
+
+def _partition_name(month):
+    """numpy datetime64[M] -> readings_YYYYMM"""
+    return "readings_" + str(month).replace("-", "")
+
+def _ensure_partition(conn, name):
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {name} (
+        field_id INTEGER NOT NULL,
+        metric INTEGER NOT NULL,
+        ts REAL NOT NULL,
+        value REAL,
+        PRIMARY KEY (field_id, metric, ts)
+    ) WITHOUT ROWID
+    """)
+
+def _partitions(conn):
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'readings_%'")
+    return sorted(r[0] for r in rows)
+
+def _epoch(value):
+    """Scalar epoch seconds / datetime-like -> epoch seconds."""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts).timestamp()
+
+def _epochs(values):
+    """Vector version of _epoch()."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    dt = pd.to_datetime(values, utc=True)
+    return (dt - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+
+# ===============================
+# Ingest
+# ===============================
+def ingest(readings, conn=None):
+    """
+    Store a batch of long-format readings: a DataFrame with field_id, metric
+    (a SENSOR_METRICS name), ts (epoch seconds or datetimes) and value.
+    Rewriting an existing (field_id, metric, ts) replaces it. Readings with
+    a missing or non-finite ts or value are skipped. Returns rows written.
+    """
+    if len(readings) == 0:
+        return 0
+    unknown = set(readings["metric"].unique()) - set(METRIC_IDS)
+    if unknown:
+        raise ValueError(f"unknown sensor metrics: {sorted(unknown)}")
+    ts = _epochs(readings["ts"])
+    value = readings["value"].to_numpy(dtype=float)
+    keep = np.isfinite(ts) & np.isfinite(value)
+    if not keep.all():
+        incr("sensor_store.skipped", int((~keep).sum()))
+        readings, ts, value = readings[keep], ts[keep], value[keep]
+        if len(readings) == 0:
+            return 0
+    field = readings["field_id"].to_numpy(dtype=np.int64)
+    metric = readings["metric"].map(METRIC_IDS).to_numpy(dtype=np.int64)
+    months = ts.astype("datetime64[s]").astype("datetime64[M]")
+
+    own = conn is None
+    conn = conn or get_connection()
+    with span("sensor_store.ingest"), conn:
+        init_db(conn)
+        for month in np.unique(months):
+            name = _partition_name(month)
+            _ensure_partition(conn, name)
+            rows = months == month
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {name} (field_id, metric, ts, value) VALUES (?, ?, ?, ?)",
+                zip(field[rows].tolist(), metric[rows].tolist(), ts[rows].tolist(), value[rows].tolist()),
+            )
+        _refresh_rollups(conn, field, metric, ts)
+    if own:
+        conn.close()
+    incr("sensor_store.rows", len(readings))
+    return len(readings)
+
+def _touched(field, metric, ts, seconds):
+    """Distinct (field_id, metric, bucket start) rows; hash-based, unlike np.unique(axis=0)."""
+    buckets = (np.floor(ts / seconds) * seconds).astype(np.int64)
+    return pd.DataFrame({"f": field, "m": metric, "b": buckets}).drop_duplicates().to_numpy()
+
+def _refresh_rollups(conn, field, metric, ts):
+    """Recompute the hour and day buckets a batch touched (idempotent under replays)."""
+    hour = ROLLUPS["hour"]
+    touched_hours = _touched(field, metric, ts, hour)
+    bucket_months = touched_hours[:, 2].astype("datetime64[s]").astype("datetime64[M]")
+    for month in np.unique(bucket_months):  # an hour never spans two month partitions
+        rows = touched_hours[bucket_months == month]
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO rollup_hour (field_id, metric, bucket, n, total, min, max)
+            SELECT field_id, metric, :bucket, COUNT(value), SUM(value), MIN(value), MAX(value)
+            FROM {_partition_name(month)}
+            WHERE field_id = :field AND metric = :metric AND ts >= :bucket AND ts < :bucket + {hour}
+                AND value IS NOT NULL
+            GROUP BY field_id, metric
+        """, ({"field": int(f), "metric": int(m), "bucket": int(b)} for f, m, b in rows))
+
+    day = ROLLUPS["day"]
+    conn.executemany(f"""
+        INSERT OR REPLACE INTO rollup_day (field_id, metric, bucket, n, total, min, max)
+        SELECT field_id, metric, :bucket, SUM(n), SUM(total), MIN(min), MAX(max)
+        FROM rollup_hour
+        WHERE field_id = :field AND metric = :metric AND bucket >= :bucket AND bucket < :bucket + {day}
+        GROUP BY field_id, metric
+    """, ({"field": int(f), "metric": int(m), "bucket": int(b)} for f, m, b in _touched(field, metric, ts, day)))
+
+def ingest_wide(df, field_id=None, time_col="ts", columns=None, conn=None):
+    """
+    Ingest a wide frame (one column per metric). `columns` maps frame
+    columns to metric names (default: columns already named after metrics).
+    `field_id` overrides a field_id column.
+    """
+    columns = columns or {c: c for c in df.columns if c in METRIC_IDS}
+    id_vars = [time_col] + ([] if field_id is not None else ["field_id"])
+    long = df[id_vars + list(columns)].rename(columns={**columns, time_col: "ts"}).melt(
+        id_vars=["ts"] + id_vars[1:], var_name="metric", value_name="value")
+    if field_id is not None:
+        long["field_id"] = field_id
+    return ingest(long.dropna(subset=["value"]), conn)
+
+def ingest_history(field_id, history, conn=None):
+    """Persist a simulator history frame (Time, Soil Moisture, Temp, ...) for one field."""
+    columns = {c: m for c, m in HISTORY_COLUMNS.items() if c in history.columns}
+    return ingest_wide(history, field_id, time_col="Time", columns=columns, conn=conn)
+
+# ===============================
+# Query
+# ===============================
+def pick_resolution(start, end, max_points=MAX_POINTS):
+    """Finest resolution whose point count for [start, end) stays within max_points."""
+    span_s = end - start
+    if span_s <= RAW_MAX_SPAN:
+        return "raw"
+    if span_s / ROLLUPS["hour"] <= max_points:
+        return "hour"
+    return "day"
+
+def query(field_id, metrics=None, start=None, end=None, resolution="auto", max_points=MAX_POINTS, conn=None):
+    """
+    Readings for one field in [start, end) as a long frame with Time, metric
+    and value. Rollup resolutions use the bucket mean as value and add
+    min, max and n. Defaults to the last 7 days of all metrics.
+    attrs["resolution"] records what was served.
+    """
+    end = _epoch(end) if end is not None else time.time()
+    start = _epoch(start) if start is not None else end - 7 * 86400
+    metrics = list(metrics or SENSOR_METRICS)
+    ids = [METRIC_IDS[m] for m in metrics]
+    if resolution == "auto":
+        resolution = pick_resolution(start, end, max_points)
+
+    marks = ", ".join("?" * len(ids))
+    own = conn is None
+    conn = conn or get_connection()
+    with span(f"sensor_store.query.{resolution}"):
+        init_db(conn)
+        if resolution == "raw":
+            months = np.arange(np.datetime64(int(start), "s").astype("datetime64[M]"),
+                               np.datetime64(int(end), "s").astype("datetime64[M]") + 1)
+            wanted = set(_partition_name(m) for m in months) & set(_partitions(conn))
+            selects = [f"SELECT metric, ts, value FROM {name} WHERE field_id = ? AND metric IN ({marks}) "
+                       f"AND ts >= ? AND ts < ?" for name in sorted(wanted)]
+            params = [p for _ in selects for p in (field_id, *ids, start, end)]
+            sql = " UNION ALL ".join(selects) + " ORDER BY ts" if selects else None
+        else:
+            sql = (f"SELECT metric, bucket AS ts, total / n AS value, min, max, n FROM rollup_{resolution} "
+                   f"WHERE field_id = ? AND metric IN ({marks}) AND bucket >= ? AND bucket < ? ORDER BY bucket")
+            params = [field_id, *ids, np.floor(start / ROLLUPS[resolution]) * ROLLUPS[resolution], end]
+        columns = ["metric", "ts", "value"] + ([] if resolution == "raw" else ["min", "max", "n"])
+        df = pd.read_sql(sql, conn, params=params) if sql else pd.DataFrame(columns=columns)
+    if own:
+        conn.close()
+
+    df.insert(0, "Time", pd.to_datetime(df.pop("ts").astype(float), unit="s"))
+    df["metric"] = np.asarray(SENSOR_METRICS, dtype=object)[df["metric"].to_numpy(dtype=np.int64)]
+    df.attrs["resolution"] = resolution
+    return df
+
+def drop_partitions_before(ts, conn=None):
+    """Retention: drop whole raw months that end before `ts` (rollups are kept). Returns dropped tables."""
+    cutoff = _partition_name(np.datetime64(int(_epoch(ts)), "s").astype("datetime64[M]"))
+    own = conn is None
+    conn = conn or get_connection()
+    dropped = [name for name in _partitions(conn) if name < cutoff]
+    with conn:
+        for name in dropped:
+            conn.execute(f"DROP TABLE {name}")
+    if own:
+        conn.close()
+    return dropped
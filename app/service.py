@@ -0,0 +1,250 @@
+# app/service.py
+"""
+Headless recommendation HTTP service (stdlib only).
+
+    python -m app.service --port 8600 --workers 4
+
+Endpoints:
+    GET  /health      -> {"status": "ok", ...}
+    POST /recommend   -> hybrid RF + rules; body is one field or {"fields": [...]}
+    POST /ppo         -> PPO policy action; body is one observation or {"observations": [...]}
+
+Concurrent requests are coalesced by a MicroBatcher into one vectorized
+prediction per time window. --workers forks pre-loaded worker processes
+that share the listening socket.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from app.batching import MicroBatcher
+from app.instrumentation import span
+from app.model_registry import watch, ModelProxy
+from app.recommender import (
+    MODELS_DIR, STAGE_ORDER, IRRIGATION_FEATURES, FERTILIZER_FEATURES, load_rf_models, recommend_batch,
+)
+
+INPUT_KEYS = sorted((set(IRRIGATION_FEATURES.values()) | set(FERTILIZER_FEATURES.values())) - {"growth_stage_encoded"})
+REQUEST_TIMEOUT = 10.0  # seconds a request may wait for its batch
+
+OBSERVATION_KEYS = ("soil_moisture", "temperature", "rain")
+
+class BadRequest(ValueError):
+    pass
+
+class ServiceUnavailable(Exception):
+    pass
+
+def _number(value, key):
+    """float(value), or BadRequest for anything that is not a finite number."""
+    try:
+        number = float(value) if not isinstance(value, (bool, str)) else None
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not math.isfinite(number):
+        raise BadRequest(f"{key} must be a finite number")
+    return number
+
+def parse_field(field):
+    """Validate one field payload into a flat input row."""
+    if not isinstance(field, dict):
+        raise BadRequest("each field must be a JSON object")
+    missing = [k for k in INPUT_KEYS if k not in field]
+    if missing:
+        raise BadRequest(f"missing inputs: {', '.join(missing)}")
+    row = {k: _number(field[k], k) for k in INPUT_KEYS}
+    if "growth_stage_encoded" in field:
+        stage = _number(field["growth_stage_encoded"], "growth_stage_encoded")
+        if stage not in STAGE_ORDER.values():
+            raise BadRequest(f"growth_stage_encoded must be one of {sorted(STAGE_ORDER.values())}")
+        row["growth_stage_encoded"] = int(stage)
+    elif field.get("growth_stage") in STAGE_ORDER:
+        row["growth_stage_encoded"] = STAGE_ORDER[field["growth_stage"]]
+    else:
+        raise BadRequest(f"growth_stage must be one of {list(STAGE_ORDER)}")
+    return row
+
+def parse_observation(obs):
+    """Validate one PPO observation (see model_runner.predict_daily_action)."""
+    from app.components.irrigation_env import CROP_DATA, SOIL_DATA
+    if not isinstance(obs, dict):
+        raise BadRequest("each observation must be a JSON object")
+    missing = [k for k in ("crop", "soil", *OBSERVATION_KEYS, "nutrients") if k not in obs]
+    if missing:
+        raise BadRequest(f"missing inputs: {', '.join(missing)}")
+    if obs["crop"] not in CROP_DATA:
+        raise BadRequest(f"crop must be one of {list(CROP_DATA)}")
+    if obs["soil"] not in SOIL_DATA:
+        raise BadRequest(f"soil must be one of {list(SOIL_DATA)}")
+    nutrients = obs["nutrients"]
+    if not isinstance(nutrients, list) or len(nutrients) != 3:
+        raise BadRequest("nutrients must be a list of [N, P, K]")
+    return {"crop": obs["crop"], "soil": obs["soil"], **{k: _number(obs[k], k) for k in OBSERVATION_KEYS},
+            "nutrients": [_number(v, f"nutrients[{i}]") for i, v in enumerate(nutrients)]}
+
+class RecommendationService:
+    """Owns the models and the batchers for one worker process."""
+
+    def __init__(self, irrigation_model, fertilizer_model, max_batch=64, max_wait_ms=5.0, enable_ppo=True):
+        self.irrigation_model = irrigation_model
+        self.fertilizer_model = fertilizer_model
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.enable_ppo = enable_ppo
+        self.recommend_batcher = None
+        self.ppo_batcher = None
+
+    def start(self):
+        """Start batcher threads (call in the process that serves requests)."""
+        self.recommend_batcher = MicroBatcher(self._recommend_rows, self.max_batch, self.max_wait_ms,
+                                              name="recommend-batcher")
+        if self.enable_ppo:
+            self.ppo_batcher = MicroBatcher(self._ppo_rows, self.max_batch, self.max_wait_ms, name="ppo-batcher")
+        return self
+
+    def _recommend_rows(self, rows):
+        with span("service.recommend_batch"):
+            out = recommend_batch(pd.DataFrame(rows), self.irrigation_model, self.fertilizer_model)
+        return out.to_dict("records")
+
+    def _ppo_rows(self, observations):
+        from app.components.model_runner import predict_daily_actions
+        with span("service.ppo_batch"):
+            actions = predict_daily_actions(observations)
+        return [{"irrigation": float(a[0]), "fertilizer": float(a[1])} for a in actions]
+
+    def recommend(self, fields):
+        rows = [parse_field(f) for f in fields]  # validate every field before any is queued
+        futures = [self.recommend_batcher.submit(row) for row in rows]
+        return [f.result(REQUEST_TIMEOUT) for f in futures]
+
+    def ppo(self, observations):
+        if self.ppo_batcher is None:
+            raise ServiceUnavailable("PPO endpoint disabled")
+        parsed = [parse_observation(obs) for obs in observations]
+        futures = [self.ppo_batcher.submit(obs) for obs in parsed]
+        return [f.result(REQUEST_TIMEOUT) for f in futures]
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", "pid": os.getpid(), "ppo": service.ppo_batcher is not None})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                self._send(400, {"error": "invalid JSON"})
+                return
+            if not isinstance(body, dict):
+                self._send(400, {"error": "body must be a JSON object"})
+                return
+            try:
+                if self.path == "/recommend":
+                    fields = body.get("fields", [body])
+                    if not isinstance(fields, list):
+                        raise BadRequest("fields must be a list")
+                    results = service.recommend(fields)
+                    self._send(200, {"results": results} if "fields" in body else results[0])
+                elif self.path == "/ppo":
+                    observations = body.get("observations", [body])
+                    if not isinstance(observations, list):
+                        raise BadRequest("observations must be a list")
+                    results = service.ppo(observations)
+                    self._send(200, {"results": results} if "observations" in body else results[0])
+                else:
+                    self._send(404, {"error": "not found"})
+            except BadRequest as e:
+                self._send(400, {"error": str(e)})
+            except (ServiceUnavailable, ImportError, FileNotFoundError) as e:
+                self._send(503, {"error": f"unavailable: {e}"})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, format, *args):
+            pass  # keep the hot path quiet; use instrumentation for timings
+
+    return Handler
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 256  # the default backlog of 5 drops connections under load
+    daemon_threads = True
+
+def make_server(service, host="127.0.0.1", port=8600, sock=None):
+    """HTTP server for `service`; pass `sock` to serve on an already-bound socket."""
+    handler = make_handler(service)
+    if sock is None:
+        return _Server((host, port), handler)
+    server = _Server(sock.getsockname()[:2], handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    return server
+
+def _serve_worker(service, sock):
+    service.start()
+    make_server(service, sock=sock).serve_forever()
+
+def serve(host="127.0.0.1", port=8600, workers=1, max_batch=64, max_wait_ms=5.0, models_dir=None, enable_ppo=True):
+    if models_dir:  # pinned to these files
+        irrigation_model, fertilizer_model = load_rf_models(models_dir)
+    else:  # registry's active version, swapped in place when a new one is activated
+        rf = watch("rf", load_rf_models, legacy_dir=MODELS_DIR)
+        irrigation_model, fertilizer_model = ModelProxy(rf, 0), ModelProxy(rf, 1)
+    service = RecommendationService(irrigation_model, fertilizer_model, max_batch, max_wait_ms, enable_ppo)
+    if workers <= 1:
+        server = make_server(service.start(), host, port)
+        print(f"Serving on http://{host}:{port} (1 process)")
+        server.serve_forever()
+        return
+
+    # Pre-fork: bind once, load models once (shared copy-on-write), then fork workers
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128 * workers)
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_serve_worker, args=(service, sock), daemon=True) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    print(f"Serving on http://{host}:{port} ({workers} worker processes)")
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Agrisense recommendation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (fork, POSIX only)")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Coalescing window per batch")
+    parser.add_argument("--models-dir", help="Directory with the RF .pkl files (default: model registry)")
+    parser.add_argument("--no-ppo", action="store_true", help="Disable the /ppo endpoint")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.max_batch, args.max_wait_ms, args.models_dir, not args.no_ppo)
+
+if __name__ == "__main__":
+    main()
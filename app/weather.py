@@ -0,0 +1,229 @@
+# app/weather.py
+"""
+Daily weather forecasts, FAO-56 reference evapotranspiration and week-ahead plans.
+
+    python -m app.weather sample --lat 41.88 --lon -93.10    # write a stand-in forecast file
+    python -m app.weather show --lat 41.88 --lon -93.10 --days 7
+
+Forecasts come from a WeatherSource (SOURCES; LocalFileSource reads CSV
+files and stands in for a forecast API). Parsed forecasts are cached on disk
+per source, location (2 decimals, ~1 km) and start date under
+data/weather_cache, so a location is fetched at most once a day. ET0 is
+computed with the Penman-Monteith equation on whole arrays, so any number of
+days and locations cost one pass. weekly_plan() scores every forecast day in
+one recommend_batch() call.
+"""
+import argparse
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import span, incr
+from app.recommender import INPUT_RANGES, recommend_batch
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FORECAST_DIR = BASE_DIR / "data" / "forecasts"
+CACHE_DIR = BASE_DIR / "data" / "weather_cache"
+
+# One row per day; solar_rad (MJ/m²/day) may be blank: ET0 then estimates it from the temperature range
+FORECAST_COLUMNS = ["date", "t_min", "t_max", "rh_mean", "wind_10m", "solar_rad", "rainfall"]
+FORECAST_DAYS = 7
+
+def location_key(lat, lon):
+    return f"{lat:.2f}_{lon:.2f}"
+
+# ===============================
+# Sources
+# ===============================
+class WeatherSource:
+    """Daily forecasts for a location; subclasses implement fetch()."""
+    name = "base"
+
+    def fetch(self, lat, lon, start, days):
+        """FORECAST_COLUMNS frame for `days` days from `start` (raises FileNotFoundError if unavailable)."""
+        raise NotImplementedError
+
+class LocalFileSource(WeatherSource):
+    """Forecast CSVs in a directory, one per location: <lat>_<lon>.csv with FORECAST_COLUMNS."""
+    name = "local"
+
+    def __init__(self, directory=FORECAST_DIR):
+        self.directory = Path(directory)
+
+    def fetch(self, lat, lon, start, days):
+        path = self.directory / f"{location_key(lat, lon)}.csv"
+        if not path.exists():
+            raise FileNotFoundError(f"no forecast file for {location_key(lat, lon)} in {self.directory}")
+        df = pd.read_csv(path, parse_dates=["date"])
+        missing = set(FORECAST_COLUMNS) - set(df.columns) - {"solar_rad"}
+        if missing:
+            raise ValueError(f"{path.name} is missing columns: {sorted(missing)}")
+        window = (df["date"] >= pd.Timestamp(start)) & (df["date"] < pd.Timestamp(start) + pd.Timedelta(days=days))
+        return df.loc[window].reindex(columns=FORECAST_COLUMNS).sort_values("date", ignore_index=True)
+
+SOURCES = {"local": LocalFileSource}
+
+def get_source(name="local", **options):
+    return SOURCES[name](**options)
+
+def write_sample_forecast(lat, lon, start=None, days=14, directory=FORECAST_DIR, seed=None):
+    """Plausible synthetic forecast file for LocalFileSource (testing and demos). Returns its path."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start or date.today(), periods=days, freq="D")
+    season = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 200) / 365)  # 1 in mid July
+    t_max = 22 + 8 * season + rng.normal(0, 2.5, days)
+    wet = rng.random(days) < 0.3
+    df = pd.DataFrame({
+        "date": dates.date,
+        "t_min": t_max - rng.uniform(7, 13, days),
+        "t_max": t_max,
+        "rh_mean": np.clip(rng.normal(65, 10, days) + 15 * wet, 20, 100),
+        "wind_10m": rng.gamma(4, 0.8, days),
+        "solar_rad": np.clip(rng.normal(20 + 6 * season, 3, days) * np.where(wet, 0.6, 1.0), 2, 32),
+        "rainfall": np.where(wet, rng.gamma(1.5, 6, days), 0.0),
+    }).round(2)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{location_key(lat, lon)}.csv"
+    df.to_csv(path, index=False)
+    return path
+
+# ===============================
+# Cache
+# ===============================
+def forecast(lat, lon, start=None, days=FORECAST_DAYS, source=None, elevation=0.0, cache_dir=CACHE_DIR):
+    """
+    Daily forecast for a location with wind_2m and et0 (mm/day) added.
+    The parsed source data is cached per source, location and start date;
+    a short window (the source does not cover every day yet) is returned
+    but not cached, so the next call fetches again.
+    """
+    source = source or LocalFileSource()
+    start = pd.Timestamp(start or date.today()).date()
+    path = Path(cache_dir) / source.name / location_key(lat, lon) / f"{start.isoformat()}_{days}d.csv"
+    if path.exists():
+        incr("weather.cache_hits")
+        raw = pd.read_csv(path, parse_dates=["date"])
+    else:
+        incr("weather.cache_misses")
+        with span(f"weather.fetch.{source.name}"):
+            raw = source.fetch(lat, lon, start, days)
+        if len(raw) == days:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            raw.to_csv(tmp, index=False)
+            os.replace(tmp, path)
+    return with_et0(raw, lat, elevation)
+
+# ===============================
+# ET0 (FAO-56 Penman-Monteith)
+# ===============================
+def _saturation_vp(t):
+    return 0.6108 * np.exp(17.27 * t / (t + 237.3))
+
+def wind_at_2m(wind, height=10.0):
+    """Log wind profile: speed measured at `height` m -> 2 m."""
+    return wind * 4.87 / np.log(67.8 * height - 5.42)
+
+def extraterrestrial_radiation(lat, doy):
+    """Ra (MJ/m²/day) for latitude (degrees) and day of year, element-wise."""
+    phi = np.radians(lat)
+    angle = 2 * np.pi * np.asarray(doy) / 365
+    dr = 1 + 0.033 * np.cos(angle)
+    delta = 0.409 * np.sin(angle - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1, 1))
+    return 24 * 60 / np.pi * 0.0820 * dr * (ws * np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.sin(ws))
+
+def et0_penman_monteith(t_min, t_max, rh_mean, wind_2m, solar_rad, lat, doy, elevation=0.0):
+    """
+    Daily grass reference ET0 (mm/day), FAO-56 eq. 6, on arrays of any
+    matching shape. NaN solar_rad falls back to the Hargreaves estimate
+    0.16 * sqrt(t_max - t_min) * Ra. Soil heat flux is taken as 0.
+    """
+    t_min, t_max = np.asarray(t_min, dtype=float), np.asarray(t_max, dtype=float)
+    t_mean = (t_min + t_max) / 2
+    delta = 4098 * _saturation_vp(t_mean) / (t_mean + 237.3) ** 2
+    pressure = 101.3 * ((293 - 0.0065 * elevation) / 293) ** 5.26
+    gamma = 0.000665 * pressure
+    es = (_saturation_vp(t_max) + _saturation_vp(t_min)) / 2
+    ea = np.asarray(rh_mean, dtype=float) / 100 * es
+
+    ra = extraterrestrial_radiation(lat, doy)
+    rs = np.asarray(solar_rad, dtype=float)
+    rs = np.where(np.isnan(rs), 0.16 * np.sqrt(np.maximum(t_max - t_min, 0)) * ra, rs)
+    rso = (0.75 + 2e-5 * elevation) * ra
+    rnl = (4.903e-9 * ((t_max + 273.16) ** 4 + (t_min + 273.16) ** 4) / 2
+           * (0.34 - 0.14 * np.sqrt(ea)) * (1.35 * np.minimum(rs / np.maximum(rso, 1e-9), 1.0) - 0.35))
+    rn = 0.77 * rs - rnl
+
+    u2 = np.asarray(wind_2m, dtype=float)
+    et0 = (0.408 * delta * rn + gamma * 900 / (t_mean + 273) * u2 * (es - ea)) / (delta + gamma * (1 + 0.34 * u2))
+    return np.maximum(et0, 0.0)
+
+def with_et0(forecast_df, lat, elevation=0.0):
+    """Forecast frame plus wind_2m and et0 columns."""
+    df = forecast_df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df["wind_2m"] = wind_at_2m(df["wind_10m"].to_numpy(dtype=float))
+    with span("weather.et0"):
+        df["et0"] = et0_penman_monteith(df["t_min"], df["t_max"], df["rh_mean"], df["wind_2m"],
+                                        df["solar_rad"], lat, df["date"].dt.dayofyear.to_numpy(), elevation)
+    return df
+
+# ===============================
+# Week-ahead recommendations
+# ===============================
+def forecast_inputs(base_inputs, growth_stage_encoded, forecast_df):
+    """
+    One row of dashboard inputs per forecast day: weather keys from the
+    forecast, field readings held at `base_inputs`, day counters advanced.
+    """
+    n = len(forecast_df)
+    df = pd.DataFrame({k: np.full(n, v) for k, v in base_inputs.items()})
+    df["avg_temp"] = ((forecast_df["t_min"] + forecast_df["t_max"]) / 2).to_numpy()
+    df["rainfall"] = forecast_df["rainfall"].fillna(0.0).to_numpy()
+    df["et0"] = forecast_df["et0"].to_numpy()
+    df["humidity"] = forecast_df["rh_mean"].to_numpy()
+    df["wind"] = forecast_df["wind_2m"].to_numpy()
+    df["doy"] = forecast_df["date"].dt.dayofyear.to_numpy()
+    df["days_since_planting"] = df["days_since_planting"] + np.arange(n)
+    df["last_fert_days"] = df["last_fert_days"] + np.arange(n)
+    for k, (lo, hi) in INPUT_RANGES.items():
+        df[k] = df[k].clip(lo, hi)
+    df["growth_stage_encoded"] = growth_stage_encoded
+    return df
+
+def weekly_plan(base_inputs, growth_stage_encoded, forecast_df, irrigation_model, fertilizer_model):
+    """Recommendations for every forecast day in one batched call, with date and weather columns."""
+    inputs = forecast_inputs(base_inputs, growth_stage_encoded, forecast_df)
+    with span("weather.weekly_plan"):
+        plan = recommend_batch(inputs, irrigation_model, fertilizer_model)
+    plan.insert(0, "date", forecast_df["date"].to_numpy())
+    for k in ("et0", "rainfall", "avg_temp"):
+        plan[k] = inputs[k].to_numpy()
+    return plan
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Weather forecasts and ET0 for a location.")
+    parser.add_argument("command", choices=["show", "sample"])
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--elevation", type=float, default=0.0, help="Metres above sea level")
+    parser.add_argument("--start", help="First day (YYYY-MM-DD, default: today)")
+    parser.add_argument("--days", type=int, default=FORECAST_DAYS)
+    parser.add_argument("--forecast-dir", default=str(FORECAST_DIR), help="LocalFileSource directory")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "sample":
+        path = write_sample_forecast(args.lat, args.lon, args.start, max(args.days, 14), args.forecast_dir, args.seed)
+        print(f"Wrote {path}")
+        return
+    df = forecast(args.lat, args.lon, args.start, args.days, LocalFileSource(args.forecast_dir), args.elevation)
+    print(df.round(2).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
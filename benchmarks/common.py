@@ -0,0 +1,60 @@
+# benchmarks/common.py
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "app"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+def result(value, unit, higher_is_better=False, **extra):
+    """One benchmark measurement in the shared JSON format."""
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better, **extra}
+
+def save_results(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+
+def load_results(path):
+    return json.loads(Path(path).read_text())["results"]
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Compare two result dicts. Returns a list of (name, baseline, current,
+    change) for every benchmark that got worse by more than `tolerance`.
+    """
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = -change if cur.get("higher_is_better") else change
+        if worse > tolerance:
+            regressions.append((name, base["value"], cur["value"], change))
+    return regressions
+
+def report(current, baseline=None, tolerance=0.2):
+    """Print results (and the baseline delta when given). Returns the exit code."""
+    for name, cur in current.items():
+        line = f"{name:<40} {cur['value']:>14,.2f} {cur['unit']}"
+        if baseline and name in baseline and baseline[name]["value"]:
+            change = (cur["value"] - baseline[name]["value"]) / baseline[name]["value"]
+            line += f"   ({change:+.1%} vs baseline)"
+        print(line)
+    if baseline is None:
+        return 0
+    regressions = compare(current, baseline, tolerance)
+    for name, base, cur, change in regressions:
+        print(f"REGRESSION {name}: {base:,.2f} -> {cur:,.2f} ({change:+.1%})")
+    return 1 if regressions else 0
@@ -0,0 +1,113 @@
+# benchmarks/load_test.py
+"""
+Closed-loop load test for the recommendation HTTP service (app/service.py).
+
+    python benchmarks/load_test.py --url http://127.0.0.1:8600 --clients 32 --seconds 10
+    python benchmarks/load_test.py --local --clients 32     # in-process server, no setup needed
+
+Each client thread sends one single-field /recommend request at a time;
+the report shows throughput, latency percentiles and (with --local) the
+batch sizes the micro-batcher achieved.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+
+from common import ROOT, RESULTS_DIR, result, save_results, load_results, report
+
+sys.path[:0] = [str(ROOT)]
+
+def _payload():
+    from suite import SAMPLE_INPUTS
+    return json.dumps({**SAMPLE_INPUTS, "growth_stage": "Vegetative"}).encode("utf-8")
+
+def run_clients(url, clients, seconds):
+    body = _payload()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client():
+        local = []
+        while time.perf_counter() < stop_at:
+            req = urllib.request.Request(url + "/recommend", data=body,
+                                         headers={"Content-Type": "application/json"})
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    resp.read()
+                local.append(time.perf_counter() - t0)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return latencies, errors[0], elapsed
+
+def start_local_server(max_batch, max_wait_ms):
+    from suite import _rf_models
+    from app.service import RecommendationService, make_server
+    irrigation_model, fertilizer_model, _ = _rf_models()
+    service = RecommendationService(irrigation_model, fertilizer_model, max_batch, max_wait_ms,
+                                    enable_ppo=False).start()
+    server = make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--local", action="store_true", help="Start an in-process server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--save", default=str(RESULTS_DIR / "load_test.json"))
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if args.local:
+        url, server = start_local_server(args.max_batch, args.max_wait_ms)
+
+    latencies, errors, elapsed = run_clients(url, args.clients, args.seconds)
+    if server is not None:
+        server.shutdown()
+    if not latencies:
+        print(f"No successful requests ({errors} errors)")
+        return 1
+
+    lat_ms = sorted(l * 1000.0 for l in latencies)
+    pct = lambda q: lat_ms[min(len(lat_ms) - 1, int(q * len(lat_ms)))]
+    results = {
+        "service.throughput": result(len(latencies) / elapsed, "req/s", True, clients=args.clients, errors=errors),
+        "service.latency_p50": result(statistics.median(lat_ms), "ms"),
+        "service.latency_p95": result(pct(0.95), "ms"),
+        "service.latency_p99": result(pct(0.99), "ms"),
+    }
+    if args.local:
+        from app import instrumentation
+        batch = instrumentation.snapshot()["spans"].get("service.recommend_batch")
+        if batch:
+            results["service.mean_batch_size"] = result(len(latencies) / batch["count"], "rows", True)
+
+    save_results(args.save, results)
+    baseline = load_results(args.baseline) if args.baseline else None
+    return report(results, baseline, args.tolerance)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# benchmarks/startup.py
+"""
+Cold-start import cost of each page route in app/main.py.
+
+Each route is imported in a fresh interpreter with `-X importtime`, and the
+per-package breakdown is kept in the results so a regression shows which
+import caused it.
+
+    python benchmarks/startup.py --save benchmarks/results/startup.json
+    python benchmarks/startup.py --baseline benchmarks/results/startup.json
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from common import ROOT, APP_DIR, RESULTS_DIR, result, save_results, load_results, report
+
+# Route -> code run in the child interpreter ("auth" is main.py itself)
+ROUTES = {
+    "auth": "import main",
+    "landing": "import main; main.load_page('landing')",
+    "farmer": "import main; main.load_page('farmer')",
+    "admin": "import main; main.load_page('admin')",
+}
+
+def _parse_importtime(stderr):
+    """Return (total_us, {top_level_package: self_us}) from -X importtime output."""
+    per_package = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        self_us = int(self_us)
+        per_package[name.strip().split(".")[0]] += self_us
+        total += self_us
+    return total, dict(per_package)
+
+def measure_route(code, repeats=3, top=8):
+    prelude = f"import sys; sys.path[:0] = [{str(APP_DIR)!r}, {str(ROOT)!r}]; "
+    totals, breakdowns = [], []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", prelude + code],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        total, per_package = _parse_importtime(proc.stderr)
+        totals.append(total)
+        breakdowns.append(per_package)
+    median_index = totals.index(sorted(totals)[len(totals) // 2])
+    breakdown = sorted(breakdowns[median_index].items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return statistics.median(totals) / 1000.0, {name: us / 1000.0 for name, us in breakdown}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", nargs="*", default=list(ROUTES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--save", default=str(RESULTS_DIR / "startup.json"))
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for route in args.routes:
+        import_ms, breakdown = measure_route(ROUTES[route], args.repeats)
+        results[f"startup.{route}"] = result(import_ms, "ms", top_packages_ms=breakdown)
+        print(f"{route}: " + ", ".join(f"{k} {v:.0f} ms" for k, v in breakdown.items()))
+
+    save_results(args.save, results)
+    baseline = load_results(args.baseline) if args.baseline else None
+    return report(results, baseline, args.tolerance)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# benchmarks/suite.py
+"""
+End-to-end CPU benchmarks for the environment, inference, rules, DB and ingest paths.
+
+    python benchmarks/suite.py                       # run all, save results JSON
+    python benchmarks/suite.py --only env rules      # subset
+    python benchmarks/suite.py --baseline benchmarks/results/suite.json
+
+Benchmarks whose dependencies or artifacts are missing are reported as
+skipped instead of failing the run.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT, RESULTS_DIR, result, save_results, load_results, report
+
+sys.path[:0] = [str(ROOT)]
+
+MODELS_DIR = ROOT / "models"
+
+class Skip(Exception):
+    pass
+
+def throughput(fn, min_time=1.0, min_calls=5):
+    """Call fn repeatedly for at least min_time seconds. Returns calls per second."""
+    fn()  # warm-up
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and calls >= min_calls:
+            return calls / elapsed
+
+# ===============================
+# Benchmarks
+# ===============================
+def bench_env(min_time):
+    try:
+        from app.components.irrigation_env import IrrigationEnv
+    except ImportError as e:
+        raise Skip(e)
+    env = IrrigationEnv(days=30, seed=0)
+    action = env.action_space.sample()
+
+    def step():
+        _, _, terminated, _, _ = env.step(action)
+        if terminated:
+            env.reset()
+    return {"env.step": result(throughput(step, min_time), "steps/s", True)}
+
+def bench_model_runner(min_time, batch_size=256):
+    try:
+        from app.components import model_runner
+        model_runner.get_model()
+    except Exception as e:
+        raise Skip(f"PPO model unavailable: {e}")
+    obs = {"crop": "maize", "soil": "loamy", "soil_moisture": 35.0,
+           "temperature": 24.0, "rain": 2.0, "nutrients": [0.5, 0.4, 0.3]}
+    batch = [obs] * batch_size
+    batch_rate = throughput(lambda: model_runner.predict_daily_actions(batch), min_time)
+    return {
+        "model_runner.single": result(throughput(lambda: model_runner.predict_daily_action(obs), min_time),
+                                      "predictions/s", True),
+        "model_runner.batch": result(batch_rate * batch_size, "predictions/s", True, batch_size=batch_size),
+    }
+
+def _rf_models():
+    """
+    The served forests (the registry's active "rf" version, else the shipped
+    files) when present, otherwise same-shaped forests fitted on synthetic data.
+    """
+    from app.model_registry import UNREGISTERED, active_dir
+    from app.recommender import load_rf_models
+    try:
+        models_dir, version = active_dir("rf", legacy_dir=MODELS_DIR)
+        return (*load_rf_models(models_dir), "shipped" if version == UNREGISTERED else f"registry {version}")
+    except FileNotFoundError:
+        pass
+
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    from app.recommender import IRRIGATION_FEATURES, FERTILIZER_FEATURES
+    rng = np.random.default_rng(0)
+    models = []
+    for features in (IRRIGATION_FEATURES, FERTILIZER_FEATURES):
+        X = pd.DataFrame(rng.random((5000, len(features))), columns=list(features))
+        y = X.to_numpy() @ rng.random(len(features)) + rng.normal(0, 0.1, len(X))
+        models.append(RandomForestRegressor(n_estimators=100, n_jobs=1, random_state=0).fit(X, y))
+    return models[0], models[1], "synthetic"
+
+SAMPLE_INPUTS = {
+    'soil_moisture':20.0, 'avg_temp':25.0, 'rainfall':2.0, 'et0':3.5, 'ndvi':0.75, 'humidity':65.0,
+    'wind':1.5, 'doy':180, 'plant_height':80.0, 'days_since_planting':40, 'lai':3.2,
+    'organic_matter':3.0, 'soil_ph':6.5, 'awc':60.0, 'cumulative_n':30.0, 'last_fert_days':10,
+    'irrigation_applied':5.0,
+}
+
+def bench_rules(min_time):
+    try:
+        from app.recommender import recommend, apply_rules
+        irrigation_model, fertilizer_model, source = _rf_models()
+    except ImportError as e:
+        raise Skip(e)
+    return {
+        "dashboard.recommend_per_field": result(
+            throughput(lambda: recommend(SAMPLE_INPUTS, 2, irrigation_model, fertilizer_model), min_time),
+            "fields/s", True, models=source),
+        "dashboard.rules_only": result(
+            throughput(lambda: apply_rules(SAMPLE_INPUTS, 2, 8.5, 35.0), min_time), "fields/s", True),
+    }
+
+def bench_simulator(min_time):
+    try:
+        from app.components import simulator
+    except ImportError as e:
+        raise Skip(e)
+    history = simulator.init_manual_history(steps=1000)
+    return {
+        "simulator.simulate_step": result(
+            throughput(lambda: simulator.simulate_step(30.0, 0.5), min_time), "steps/s", True),
+        "simulator.init_history_48": result(
+            throughput(lambda: simulator.init_manual_history(steps=48), min_time), "histories/s", True),
+        "simulator.append_record_1k": result(
+            throughput(lambda: simulator.append_manual_record(history, 30, 0.5, 5, 0.2, 22, 1), min_time),
+            "appends/s", True, history_rows=len(history)),
+    }
+
+def bench_scenarios(min_time, seasons=2000):
+    try:
+        import os
+        from app.scenarios import run_scenarios
+    except ImportError as e:
+        raise Skip(e)
+    results = {}
+    for workers in sorted({1, os.cpu_count() or 1}):
+        started = time.perf_counter()
+        run_scenarios(seasons, seed=0, workers=workers)
+        results[f"scenarios.seasons_{workers}w"] = result(
+            seasons / (time.perf_counter() - started), "seasons/s", True, days=120)
+    return results
+
+def bench_db(min_time):
+    from app import auth, db_utils
+    tmp = Path(tempfile.mkdtemp(prefix="agrisense-bench-"))
+    auth.DB_PATH = str(tmp / "users.db")
+    db_utils.DB_PATH = tmp / "users.db"
+    auth.create_user("Bench", "bench", "bench@example.com", "secret")
+    db_utils.init_db()
+    return {
+        "auth.verify_user": result(throughput(lambda: auth.verify_user("bench", "secret"), min_time),
+                                   "logins/s", True),
+        "db_utils.log_action": result(throughput(lambda: db_utils.log_action("bench", "benchmark"), min_time),
+                                      "inserts/s", True),
+    }
+
+def bench_ingest(min_time, rows=200_000):
+    try:
+        import numpy as np
+        import pandas as pd
+        from app import sensor_store
+        from app.ingest import VALID_RANGES, ingest_csv
+    except ImportError as e:
+        raise Skip(e)
+    tmp = Path(tempfile.mkdtemp(prefix="agrisense-bench-"))
+    sensor_store.SENSORS_DB_PATH = tmp / "sensors.db"
+    rng = np.random.default_rng(0)
+    metric = rng.choice(["soil_moisture", "ndvi", "et0", "avg_temp", "humidity"], rows)
+    lower = pd.Series(metric).map({m: lo for m, (lo, _) in VALID_RANGES.items()}).to_numpy()
+    upper = pd.Series(metric).map({m: hi for m, (_, hi) in VALID_RANGES.items()}).to_numpy()
+    pd.DataFrame({
+        "field_id": rng.integers(1, 50, rows),
+        "ts": 1.7e9 + np.sort(rng.uniform(0, 30 * 86400, rows)).round(1),
+        "metric": metric,
+        "value": rng.uniform(lower, upper).round(3),  # every reading valid: throughput counts stored rows
+    }).to_csv(tmp / "readings.csv", index=False)
+    summary = ingest_csv(tmp / "readings.csv")
+    return {
+        "ingest.csv_long": result(summary["accepted_rows_per_s"], "rows/s", True,
+                                  rows=summary["read"], rejected=summary["rejected"]),
+    }
+
+BENCHMARKS = {
+    "env": bench_env,
+    "model_runner": bench_model_runner,
+    "rules": bench_rules,
+    "simulator": bench_simulator,
+    "scenarios": bench_scenarios,
+    "db": bench_db,
+    "ingest": bench_ingest,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per measurement")
+    parser.add_argument("--save", default=str(RESULTS_DIR / "suite.json"))
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only:
+        try:
+            results.update(BENCHMARKS[name](args.min_time))
+        except Skip as e:
+            print(f"skipped {name}: {e}")
+
+    save_results(args.save, results)
+    baseline = load_results(args.baseline) if args.baseline else None
+    return report(results, baseline, args.tolerance)
+
+if __name__ == "__main__":
+    sys.exit(main())
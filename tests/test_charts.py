@@ -0,0 +1,38 @@
+# tests/test_charts.py
+import io
+
+import pyarrow as pa
+from streamlit.testing.v1 import AppTest
+
+
+def _stream_app():
+    from app.components.charts import LiveChartStream
+    from app.components.simulator import run_simulation
+    import numpy as np
+
+    # fps so low that only the first push renders: everything else waits for finish()
+    with LiveChartStream(window=50, fps=0.001) as stream:
+        run_simulation(120, rng=np.random.default_rng(0), on_step=stream.push)
+
+
+def _chart_steps(at):
+    return [pa.ipc.open_stream(io.BytesIO(c.proto.datasets[0].data.data)).read_all().column("Step").to_pylist()
+            for c in _nested_charts(at.main)]
+
+
+def _nested_charts(node):
+    found = []
+    for child in getattr(node, "children", {}).values():
+        if getattr(child, "type", None) == "vega_lite_chart":
+            found.append(child)
+        found += _nested_charts(child)
+    return found
+
+
+def test_finish_draws_points_after_the_last_frame():
+    at = AppTest.from_function(_stream_app).run()
+    assert not at.exception
+    steps = _chart_steps(at)
+    assert len(steps) == 3
+    for s in steps:
+        assert s == list(range(70, 120))  # the last `window` steps, final one included
@@ -0,0 +1,22 @@
+# tests/test_db_utils.py
+import sqlite3
+
+from app import auth, db_utils
+
+
+def test_keyset_pages_cover_every_match_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_utils, "DB_PATH", tmp_path / "users.db")
+    monkeypatch.setattr(auth, "DB_PATH", str(db_utils.DB_PATH))
+    auth.init_db().close()  # the users table is owned by auth
+    conn = sqlite3.connect(db_utils.DB_PATH)
+    conn.executemany("INSERT INTO users (name, username, email, role) VALUES (?, ?, ?, 'farmer')",
+                     [(f"U{i}", f"{'ab' if i % 2 else 'cd'}{i:02d}", f"u{i}@x.org") for i in range(30)])
+    conn.commit()
+    conn.close()
+
+    seen, after_id = [], 0
+    while page := db_utils.fetch_users_page(after_id, 4, search="ab"):
+        seen += [u["username"] for u in page]
+        after_id = page[-1]["id"]
+    assert seen == [f"ab{i:02d}" for i in range(1, 30, 2)]
+    assert db_utils.count_users("ab") == len(seen)
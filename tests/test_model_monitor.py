@@ -0,0 +1,23 @@
+# tests/test_model_monitor.py
+import sqlite3
+
+from app import db_utils, model_monitor
+
+
+def test_model_version_is_added_to_old_tables_and_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_utils, "DB_PATH", tmp_path / "users.db")
+    conn = sqlite3.connect(db_utils.DB_PATH)
+    conn.execute("CREATE TABLE model_metrics (model TEXT PRIMARY KEY, label TEXT, r2 REAL, mae REAL, "
+                 "n_rows INTEGER, latency_p50_ms REAL, latency_p95_ms REAL, latency_p99_ms REAL, "
+                 "batch_rows_per_s REAL, drift TEXT, evaluated_at TEXT)")
+    conn.execute("INSERT INTO model_metrics (model, label, r2) VALUES ('fertilizer', 'Fertilizer Model', 0.5)")
+    conn.commit()
+    conn.close()
+
+    metrics = {"label": "Irrigation Model", "r2": 0.9, "mae": 1.0, "n_rows": 10, "latency_p50_ms": 1.0,
+               "latency_p95_ms": 2.0, "latency_p99_ms": 3.0, "batch_rows_per_s": float("nan"),
+               "model_version": "v3"}
+    model_monitor.save_metrics("irrigation", metrics)
+    stored = model_monitor.load_latest_metrics()
+    assert stored["irrigation"]["model_version"] == "v3"
+    assert stored["fertilizer"]["model_version"] is None
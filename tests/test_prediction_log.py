@@ -0,0 +1,67 @@
+# tests/test_prediction_log.py
+import sqlite3
+
+import pytest
+
+from app import prediction_log
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_log, "PREDICTIONS_DB_PATH", tmp_path / "predictions.db")
+    logger = prediction_log.PredictionLogger(batch_size=2, flush_interval=3600)
+    yield logger
+    logger.close()
+
+
+def _stored():
+    conn = prediction_log.get_connection()
+    rows = conn.execute("SELECT username FROM prediction_log ORDER BY id").fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def test_failing_batch_drops_only_bad_rows(logger):
+    logger.log({"ts": 1.0, "username": "a"})
+    logger.log({"ts": 2.0, "username": {"not": "bindable"}})  # fails the whole executemany
+    logger.log({"ts": 3.0, "username": "c"})
+    assert logger.flush() == 2
+    assert _stored() == ["a", "c"]
+    assert logger.errors == 1 and logger.dropped == 1
+    assert logger._thread.is_alive()
+
+
+def test_locked_database_requeues_batch(logger, monkeypatch):
+    logger.log({"ts": 1.0, "username": "a"})
+    blocker = sqlite3.connect(prediction_log.PREDICTIONS_DB_PATH)
+    blocker.execute("BEGIN EXCLUSIVE")
+    connect = prediction_log.get_connection
+
+    def short_timeout():
+        conn = connect()
+        conn.execute("PRAGMA busy_timeout = 10")
+        return conn
+
+    monkeypatch.setattr(prediction_log, "get_connection", short_timeout)
+    assert logger.flush() == 0
+    assert logger.errors == 1 and logger.dropped == 0
+    blocker.rollback()
+    blocker.close()
+    assert logger.flush() == 1
+    assert _stored() == ["a"]
+
+
+def test_writer_thread_survives_flush_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_log, "PREDICTIONS_DB_PATH", tmp_path / "predictions.db")
+    logger = prediction_log.PredictionLogger(flush_interval=0.01)
+    flush = logger.flush
+
+    def broken_flush():
+        raise RuntimeError("boom")
+
+    logger.flush = broken_flush
+    logger._stop.wait(0.1)  # let the thread hit the error a few times
+    assert logger._thread.is_alive()
+    assert logger.errors >= 1
+    logger.flush = flush
+    logger.close()
@@ -0,0 +1,58 @@
+# tests/test_recommender.py
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.recommender import INPUT_RANGES, apply_rules, apply_rules_batch
+
+STAGES = [-1, 0, 1, 2, 2.5, 3, 4, 5, 6]
+
+
+def _grid():
+    """Every stage crossed with range-edge, threshold and midpoint values of the rule inputs."""
+    rng = np.random.default_rng(0)
+    base = {k: (lo + hi) / 2 for k, (lo, hi) in INPUT_RANGES.items()}
+    varied = {
+        "soil_moisture": [INPUT_RANGES["soil_moisture"][0], 20.0, 26.0, INPUT_RANGES["soil_moisture"][1]],
+        "rainfall": [0.0, 6.0, 12.0, 40.0],
+        "avg_temp": [20.0, 31.0],
+        "humidity": [35.0, 70.0],
+        "irrigation_applied": [0.0, 20.0],
+        "cumulative_n": [40.0, 100.0, 300.0],
+        "last_fert_days": [3, 10],
+    }
+    rows = []
+    for stage, values in itertools.product(STAGES, itertools.product(*varied.values())):
+        row = {**base, **dict(zip(varied, values)), "growth_stage_encoded": stage}
+        for k in ("et0", "ndvi", "plant_height", "organic_matter", "soil_ph"):
+            lo, hi = INPUT_RANGES[k]
+            row[k] = rng.uniform(lo, hi)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_batch_rules_match_scalar_rules():
+    inputs = _grid()
+    rng = np.random.default_rng(1)
+    irrigation_ml = rng.uniform(0, 30, len(inputs))
+    fertilizer_ml = rng.uniform(0, 80, len(inputs))
+    batch = apply_rules_batch(inputs, irrigation_ml, fertilizer_ml)
+    for i, row in enumerate(inputs.to_dict("records")):
+        scalar = apply_rules(row, row["growth_stage_encoded"], irrigation_ml[i], fertilizer_ml[i])
+        for key, value in scalar.items():
+            if key == "fert_type":
+                assert batch[key].iloc[i] == value, (row["growth_stage_encoded"], key)
+            else:
+                assert batch[key].iloc[i] == pytest.approx(value, rel=1e-12, abs=1e-12), (i, key)
+
+
+@pytest.mark.parametrize("stage, expected", [(-1, "Top-dressing / Maintenance"), (0, "Top-dressing / Maintenance"),
+                                             (1, "N fertilizer"), (2, "N fertilizer"), (3, "Balanced NPK"),
+                                             (5, "Top-dressing / Maintenance")])
+def test_fertilizer_type_for_out_of_range_stages(stage, expected):
+    inputs = _grid().iloc[:1].assign(growth_stage_encoded=stage)
+    batch = apply_rules_batch(inputs, np.zeros(1), np.zeros(1))
+    assert batch["fert_type"].iloc[0] == expected
+    assert apply_rules(inputs.iloc[0].to_dict(), stage, 0.0, 0.0)["fert_type"] == expected